@@ -0,0 +1,11 @@
+"""
+بنچمارک‌های سرعت معیارهای تقسیم و WeightedDecisionTreeModel
+
+اجرا از ریشه پروژه:
+
+    python -m benchmarks.run --output results/<commit>.json
+    python -m benchmarks.run --quick --compare results/<base>.json
+
+نتایج به صورت JSON (اطلاعات محیط اجرا + فهرست اندازه‌گیری‌ها) نوشته می‌شوند تا
+بتوان دو commit را با هم مقایسه کرد.
+"""
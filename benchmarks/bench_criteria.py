@@ -0,0 +1,81 @@
+"""
+بنچمارک معیارهای تقسیم در src/criteria
+
+برای هر معیار ثبت شده در criteria.registry سه حالت اندازه‌گیری می‌شود:
+- labels      : تابع اصلی معیار روی آرایه برچسب‌های دو طرف (y_left, y_right)
+- counts      : ساخت هیستوگرام کلاس‌ها با class_counts و هسته شمارش‌محور روی آن
+- counts_batch: هسته شمارش‌محور روی ماتریس شمارش چند آستانه کاندید (مثل جستجوی تقسیم)
+
+و یک رکورد fused:counts_batch که همه معیارهای داخلی را با criteria.fused در یک گذر
+روی همان ماتریس‌ها محاسبه می‌کند (قابل مقایسه با جمع counts_batch همه معیارها).
+"""
+
+import numpy as np
+
+from benchmarks.common import time_call
+from criteria.base import class_counts
+from criteria.fused import fused_scores, is_fusable
+from criteria.registry import count_kernels
+
+SIZES = [10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+QUICK_SIZES = [10 ** 2, 10 ** 3, 10 ** 4]
+CLASS_COUNTS = [2, 5, 20]
+N_CANDIDATES = 256
+
+
+def make_split(n_labels, n_classes, random_state=0):
+    """برچسب‌های تصادفی با n_classes کلاس که در یک نقطه تصادفی به دو طرف تقسیم شده‌اند."""
+    rng = np.random.default_rng(random_state)
+    y = rng.integers(0, n_classes, size=n_labels)
+    cut = int(rng.integers(1, n_labels))
+    return y[:cut], y[cut:]
+
+
+def make_candidate_counts(n_labels, n_classes, n_candidates=N_CANDIDATES, random_state=0):
+    """شمارش کلاس دو طرف برای n_candidates آستانه روی یک ویژگی مرتب شده."""
+    rng = np.random.default_rng(random_state)
+    y = rng.integers(0, n_classes, size=n_labels)
+    cumulative = np.cumsum(np.eye(n_classes)[y], axis=0)
+    positions = np.linspace(0, n_labels - 2, min(n_candidates, n_labels - 1)).astype(int)
+    left = cumulative[positions]
+    return left, cumulative[-1] - left
+
+
+def run(sizes=SIZES, class_counts_list=CLASS_COUNTS, repeat=5):
+    """
+    اجرای بنچمارک همه معیارها
+
+    Returns:
+    list of dict
+        یک رکورد برای هر (معیار، حالت، تعداد برچسب، تعداد کلاس)
+    """
+    results = []
+    kernels_by_func = count_kernels()
+    for n_labels in sizes:
+        for n_classes in class_counts_list:
+            y_left, y_right = make_split(n_labels, n_classes)
+            left, right = make_candidate_counts(n_labels, n_classes)
+            classes = np.arange(n_classes)
+            for func, kernel in kernels_by_func.items():
+                params = {"n_labels": n_labels, "n_classes": n_classes}
+                cases = {
+                    "labels": lambda: func(y_left, y_right),
+                    "counts": lambda: kernel(*class_counts(y_left, y_right, classes)[1:]),
+                    "counts_batch": lambda: kernel(left, right),
+                }
+                for mode, call in cases.items():
+                    results.append(_timed_record(f"{func.__name__}:{mode}", params, call, repeat))
+            params = {"n_labels": n_labels, "n_classes": n_classes}
+            kernels = [kernel for kernel in kernels_by_func.values() if is_fusable(kernel)]
+            results.append(_timed_record("fused:counts_batch", params, lambda: fused_scores(left, right, kernels),
+                                         repeat))
+    return results
+
+
+def _timed_record(name, params, call, repeat):
+    record = {"suite": "criteria", "name": name, "params": dict(params)}
+    try:
+        record.update(time_call(call, repeat=repeat))
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
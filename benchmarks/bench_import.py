@@ -0,0 +1,98 @@
+"""
+بنچمارک زمان import ماژول‌های مدل
+
+هر ماژول در یک پردازه تازه import می‌شود (تا کش sys.modules اثری نداشته باشد) و زمان
+import به همراه ماژول‌های سنگینی که در همان import بارگذاری شده‌اند ثبت می‌شود. ماژول‌های
+معیار (criteria.*) باید فقط در اولین استفاده بارگذاری شوند، پس یک import ساده مدل
+نباید هیچ‌کدام از آن‌ها را بارگذاری کند.
+"""
+
+import json
+import subprocess
+import sys
+
+from benchmarks.common import SRC_PATH
+
+MODULES = ["model.weighted_decision_tree", "model.persistence", "model.weighted_random_forest"]
+# ماژول‌هایی که بارگذاری شدن آن‌ها در import مدل گزارش می‌شود
+HEAVY_MODULES = ["scipy", "pandas", "sklearn", "custom_tree_classifier"]
+# ماژول‌های معیاری که import مدل نباید بارگذاری کند (criteria.base و registry و fused لازم‌اند)
+LAZY_PREFIX = "criteria."
+EAGER_CRITERIA = {"criteria.base", "criteria.registry", "criteria.fused"}
+
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure_import(module, repeat=5):
+    """
+    زمان import ماژول در پردازه تازه (کمینه repeat اجرا) و ماژول‌های بارگذاری شده
+
+    Returns:
+    dict
+        seconds، repeat، heavy (ماژول‌های سنگین بارگذاری شده) و eager_criteria
+        (ماژول‌های معیاری که باید تنبل می‌ماندند)
+    """
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _PROBE.format(src=SRC_PATH, module=module)],
+                                capture_output=True, text=True, check=True).stdout
+        probe = json.loads(output.strip().splitlines()[-1])
+        times.append(probe["seconds"])
+    loaded = probe["modules"]
+    return {
+        "seconds": min(times),
+        "repeat": repeat,
+        "heavy": [name for name in HEAVY_MODULES if name in loaded],
+        "eager_criteria": [name for name in loaded
+                           if name.startswith(LAZY_PREFIX) and name not in EAGER_CRITERIA],
+    }
+
+
+def run(modules=MODULES, repeat=5):
+    """
+    اجرای بنچمارک import همه ماژول‌ها
+
+    Returns:
+    list of dict
+        یک رکورد برای هر ماژول
+    """
+    results = []
+    for module in modules:
+        record = {"suite": "import", "name": module, "params": {}}
+        try:
+            record.update(measure_import(module, repeat=repeat))
+        except (subprocess.CalledProcessError, ValueError) as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        results.append(record)
+    return results
+
+
+def check_budget(results, budget_ms):
+    """
+    بررسی بودجه زمان import
+
+    Returns:
+    list of str
+        پیام هر تخلف: import کندتر از budget_ms، خطای import یا بارگذاری زودهنگام
+        ماژول‌های معیار؛ لیست خالی یعنی همه ماژول‌ها در بودجه هستند
+    """
+    failures = []
+    for record in results:
+        if record["suite"] != "import":
+            continue
+        if "error" in record:
+            failures.append(f"{record['name']}: {record['error']}")
+            continue
+        if record["seconds"] * 1e3 > budget_ms:
+            failures.append(f"{record['name']}: {record['seconds'] * 1e3:.1f} ms > {budget_ms:g} ms")
+        if record["eager_criteria"]:
+            failures.append(f"{record['name']}: ماژول‌های معیار زودهنگام بارگذاری شدند: "
+                            f"{', '.join(record['eager_criteria'])}")
+    return failures
@@ -0,0 +1,71 @@
+"""
+بنچمارک آموزش و پیش‌بینی WeightedDecisionTreeModel
+
+- churn    : دیتاست notebooks/datasets/customer_churn_data.csv با عمق‌های مختلف
+- churn_categorical: همان دیتاست با ستون‌های دسته‌ای خام و categorical_features به جای one-hot
+- churn_sparse: همان دیتاست one-hot شده به صورت ماتریس CSC (scipy.sparse)
+- synthetic: داده مصنوعی با تعداد سطر، ویژگی و عمق متفاوت
+"""
+
+import logging
+
+from benchmarks.common import (CHURN_CATEGORICAL, load_churn, load_churn_categorical, load_churn_sparse,
+                               synthetic_data, time_call)
+from model.weighted_decision_tree import WeightedDecisionTreeModel
+
+DEPTHS = [3, 5]
+SYNTHETIC_GRID = [
+    # (تعداد سطر، تعداد ویژگی)
+    (1_000, 5),
+    (10_000, 5),
+    (10_000, 20),
+    (100_000, 5),
+]
+QUICK_SYNTHETIC_GRID = [(1_000, 5), (5_000, 10)]
+
+
+def time_model(X, y, max_depth, repeat=3, **model_kwargs):
+    """زمان fit و predict یک مدل؛ هر fit با یک مدل تازه انجام می‌شود تا کش FN اثر نگذارد."""
+    fitted = {}
+
+    def fit():
+        fitted["model"] = WeightedDecisionTreeModel(max_depth=max_depth, **model_kwargs)
+        fitted["model"].fit(X, y)
+
+    fit_time = time_call(fit, repeat=repeat, min_time=0, max_repeat=repeat)
+    predict_time = time_call(lambda: fitted["model"].predict(X), repeat=repeat)
+    return fit_time, predict_time
+
+
+def run(synthetic_grid=SYNTHETIC_GRID, depths=DEPTHS, repeat=3, **model_kwargs):
+    """
+    اجرای بنچمارک مدل
+
+    Returns:
+    list of dict
+        برای هر پیکربندی یک رکورد fit و یک رکورد predict
+    """
+    # پیام‌های آموزش مدل در خروجی بنچمارک چاپ نشوند
+    logging.getLogger("model.weighted_decision_tree").setLevel(logging.WARNING)
+
+    # (نام، تابع بارگذاری، پارامترهای اضافه مدل)
+    datasets = [("churn", load_churn, {}),
+                ("churn_categorical", load_churn_categorical, {"categorical_features": CHURN_CATEGORICAL}),
+                ("churn_sparse", load_churn_sparse, {})]
+    datasets += [(f"synthetic", lambda n=n, f=f: synthetic_data(n, f), {}) for n, f in synthetic_grid]
+
+    results = []
+    for dataset, load, dataset_kwargs in datasets:
+        X, y = load()
+        for max_depth in depths:
+            params = {"dataset": dataset, "n_rows": X.shape[0], "n_features": X.shape[1], "max_depth": max_depth}
+            params.update(model_kwargs)
+            try:
+                fit_time, predict_time = time_model(X, y, max_depth, repeat=repeat, **model_kwargs, **dataset_kwargs)
+            except Exception as e:
+                results.append({"suite": "model", "name": "fit", "params": params,
+                                "error": f"{type(e).__name__}: {e}"})
+                continue
+            results.append({"suite": "model", "name": "fit", "params": dict(params), **fit_time})
+            results.append({"suite": "model", "name": "predict", "params": dict(params), **predict_time})
+    return results
@@ -0,0 +1,135 @@
+"""
+ابزارهای مشترک بنچمارک‌ها: زمان‌سنجی، داده‌ها، نوشتن و مقایسه نتایج
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+CHURN_CSV = os.path.join(PROJECT_ROOT, "notebooks", "datasets", "customer_churn_data.csv")
+# ستون‌های دسته‌ای دیتاست churn
+CHURN_CATEGORICAL = ["Gender", "Payment Method"]
+
+
+def time_call(func, repeat=5, min_time=0.2, max_repeat=50):
+    """
+    زمان اجرای func بر حسب ثانیه
+
+    func حداقل `repeat` بار اجرا می‌شود و اگر مجموع زمان‌ها از min_time کمتر باشد تا
+    سقف max_repeat تکرار ادامه پیدا می‌کند. کمینه و میانه زمان‌ها برگردانده می‌شود.
+    """
+    times = []
+    while len(times) < repeat or (sum(times) < min_time and len(times) < max_repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {"seconds": min(times), "median": float(np.median(times)), "repeat": len(times)}
+
+
+def load_churn():
+    """دیتاست customer_churn_data.csv با ستون‌های دسته‌ای one-hot شده؛ churn برچسب ۱ دارد."""
+    import pandas as pd
+
+    df = pd.read_csv(CHURN_CSV).dropna()
+    y = (df.pop("Churn") == "churn").astype(int).values
+    X = pd.get_dummies(df, columns=CHURN_CATEGORICAL).values.astype(float)
+    return X, y
+
+
+def load_churn_sparse():
+    """همان دیتاست one-hot شده churn به صورت ماتریس CSC (scipy.sparse)."""
+    from scipy import sparse
+
+    X, y = load_churn()
+    return sparse.csc_matrix(X), y
+
+
+def load_churn_categorical():
+    """همان دیتاست churn با ستون‌های دسته‌ای خام (برای categorical_features=CHURN_CATEGORICAL)."""
+    import pandas as pd
+
+    df = pd.read_csv(CHURN_CSV).dropna()
+    y = (df.pop("Churn") == "churn").astype(int).values
+    return df, y
+
+
+def synthetic_data(n_rows, n_features, n_classes=2, random_state=0):
+    """
+    داده مصنوعی با ویژگی‌های پیوسته و برچسب وابسته به دو ویژگی اول (به اضافه نویز)
+    تا درخت تقسیم‌های معنادار پیدا کند.
+    """
+    rng = np.random.default_rng(random_state)
+    X = rng.normal(size=(n_rows, n_features)).round(3)
+    signal = X[:, 0] + 0.5 * X[:, min(1, n_features - 1)] + rng.normal(scale=0.5, size=n_rows)
+    edges = np.quantile(signal, np.linspace(0, 1, n_classes + 1)[1:-1])
+    y = np.searchsorted(edges, signal)
+    return X, y
+
+
+def environment_info():
+    """اطلاعات محیط اجرا برای ثبت در کنار نتایج."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def result_key(record):
+    """کلید یکتای یک اندازه‌گیری برای مقایسه بین دو اجرا."""
+    params = ",".join(f"{key}={value}" for key, value in sorted(record["params"].items()))
+    return f"{record['suite']}/{record['name']}[{params}]"
+
+
+def write_results(path, results):
+    """نوشتن نتایج به همراه اطلاعات محیط اجرا در فایل JSON."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment_info(), "results": results}, f, indent=2)
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_results(baseline, current, tolerance=0.1):
+    """
+    مقایسه دو اجرا بر اساس کمینه زمان هر اندازه‌گیری
+
+    Returns:
+    list of dict
+        برای هر کلید مشترک: زمان پایه، زمان فعلی، نسبت (فعلی / پایه) و وضعیت
+        ("faster"، "slower" یا "same" با آستانه tolerance)
+    """
+    base = {result_key(r): r for r in baseline["results"] if "seconds" in r}
+    rows = []
+    for record in current["results"]:
+        key = result_key(record)
+        if key not in base or "seconds" not in record:
+            continue
+        ratio = record["seconds"] / base[key]["seconds"] if base[key]["seconds"] > 0 else float("inf")
+        status = "slower" if ratio > 1 + tolerance else "faster" if ratio < 1 - tolerance else "same"
+        rows.append({"key": key, "baseline": base[key]["seconds"], "current": record["seconds"],
+                     "ratio": ratio, "status": status})
+    return rows
@@ -0,0 +1,77 @@
+"""
+اجرای بنچمارک‌ها و نوشتن/مقایسه نتایج
+
+    python -m benchmarks.run [--suite criteria|model|import|all] [--quick]
+                             [--output results.json] [--compare baseline.json]
+                             [--import-budget-ms 500]
+"""
+
+import argparse
+import sys
+
+from benchmarks import bench_criteria, bench_import, bench_model
+from benchmarks.common import compare_results, load_results, write_results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="بنچمارک معیارهای تقسیم و WeightedDecisionTreeModel")
+    parser.add_argument("--suite", choices=["criteria", "model", "import", "all"], default="all")
+    parser.add_argument("--quick", action="store_true", help="اندازه‌های کوچک برای بررسی سریع")
+    parser.add_argument("--repeat", type=int, default=None, help="حداقل تعداد تکرار هر اندازه‌گیری")
+    parser.add_argument("--max-bins", type=int, default=None, help="آموزش مدل در حالت هیستوگرامی")
+    parser.add_argument("--growth", choices=["depth", "level"], default=None,
+                        help="روش رشد درخت مدل (عمق-اول یا سطح‌به‌سطح)")
+    parser.add_argument("--output", default=None, help="مسیر فایل JSON نتایج")
+    parser.add_argument("--compare", default=None, help="فایل JSON یک اجرای قبلی برای مقایسه")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="تغییر نسبی کمتر از این مقدار 'same' گزارش می‌شود")
+    parser.add_argument("--import-budget-ms", type=float, default=None,
+                        help="سقف زمان import هر ماژول مدل (میلی‌ثانیه)؛ با تخلف کد خروج ۱ برگردانده می‌شود")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = []
+    if args.suite in ("criteria", "all"):
+        sizes = bench_criteria.QUICK_SIZES if args.quick else bench_criteria.SIZES
+        results += bench_criteria.run(sizes=sizes, repeat=args.repeat or 5)
+    if args.suite in ("model", "all"):
+        grid = bench_model.QUICK_SYNTHETIC_GRID if args.quick else bench_model.SYNTHETIC_GRID
+        model_kwargs = {} if args.max_bins is None else {"max_bins": args.max_bins}
+        if args.growth is not None:
+            model_kwargs["growth"] = args.growth
+        results += bench_model.run(synthetic_grid=grid, repeat=args.repeat or 3, **model_kwargs)
+    if args.suite in ("import", "all"):
+        results += bench_import.run(repeat=args.repeat or 5)
+
+    for record in results:
+        params = " ".join(f"{key}={value}" for key, value in record["params"].items())
+        timing = record.get("error") or f"{record['seconds'] * 1e3:10.3f} ms"
+        print(f"{record['suite']:9s} {record['name']:45s} {params:60s} {timing}")
+
+    if args.output:
+        write_results(args.output, results)
+        print(f"\nنتایج در {args.output} نوشته شد.")
+
+    status = 0
+    if args.import_budget_ms is not None:
+        failures = bench_import.check_budget(results, args.import_budget_ms)
+        print(f"\nبودجه import: {args.import_budget_ms:g} ms")
+        for failure in failures:
+            print("  over   ", failure)
+        if failures:
+            status = 1
+
+    if args.compare:
+        rows = compare_results(load_results(args.compare), {"results": results}, args.tolerance)
+        print("\nمقایسه با", args.compare)
+        for row in rows:
+            print(f"{row['status']:7s} x{row['ratio']:6.2f}  {row['key']}")
+        if any(row["status"] == "slower" for row in rows):
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
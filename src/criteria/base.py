@@ -58,3 +58,61 @@ class BaseCriterion(ABC):
         if len(y_left) == 0 and len(y_right) == 0:
             raise ValueError("هم شاخه چپ و هم شاخه راست نمی‌توانند همزمان خالی باشند.")
         return y_left, y_right
+
+
+def _branch_weights(sample_weight, n_samples):
+    return np.ones(n_samples) if sample_weight is None else np.asarray(sample_weight, dtype=float)
+
+
+def class_counts(y_left, y_right, classes=None, sample_weight_left=None, sample_weight_right=None):
+    """
+    ساخت هیستوگرام کلاس‌ها برای دو شاخه یک تقسیم (فقط یک بار پیمایش برچسب‌ها)
+
+    با وزن نمونه‌ها، شمارش هر کلاس مجموع وزن نمونه‌های آن کلاس است؛ اگر فقط وزن یک
+    شاخه داده شود، نمونه‌های شاخه دیگر وزن ۱ دارند.
+
+    Parameters:
+    -----------
+    y_left : array-like
+        برچسب‌های نمونه‌های شاخه چپ
+    y_right : array-like
+        برچسب‌های نمونه‌های شاخه راست
+    classes : array-like, optional
+        مجموعه مرتب کلاس‌ها؛ اگر داده نشود از اجتماع برچسب‌های دو شاخه ساخته می‌شود
+    sample_weight_left, sample_weight_right : array-like, optional
+        وزن نمونه‌های هر شاخه (هم‌تراز با برچسب‌ها)
+
+    Returns:
+    --------
+    tuple of np.ndarray
+        (classes, left_counts, right_counts) که شمارش‌ها هم‌تراز با classes هستند
+    """
+    y_left = np.asarray(y_left)
+    y_right = np.asarray(y_right)
+    if classes is None:
+        classes = np.unique(np.concatenate([y_left, y_right]))
+    classes = np.asarray(classes)
+    k = len(classes)
+    if sample_weight_left is not None or sample_weight_right is not None:
+        sample_weight_left = _branch_weights(sample_weight_left, len(y_left))
+        sample_weight_right = _branch_weights(sample_weight_right, len(y_right))
+    left_counts = np.bincount(np.searchsorted(classes, y_left), sample_weight_left, minlength=k)[:k]
+    right_counts = np.bincount(np.searchsorted(classes, y_right), sample_weight_right, minlength=k)[:k]
+    return classes, left_counts, right_counts
+
+
+def as_count_arrays(left_counts, right_counts):
+    """
+    تبدیل بردارهای شمارش کلاس به آرایه اعشاری و محاسبه تعداد نمونه هر شاخه
+
+    شمارش‌ها می‌توانند یک‌بعدی (یک تقسیم) یا چندبعدی باشند؛ محور آخر همیشه محور کلاس‌هاست.
+    """
+    left = np.asarray(left_counts, dtype=float)
+    right = np.asarray(right_counts, dtype=float)
+    return left, right, left.sum(axis=-1), right.sum(axis=-1)
+
+
+def finalize_score(score):
+    """برای ورودی یک‌بعدی عدد float و برای ورودی دسته‌ای آرایه امتیازها را برمی‌گرداند."""
+    score = np.asarray(score, dtype=float)
+    return float(score) if score.ndim == 0 else score
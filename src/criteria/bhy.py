@@ -1,4 +1,6 @@
 import numpy as np
+from criteria.base import class_counts
+from criteria.fused import fused_formula, score_counts
 
 def bhattacharyya_coefficient(y_left, y_right, epsilon=1e-10):
     y_left = np.asarray(y_left)
@@ -34,5 +36,30 @@ def bhattacharyya_distance(y_left, y_right, epsilon=1e-10):
         bd = float('inf')
     return bd
 
-def bhattacharyya_criterion(y_left, y_right):
+def bhattacharyya_criterion(y_left, y_right, sample_weight_left=None, sample_weight_right=None):
+    if sample_weight_left is not None or sample_weight_right is not None:
+        _, left_counts, right_counts = class_counts(y_left, y_right, None, sample_weight_left, sample_weight_right)
+        return bhattacharyya_criterion_from_counts(left_counts, right_counts)
     return bhattacharyya_distance(y_left, y_right)
+
+
+def bhattacharyya_from_statistics(s, epsilon=1e-10):
+    """فرمول فاصله Bhattacharyya روی مقادیر میانی مشترک (CountStatistics)."""
+    present = s.parent > 0
+    k = present.sum(axis=-1)
+    p_smooth = (s.left + epsilon) / (s.n_left + k * epsilon)[..., None]
+    q_smooth = (s.right + epsilon) / (s.n_right + k * epsilon)[..., None]
+    bc = np.where(present, np.sqrt(p_smooth * q_smooth), 0.0).sum(axis=-1)
+    bc = np.where(s.both, bc, 0.0)
+    return np.where(bc > 0, -np.log(bc), np.inf)
+
+
+@fused_formula(bhattacharyya_from_statistics)
+def bhattacharyya_criterion_from_counts(left_counts, right_counts, epsilon=1e-10):
+    """
+    محاسبه فاصله Bhattacharyya از روی بردارهای شمارش کلاس دو شاخه
+
+    هموارسازی فقط روی کلاس‌هایی انجام می‌شود که حداقل در یکی از دو شاخه حضور دارند
+    تا نتیجه با نسخه مبتنی بر برچسب یکسان باشد.
+    """
+    return score_counts(bhattacharyya_from_statistics, left_counts, right_counts, epsilon)
@@ -1,5 +1,6 @@
 import numpy as np
-from scipy import stats
+from criteria.base import class_counts
+from criteria.fused import fused_formula, score_counts
 
 def create_contingency_table(y_left, y_right):
     y_left = np.asarray(y_left)
@@ -32,5 +33,24 @@ def chi_squared_statistic(y_left, y_right):
 
     return chi2_stat
 
-def chi_squared_criterion(y_left, y_right):
+def chi_squared_criterion(y_left, y_right, sample_weight_left=None, sample_weight_right=None):
+    if sample_weight_left is not None or sample_weight_right is not None:
+        _, left_counts, right_counts = class_counts(y_left, y_right, None, sample_weight_left, sample_weight_right)
+        return chi_squared_criterion_from_counts(left_counts, right_counts)
     return chi_squared_statistic(y_left, y_right)
+
+
+def chi_squared_from_statistics(s):
+    """فرمول Chi-Squared روی مقادیر میانی مشترک (CountStatistics)."""
+    expected_left, expected_right = s.expected
+    chi_left = np.where(expected_left > 0, (s.left - expected_left) ** 2 / expected_left, 0.0)
+    chi_right = np.where(expected_right > 0, (s.right - expected_right) ** 2 / expected_right, 0.0)
+    return np.where(s.n_total > 0, chi_left.sum(axis=-1) + chi_right.sum(axis=-1), 0.0)
+
+
+@fused_formula(chi_squared_from_statistics)
+def chi_squared_criterion_from_counts(left_counts, right_counts):
+    """
+    محاسبه آماره Chi-Squared جدول توافقی 2×k از روی بردارهای شمارش کلاس دو شاخه
+    """
+    return score_counts(chi_squared_from_statistics, left_counts, right_counts)
@@ -1,4 +1,6 @@
 import numpy as np
+from criteria.base import class_counts
+from criteria.fused import fused_formula, score_counts
 
 def calculate_g_value(q):
     if q <= 0 or q >= 1:
@@ -18,7 +20,10 @@ def calculate_g_for_branch(y):
         total_g += class_g
     return total_g / len(unique_classes) if len(unique_classes) > 0 else 0.0
 
-def dkm_criterion(y_left, y_right):
+def dkm_criterion(y_left, y_right, sample_weight_left=None, sample_weight_right=None):
+    if sample_weight_left is not None or sample_weight_right is not None:
+        _, left_counts, right_counts = class_counts(y_left, y_right, None, sample_weight_left, sample_weight_right)
+        return dkm_criterion_from_counts(left_counts, right_counts)
     y_left = np.asarray(y_left)
     y_right = np.asarray(y_right)
     if len(y_left) == 0 or len(y_right) == 0:
@@ -47,3 +52,20 @@ def dkm_binary_criterion(y_left, y_right):
     weight_left = n_left / n_total
     weight_right = n_right / n_total
     return weight_left * g_left + weight_right * g_right
+
+
+def dkm_from_statistics(s):
+    """فرمول DKM روی مقادیر میانی مشترک (CountStatistics)."""
+    g_left = np.sqrt(s.p_left * (1 - s.p_left)).sum(axis=-1) / (s.left > 0).sum(axis=-1)
+    g_right = np.sqrt(s.p_right * (1 - s.p_right)).sum(axis=-1) / (s.right > 0).sum(axis=-1)
+    return np.where(s.both, s.frac_left * g_left + s.frac_right * g_right, 0.0)
+
+
+@fused_formula(dkm_from_statistics)
+def dkm_criterion_from_counts(left_counts, right_counts):
+    """
+    محاسبه امتیاز DKM از روی بردارهای شمارش کلاس دو شاخه
+
+    میانگین g در هر شاخه فقط روی کلاس‌های حاضر در همان شاخه گرفته می‌شود.
+    """
+    return score_counts(dkm_from_statistics, left_counts, right_counts)
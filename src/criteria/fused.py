@@ -0,0 +1,127 @@
+"""
+امتیازدهی ترکیبی (fused) معیارهای شمارش‌محور روی دسته‌ای از تقسیم‌های کاندید
+
+فرمول هر معیار داخلی فقط یک بار و روی CountStatistics نوشته شده است (در ماژول همان معیار
+در src/criteria)؛ تناسب‌ها، مجموع شاخه‌ها، فراوانی‌های مورد انتظار و لگاریتم‌ها در
+CountStatistics در اولین استفاده ساخته و نگه داشته می‌شوند. هسته *_from_counts هر معیار
+همان فرمول را روی CountStatistics شمارش‌های خودش اجرا می‌کند و fused_scores همه فرمول‌ها
+را روی یک CountStatistics مشترک؛ بنابراین هر مقدار میانی (مثل left / n_left یا فراوانی
+مورد انتظار مشترک Chi-Squared و G) فقط یک بار ساخته می‌شود و امتیازها با فراخوانی
+جداگانه هسته‌ها یکسان است.
+
+هسته با دکوراتور fused_formula به فرمولش وصل می‌شود (کلید FUSED_SCORERS خود تابع هسته
+است)؛ هسته‌های سفارشی (register_count_kernel) بدون فرمول همچنان جداگانه فراخوانی می‌شوند.
+این ماژول هیچ ماژول معیاری را import نمی‌کند.
+"""
+
+from functools import cached_property
+import numpy as np
+from criteria.base import finalize_score
+
+
+class CountStatistics:
+    """
+    مقادیر میانی مشترک معیارها برای ماتریس‌های شمارش (تعداد کاندید × تعداد کلاس)
+
+    هر ویژگی در اولین استفاده محاسبه و نگه داشته می‌شود؛ محاسبات باید داخل
+    np.errstate(divide="ignore", invalid="ignore") انجام شوند.
+    """
+    def __init__(self, left_counts, right_counts):
+        self.left = np.asarray(left_counts, dtype=float)
+        self.right = np.asarray(right_counts, dtype=float)
+        self.n_left = self.left.sum(axis=-1)
+        self.n_right = self.right.sum(axis=-1)
+        self.n_total = self.n_left + self.n_right
+
+    @cached_property
+    def both(self):
+        """هر دو شاخه غیرخالی هستند."""
+        return (self.n_left > 0) & (self.n_right > 0)
+
+    @cached_property
+    def parent(self):
+        return self.left + self.right
+
+    @cached_property
+    def frac_left(self):
+        return self.n_left / self.n_total
+
+    @cached_property
+    def frac_right(self):
+        return self.n_right / self.n_total
+
+    @cached_property
+    def p_left(self):
+        """توزیع کلاس‌ها در شاخه چپ."""
+        return self.left / self.n_left[..., None]
+
+    @cached_property
+    def p_right(self):
+        return self.right / self.n_right[..., None]
+
+    @cached_property
+    def p_parent(self):
+        return self.parent / self.parent.sum(axis=-1)[..., None]
+
+    @cached_property
+    def expected(self):
+        """فراوانی‌های مورد انتظار جدول توافقی 2×k برای (شاخه چپ، شاخه راست)."""
+        return (self.n_left[..., None] * self.parent / self.n_total[..., None],
+                self.n_right[..., None] * self.parent / self.n_total[..., None])
+
+
+def entropy_from_probabilities(counts, probability, offset=0.0):
+    """آنتروپی (پایه ۲) با احتمال‌های داده شده؛ کلاس‌های با شمارش صفر حذف می‌شوند."""
+    return -np.where(counts > 0, probability * np.log2(probability + offset), 0.0).sum(axis=-1)
+
+
+# هسته شمارش‌محور -> فرمول آن روی CountStatistics (با fused_formula پر می‌شود)
+FUSED_SCORERS = {}
+
+
+def fused_formula(formula):
+    """
+    دکوراتور هسته *_from_counts: فرمول امتیاز آن روی CountStatistics در FUSED_SCORERS
+    ثبت می‌شود تا fused_scores همان فرمول را اجرا کند. خود هسته تغییر نمی‌کند.
+    """
+    def register(kernel):
+        FUSED_SCORERS[kernel] = formula
+        return kernel
+    return register
+
+
+def score_counts(formula, left_counts, right_counts, *args):
+    """اجرای فرمول یک معیار روی شمارش‌های دو شاخه (بدنه هسته‌های *_from_counts)."""
+    stats = CountStatistics(left_counts, right_counts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return finalize_score(formula(stats, *args))
+
+
+def is_fusable(kernel):
+    """آیا هسته شمارش‌محور فرمول ثبت شده برای مسیر ترکیبی دارد."""
+    return kernel in FUSED_SCORERS
+
+
+def fused_scores(left_counts, right_counts, kernels, out=None):
+    """
+    امتیاز خام چند هسته داخلی روی همه کاندیدها با مقادیر میانی مشترک
+
+    Parameters:
+    left_counts, right_counts : np.ndarray
+        ماتریس‌های (تعداد کاندید × تعداد کلاس)
+    kernels : list
+        هسته‌های شمارش‌محوری که is_fusable برای آن‌ها True است
+    out : np.ndarray, optional
+        ماتریس (تعداد کاندید × len(kernels)) برای نوشتن نتیجه
+
+    Returns:
+    np.ndarray
+        ماتریس (تعداد کاندید × len(kernels))
+    """
+    stats = CountStatistics(left_counts, right_counts)
+    if out is None:
+        out = np.empty((len(stats.n_left), len(kernels)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for j, kernel in enumerate(kernels):
+            out[:, j] = FUSED_SCORERS[kernel](stats)
+    return out
@@ -1,4 +1,6 @@
 import numpy as np
+from criteria.base import class_counts
+from criteria.fused import fused_formula, score_counts
 
 def gini_impurity(y):
     if len(y) == 0:
@@ -7,7 +9,10 @@ def gini_impurity(y):
     probabilities = counts / len(y)
     return 1.0 - np.sum(probabilities ** 2)
 
-def gini_criterion(y_left, y_right):
+def gini_criterion(y_left, y_right, sample_weight_left=None, sample_weight_right=None):
+    if sample_weight_left is not None or sample_weight_right is not None:
+        _, left_counts, right_counts = class_counts(y_left, y_right, None, sample_weight_left, sample_weight_right)
+        return gini_criterion_from_counts(left_counts, right_counts)
     n_left = len(y_left)
     n_right = len(y_right)
     n_total = n_left + n_right
@@ -17,3 +22,22 @@ def gini_criterion(y_left, y_right):
     gini_right = gini_impurity(y_right)
     weighted_gini = (n_left / n_total) * gini_left + (n_right / n_total) * gini_right
     return weighted_gini
+
+def gini_impurity_from_counts(counts):
+    counts = np.asarray(counts, dtype=float)
+    n_samples = counts.sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return gini_impurity_from_probabilities(counts / n_samples[..., None], n_samples)
+
+def gini_impurity_from_probabilities(probabilities, n_samples):
+    return np.where(n_samples > 0, 1.0 - np.sum(probabilities ** 2, axis=-1), 0.0)
+
+def gini_from_statistics(s):
+    """فرمول Gini وزنی روی مقادیر میانی مشترک (CountStatistics)."""
+    weighted_gini = (s.frac_left * gini_impurity_from_probabilities(s.p_left, s.n_left)
+                     + s.frac_right * gini_impurity_from_probabilities(s.p_right, s.n_right))
+    return np.where(s.n_total > 0, weighted_gini, 0.0)
+
+@fused_formula(gini_from_statistics)
+def gini_criterion_from_counts(left_counts, right_counts):
+    return score_counts(gini_from_statistics, left_counts, right_counts)
@@ -1,5 +1,6 @@
 import numpy as np
-from scipy import stats
+from criteria.base import class_counts
+from criteria.fused import fused_formula, score_counts
 
 def create_contingency_table(y_left, y_right):
     y_left = np.asarray(y_left)
@@ -45,5 +46,24 @@ def g_statistic(y_left, y_right, alpha=0.05):
     return g_value
 
 # تابع معیار نهایی برای custom-tree-classifier
-def g_statistic_criterion(y_left, y_right):
+def g_statistic_criterion(y_left, y_right, sample_weight_left=None, sample_weight_right=None):
+    if sample_weight_left is not None or sample_weight_right is not None:
+        _, left_counts, right_counts = class_counts(y_left, y_right, None, sample_weight_left, sample_weight_right)
+        return g_statistic_criterion_from_counts(left_counts, right_counts)
     return g_statistic(y_left, y_right)
+
+
+def g_statistic_from_statistics(s):
+    """فرمول آماره G روی مقادیر میانی مشترک (CountStatistics)."""
+    expected_left, expected_right = s.expected
+    g_left = np.where((s.left > 0) & (expected_left > 0), s.left * np.log(s.left / expected_left), 0.0)
+    g_right = np.where((s.right > 0) & (expected_right > 0), s.right * np.log(s.right / expected_right), 0.0)
+    return np.where(s.both, 2 * (g_left.sum(axis=-1) + g_right.sum(axis=-1)), 0.0)
+
+
+@fused_formula(g_statistic_from_statistics)
+def g_statistic_criterion_from_counts(left_counts, right_counts):
+    """
+    محاسبه آماره G جدول توافقی 2×k از روی بردارهای شمارش کلاس دو شاخه
+    """
+    return score_counts(g_statistic_from_statistics, left_counts, right_counts)
@@ -1,5 +1,6 @@
 import numpy as np
-from scipy import stats
+from criteria.base import class_counts
+from criteria.fused import fused_formula, score_counts
 
 def empirical_cdf(data):
     if len(data) == 0:
@@ -14,6 +15,12 @@ def empirical_cdf(data):
     return values, cdf_values
 
 def ks_distance(y_left, y_right):
+    """
+    بیشترین فاصله CDF تجربی (پله‌ای) برچسب‌های دو شاخه روی برچسب‌های مرتب
+
+    برچسب‌ها فقط باید قابل مرتب‌سازی باشند (عدد یا متن)؛ CDF در هر برچسب نسبت نمونه‌های
+    <= آن برچسب است، همان تجمع شمارش‌ها در هسته شمارش‌محور.
+    """
     y_left = np.asarray(y_left)
     y_right = np.asarray(y_right)
     
@@ -21,14 +28,31 @@ def ks_distance(y_left, y_right):
         return 0.0
     
     all_values = np.union1d(y_left, y_right)
-    x_left, cdf_left = empirical_cdf(y_left)
-    x_right, cdf_right = empirical_cdf(y_right)
-    
-    cdf_left_interp = np.interp(all_values, x_left, cdf_left, left=0, right=1)
-    cdf_right_interp = np.interp(all_values, x_right, cdf_right, left=0, right=1)
+    cdf_left = np.searchsorted(np.sort(y_left), all_values, side="right") / len(y_left)
+    cdf_right = np.searchsorted(np.sort(y_right), all_values, side="right") / len(y_right)
     
-    max_distance = np.max(np.abs(cdf_left_interp - cdf_right_interp))
-    return max_distance
+    max_distance = np.max(np.abs(cdf_left - cdf_right))
+    return float(max_distance)
 
-def kolmogorov_smirnov_criterion(y_left, y_right):
+def kolmogorov_smirnov_criterion(y_left, y_right, sample_weight_left=None, sample_weight_right=None):
+    if sample_weight_left is not None or sample_weight_right is not None:
+        _, left_counts, right_counts = class_counts(y_left, y_right, None, sample_weight_left, sample_weight_right)
+        return kolmogorov_smirnov_criterion_from_counts(left_counts, right_counts)
     return ks_distance(y_left, y_right)
+
+
+def kolmogorov_smirnov_from_statistics(s):
+    """فرمول فاصله Kolmogorov-Smirnov روی مقادیر میانی مشترک (CountStatistics)."""
+    cdf_left = np.cumsum(s.left, axis=-1) / s.n_left[..., None]
+    cdf_right = np.cumsum(s.right, axis=-1) / s.n_right[..., None]
+    return np.where(s.both, np.abs(cdf_left - cdf_right).max(axis=-1, initial=0.0), 0.0)
+
+
+@fused_formula(kolmogorov_smirnov_from_statistics)
+def kolmogorov_smirnov_criterion_from_counts(left_counts, right_counts):
+    """
+    محاسبه فاصله Kolmogorov-Smirnov بین توزیع برچسب‌های دو شاخه از روی بردارهای شمارش
+
+    محور کلاس‌ها باید به ترتیب صعودی برچسب‌ها باشد تا تجمع شمارش‌ها همان CDF تجربی شود.
+    """
+    return score_counts(kolmogorov_smirnov_from_statistics, left_counts, right_counts)
@@ -1,4 +1,6 @@
 import numpy as np
+from criteria.base import class_counts
+from criteria.fused import fused_formula, score_counts
 
 def calculate_g(a, b, c, d, A, B, C, D, N):
     """
@@ -20,27 +22,61 @@ def create_contingency(a, b, c, d):
     N = A + B
     return A, B, C, D, N
 
-def marsh_criterion(y_left, y_right):
+def marsh_criterion(y_left, y_right, sample_weight_left=None, sample_weight_right=None):
     """
     محاسبه امتیاز Marshall Criterion برای تقسیم باینری
 
+    معیار دودویی است: a, b (و c, d) تعداد دو کلاس اول برچسب‌ها به ترتیب مرتب (مثلاً 0 و 1،
+    1 و 2 یا دو برچسب متنی) در هر شاخه هستند، همان ستون‌های 0 و 1 هسته شمارش‌محور. امتیاز
+    نسبت به جابجایی دو کلاس متقارن است، پس کدام کلاس مثبت باشد (positive_label) اهمیتی ندارد.
+
     Parameters:
-    y_left : array-like  برچسب‌های شاخه چپ (0 یا 1)
-    y_right: array-like  برچسب‌های شاخه راست (0 یا 1)
+    y_left : array-like  برچسب‌های شاخه چپ (دو کلاس)
+    y_right: array-like  برچسب‌های شاخه راست (دو کلاس)
+    sample_weight_left, sample_weight_right : array-like, optional
+        وزن نمونه‌های هر شاخه؛ اگر داده شود امتیاز از روی شمارش وزنی کلاس‌ها محاسبه می‌شود
 
     Returns:
     float امتیاز G (کاهش تنوع)
     """
+    if sample_weight_left is not None or sample_weight_right is not None:
+        _, left_counts, right_counts = class_counts(y_left, y_right, None, sample_weight_left, sample_weight_right)
+        return marsh_criterion_from_counts(left_counts, right_counts)
     y_left = np.asarray(y_left)
     y_right = np.asarray(y_right)
+    classes = np.unique(np.concatenate([y_left, y_right]))
+    if len(classes) < 2:
+        return 0.0
 
-    a = np.sum((y_left == 0))
-    b = np.sum((y_left == 1))
-    c = np.sum((y_right == 0))
-    d = np.sum((y_right == 1))
+    a = np.sum((y_left == classes[0]))
+    b = np.sum((y_left == classes[1]))
+    c = np.sum((y_right == classes[0]))
+    d = np.sum((y_right == classes[1]))
 
     A, B, C, D, N = create_contingency(a, b, c, d)
     if N == 0 or A == 0 or B == 0:
         return 0.0
 
     return calculate_g(a, b, c, d, A, B, C, D, N)
+
+
+def marsh_from_statistics(s):
+    """فرمول Marshall Criterion روی مقادیر میانی مشترک (CountStatistics)."""
+    if s.left.shape[-1] < 2:
+        return np.zeros_like(s.n_left)
+    a, b = s.left[..., 0], s.left[..., 1]
+    c, d = s.right[..., 0], s.right[..., 1]
+    A, B, C, D, N = create_contingency(a, b, c, d)
+    score = (C * D) / N - (a * b) / A - (c * d) / B
+    return np.where((N > 0) & (A > 0) & (B > 0), score, 0.0)
+
+
+@fused_formula(marsh_from_statistics)
+def marsh_criterion_from_counts(left_counts, right_counts):
+    """
+    محاسبه امتیاز Marshall Criterion از روی بردارهای شمارش کلاس دو شاخه
+
+    ستون‌های 0 و 1 شمارش دو کلاس اول به ترتیب مرتب برچسب‌ها هستند (هر برچسبی، نه فقط 0/1) و
+    ستون‌های دیگر نادیده گرفته می‌شوند؛ امتیاز نسبت به جابجایی دو کلاس متقارن است.
+    """
+    return score_counts(marsh_from_statistics, left_counts, right_counts)
@@ -1,6 +1,8 @@
 import numpy as np
+from criteria.base import class_counts
+from criteria.fused import fused_formula, score_counts
 
-def multi_class_hellinger(y_left, y_right):
+def multi_class_hellinger(y_left, y_right, sample_weight_left=None, sample_weight_right=None):
     """
     محاسبه امتیاز معیار Multi-Class Hellinger
     
@@ -9,11 +11,16 @@ def multi_class_hellinger(y_left, y_right):
         برچسب‌های کلاس سمت چپ
     y_right : array-like
         برچسب‌های کلاس سمت راست
-    
+    sample_weight_left, sample_weight_right : array-like, optional
+        وزن نمونه‌های هر شاخه؛ اگر داده شود امتیاز از روی شمارش وزنی کلاس‌ها محاسبه می‌شود
+
     Returns:
     float
         امتیاز MCH (بین 0 و 1)
     """
+    if sample_weight_left is not None or sample_weight_right is not None:
+        _, left_counts, right_counts = class_counts(y_left, y_right, None, sample_weight_left, sample_weight_right)
+        return multi_class_hellinger_from_counts(left_counts, right_counts)
     y_left = np.asarray(y_left)
     y_right = np.asarray(y_right)
     n_left = len(y_left)
@@ -32,3 +39,27 @@ def multi_class_hellinger(y_left, y_right):
         hellinger_sum += (np.sqrt(p_Lj) - np.sqrt(p_Rj)) ** 2
     
     return 0.5 * hellinger_sum
+
+
+def multi_class_hellinger_from_statistics(s):
+    """فرمول Multi-Class Hellinger روی مقادیر میانی مشترک (CountStatistics)."""
+    hellinger_sum = ((np.sqrt(s.p_left) - np.sqrt(s.p_right)) ** 2).sum(axis=-1)
+    return np.where(s.both, 0.5 * hellinger_sum, 0.0)
+
+
+@fused_formula(multi_class_hellinger_from_statistics)
+def multi_class_hellinger_from_counts(left_counts, right_counts):
+    """
+    محاسبه امتیاز Multi-Class Hellinger از روی بردارهای شمارش کلاس دو شاخه
+
+    Parameters:
+    left_counts : array-like
+        تعداد نمونه‌های هر کلاس در شاخه چپ (محور آخر = کلاس‌ها)
+    right_counts : array-like
+        تعداد نمونه‌های هر کلاس در شاخه راست
+
+    Returns:
+    float یا np.ndarray
+        امتیاز MCH (بین 0 و 1)
+    """
+    return score_counts(multi_class_hellinger_from_statistics, left_counts, right_counts)
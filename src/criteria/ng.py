@@ -1,4 +1,6 @@
 import numpy as np
+from criteria.base import class_counts
+from criteria.fused import entropy_from_probabilities, fused_formula, score_counts
 
 def calculate_entropy(y):
     if len(y) == 0:
@@ -45,5 +47,34 @@ def normalized_gain(y_left, y_right, n_branches=2):
     
     return normalized_gain_value
 
-def normalized_gain_criterion(y_left, y_right):
+def normalized_gain_criterion(y_left, y_right, sample_weight_left=None, sample_weight_right=None):
+    if sample_weight_left is not None or sample_weight_right is not None:
+        _, left_counts, right_counts = class_counts(y_left, y_right, None, sample_weight_left, sample_weight_right)
+        return normalized_gain_criterion_from_counts(left_counts, right_counts)
     return normalized_gain(y_left, y_right, n_branches=2)
+
+
+def entropy_from_counts(counts):
+    """آنتروپی (پایه ۲) از روی بردار شمارش کلاس‌ها؛ محور آخر محور کلاس‌هاست."""
+    counts = np.asarray(counts, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return entropy_from_probabilities(counts, counts / counts.sum(axis=-1)[..., None])
+
+
+def normalized_gain_from_statistics(s, n_branches=2):
+    """فرمول Normalized Gain روی مقادیر میانی مشترک (CountStatistics)."""
+    weighted_entropy = (s.frac_left * entropy_from_probabilities(s.left, s.p_left)
+                        + s.frac_right * entropy_from_probabilities(s.right, s.p_right))
+    information_gain = entropy_from_probabilities(s.parent, s.p_parent) - weighted_entropy
+    valid = s.both & (information_gain > 0)
+    return np.where(valid, information_gain / np.log2(n_branches), 0.0)
+
+
+@fused_formula(normalized_gain_from_statistics)
+def normalized_gain_criterion_from_counts(left_counts, right_counts, n_branches=2):
+    """
+    محاسبه Normalized Gain از روی بردارهای شمارش کلاس دو شاخه
+    """
+    if n_branches <= 1:
+        return score_counts(lambda s: np.zeros_like(s.n_total), left_counts, right_counts)
+    return score_counts(normalized_gain_from_statistics, left_counts, right_counts, n_branches)
@@ -1,4 +1,6 @@
 import numpy as np
+from criteria.base import class_counts
+from criteria.fused import entropy_from_probabilities, fused_formula, score_counts
 
 def entropy(y):
     _, counts = np.unique(y, return_counts=True)
@@ -35,5 +37,34 @@ def gain_ratio(y_left, y_right):
     return ig / iv
 
 # این تابع رو به عنوان معیار تقسیم به مدل custom-tree-classifier بده
-def gain_ratio_criterion(y_left, y_right):
+def gain_ratio_criterion(y_left, y_right, sample_weight_left=None, sample_weight_right=None):
+    if sample_weight_left is not None or sample_weight_right is not None:
+        _, left_counts, right_counts = class_counts(y_left, y_right, None, sample_weight_left, sample_weight_right)
+        return gain_ratio_criterion_from_counts(left_counts, right_counts)
     return gain_ratio(y_left, y_right)
+
+
+def entropy_from_counts(counts):
+    """آنتروپی با همان هموارسازی تابع entropy، از روی بردار شمارش کلاس‌ها."""
+    counts = np.asarray(counts, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return entropy_from_probabilities(counts, counts / counts.sum(axis=-1)[..., None], 1e-10)
+
+
+def gain_ratio_from_statistics(s):
+    """فرمول Gain Ratio روی مقادیر میانی مشترک (CountStatistics)."""
+    children_entropy = (np.where(s.n_left > 0, s.frac_left * entropy_from_probabilities(s.left, s.p_left, 1e-10), 0.0)
+                        + np.where(s.n_right > 0,
+                                   s.frac_right * entropy_from_probabilities(s.right, s.p_right, 1e-10), 0.0))
+    ig = entropy_from_probabilities(s.parent, s.p_parent, 1e-10) - children_entropy
+    iv = -(np.where(s.frac_left > 0, s.frac_left * np.log2(s.frac_left), 0.0)
+           + np.where(s.frac_right > 0, s.frac_right * np.log2(s.frac_right), 0.0))
+    return np.where((s.n_total > 0) & (iv != 0), ig / iv, 0.0)
+
+
+@fused_formula(gain_ratio_from_statistics)
+def gain_ratio_criterion_from_counts(left_counts, right_counts):
+    """
+    محاسبه Gain Ratio از روی بردارهای شمارش کلاس دو شاخه
+    """
+    return score_counts(gain_ratio_from_statistics, left_counts, right_counts)
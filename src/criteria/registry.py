@@ -0,0 +1,183 @@
+"""
+رجیستری معیارهای تقسیم و هسته‌های شمارش‌محور آن‌ها
+
+هر معیار در src/criteria علاوه بر نسخه اصلی (y_left, y_right) یک نسخه
+`*_from_counts(left_counts, right_counts)` دارد که امتیاز را مستقیماً از روی
+هیستوگرام کلاس‌ها محاسبه می‌کند. این رجیستری تابع اصلی هر معیار را به هسته
+شمارش‌محور آن نگاشت می‌کند تا WeightedVotingMetric بتواند هیستوگرام کلاس‌ها را
+فقط یک بار بسازد و همه معیارها را از روی آن تغذیه کند.
+
+معیارها با نام و مسیر ماژول ثبت شده‌اند و ماژول هر معیار فقط در اولین استفاده
+import می‌شود؛ بنابراین import کردن مدل (مثلاً در یک پردازه کوتاه‌عمر پیش‌بینی)
+هیچ ماژول معیاری را بارگذاری نمی‌کند.
+"""
+
+import importlib
+import weakref
+
+# نام معیار -> (ماژول، تابع اصلی، هسته شمارش‌محور)
+CRITERIA = {
+    "twoing": ("criteria.twoing", "twoing_criterion", "twoing_criterion_from_counts"),
+    "normalized_gain": ("criteria.ng", "normalized_gain_criterion", "normalized_gain_criterion_from_counts"),
+    "multi_class_hellinger": ("criteria.mch", "multi_class_hellinger", "multi_class_hellinger_from_counts"),
+    "marshall": ("criteria.marsh", "marsh_criterion", "marsh_criterion_from_counts"),
+    "g_statistic": ("criteria.gs", "g_statistic_criterion", "g_statistic_criterion_from_counts"),
+    "dkm": ("criteria.dkm", "dkm_criterion", "dkm_criterion_from_counts"),
+    "chi_squared": ("criteria.cs", "chi_squared_criterion", "chi_squared_criterion_from_counts"),
+    "bhattacharyya": ("criteria.bhy", "bhattacharyya_criterion", "bhattacharyya_criterion_from_counts"),
+    "kolmogorov_smirnov": ("criteria.ks", "kolmogorov_smirnov_criterion",
+                           "kolmogorov_smirnov_criterion_from_counts"),
+    "gain_ratio": ("criteria.qg", "gain_ratio_criterion", "gain_ratio_criterion_from_counts"),
+    "gini": ("criteria.gini", "gini_criterion", "gini_criterion_from_counts"),
+}
+
+# معیارهای پیش‌فرض WeightedDecisionTreeModel (gini و gain_ratio در این فهرست نیستند)
+DEFAULT_CRITERIA_NAMES = (
+    "twoing", "normalized_gain", "multi_class_hellinger", "marshall", "g_statistic", "dkm",
+    "chi_squared", "bhattacharyya", "kolmogorov_smirnov",
+)
+
+# (ماژول، تابع اصلی) -> نام هسته شمارش‌محور
+_BUILTIN_KERNELS = {(module, func_name): kernel_name for module, func_name, kernel_name in CRITERIA.values()}
+# تابع معیار -> هسته (یا None)؛ با حذف تابع، مدخل آن هم حذف می‌شود
+_KERNEL_CACHE = weakref.WeakKeyDictionary()
+
+
+class _KernelRegistry(dict):
+    """dict تابع معیار -> هسته که با هر تغییر، کش هسته‌ها را خالی می‌کند."""
+    def _changed(self):
+        _KERNEL_CACHE.clear()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._changed()
+
+    def setdefault(self, key, default=None):
+        value = super().setdefault(key, default)
+        self._changed()
+        return value
+
+    def pop(self, *args):
+        value = super().pop(*args)
+        self._changed()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._changed()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+
+# هسته‌های ثبت شده با register_count_kernel؛ پس از اولین دسترسی به COUNT_KERNELS هسته‌های
+# داخلی هم در همین dict هستند و همین dict به عنوان COUNT_KERNELS برگردانده می‌شود
+_REGISTERED = _KernelRegistry()
+_BUILTINS_LOADED = False
+
+
+class LazyCriterion:
+    """
+    جانشین تابع اصلی یک معیار داخلی که ماژول آن را در اولین فراخوانی import می‌کند
+
+    __module__ و __qualname__ همان مقادیر تابع اصلی هستند، پس کلیدهای کش FN و
+    نام‌ها در گزارش‌ها با استفاده مستقیم از تابع تفاوتی ندارند.
+    """
+    def __init__(self, name):
+        if name not in CRITERIA:
+            raise ValueError(f"معیار نامعتبر است: {name!r}. گزینه‌ها: {list(CRITERIA)}")
+        self.name = name
+        self.__module__, self.__name__, _ = CRITERIA[name]
+        self.__qualname__ = self.__name__
+        self._func = None
+
+    def resolve(self):
+        """تابع اصلی معیار (ماژول آن در صورت نیاز import می‌شود)."""
+        if self._func is None:
+            self._func = getattr(importlib.import_module(self.__module__), self.__name__)
+        return self._func
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __reduce__(self):
+        # فقط نام pickle می‌شود؛ پردازه مقصد ماژول را خودش (در صورت نیاز) بارگذاری می‌کند
+        return LazyCriterion, (self.name,)
+
+    def __repr__(self):
+        return f"LazyCriterion({self.name!r})"
+
+
+def get_criterion(name):
+    """تابع (تنبل) یک معیار داخلی از روی نام آن."""
+    return LazyCriterion(name)
+
+
+def default_criteria():
+    """لیست (نام، تابع) معیارهای پیش‌فرض بدون import کردن ماژول آن‌ها."""
+    return [(name, LazyCriterion(name)) for name in DEFAULT_CRITERIA_NAMES]
+
+
+def register_count_kernel(func, kernel):
+    """ثبت هسته شمارش‌محور برای یک تابع معیار سفارشی."""
+    _REGISTERED[func.resolve() if isinstance(func, LazyCriterion) else func] = kernel
+    _KERNEL_CACHE.clear()
+
+
+def _find_count_kernel(func):
+    if isinstance(func, LazyCriterion):
+        func = func.resolve()
+    if func in _REGISTERED or _BUILTINS_LOADED:
+        # پس از ساخت COUNT_KERNELS فقط خود آن (با تغییرات کاربر) معتبر است
+        return _REGISTERED.get(func)
+    key = (getattr(func, "__module__", None), getattr(func, "__qualname__", None))
+    if key not in _BUILTIN_KERNELS:
+        return None
+    module = importlib.import_module(key[0])
+    # تابعی هم‌نام در همان ماژول که جایگزین تابع اصلی شده باشد، هسته داخلی ندارد
+    if getattr(module, key[1], None) is not func:
+        return None
+    return getattr(module, _BUILTIN_KERNELS[key])
+
+
+def get_count_kernel(func):
+    """هسته شمارش‌محور یک تابع معیار؛ اگر ثبت نشده باشد None برمی‌گرداند."""
+    try:
+        return _KERNEL_CACHE[func]
+    except KeyError:
+        kernel = _KERNEL_CACHE[func] = _find_count_kernel(func)
+        return kernel
+    except TypeError:
+        # توابعی که weakref نمی‌پذیرند کش نمی‌شوند
+        return _find_count_kernel(func)
+
+
+def count_kernels():
+    """نگاشت تابع اصلی -> هسته شمارش‌محور همه معیارهای داخلی (همه ماژول‌ها import می‌شوند)."""
+    return {LazyCriterion(name).resolve(): get_count_kernel(LazyCriterion(name)) for name in CRITERIA}
+
+
+def __getattr__(name):
+    # COUNT_KERNELS (نگاشت تابع اصلی -> هسته) برای سازگاری با نسخه‌های قبل فقط در اولین دسترسی
+    # ساخته می‌شود؛ همان dict هسته‌های ثبت شده است، پس COUNT_KERNELS[func] = kernel مثل
+    # register_count_kernel عمل می‌کند
+    global _BUILTINS_LOADED
+    if name == "COUNT_KERNELS":
+        if not _BUILTINS_LOADED:
+            for func, kernel in count_kernels().items():
+                dict.setdefault(_REGISTERED, func, kernel)
+            _BUILTINS_LOADED = True
+            _KERNEL_CACHE.clear()
+        globals()["COUNT_KERNELS"] = _REGISTERED
+        return _REGISTERED
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,6 +1,8 @@
 import numpy as np
+from criteria.base import class_counts
+from criteria.fused import fused_formula, score_counts
 
-def twoing_criterion(y_left, y_right):
+def twoing_criterion(y_left, y_right, sample_weight_left=None, sample_weight_right=None):
     """
     محاسبه امتیاز معیار Twoing برای تقسیم داده‌ها
     
@@ -9,11 +11,16 @@ def twoing_criterion(y_left, y_right):
         برچسب‌های کلاس سمت چپ
     y_right : array-like
         برچسب‌های کلاس سمت راست
-    
+    sample_weight_left, sample_weight_right : array-like, optional
+        وزن نمونه‌های هر شاخه؛ اگر داده شود امتیاز از روی شمارش وزنی کلاس‌ها محاسبه می‌شود
+
     Returns:
     float
         امتیاز Twoing (بین 0 و 0.5)
     """
+    if sample_weight_left is not None or sample_weight_right is not None:
+        _, left_counts, right_counts = class_counts(y_left, y_right, None, sample_weight_left, sample_weight_right)
+        return twoing_criterion_from_counts(left_counts, right_counts)
     y_left = np.asarray(y_left)
     y_right = np.asarray(y_right)
     n_left = len(y_left)
@@ -32,3 +39,28 @@ def twoing_criterion(y_left, y_right):
         p_Rj = np.sum(y_right == c) / n_right
         diff_sum += abs(p_Lj - p_Rj)
     return (p_L * p_R / 4.0) * (diff_sum ** 2)
+
+
+def twoing_from_statistics(s):
+    """فرمول Twoing روی مقادیر میانی مشترک (CountStatistics)."""
+    diff_sum = np.abs(s.p_left - s.p_right).sum(axis=-1)
+    score = (s.frac_left * s.frac_right / 4.0) * (diff_sum ** 2)
+    return np.where(s.both, score, 0.0)
+
+
+@fused_formula(twoing_from_statistics)
+def twoing_criterion_from_counts(left_counts, right_counts):
+    """
+    محاسبه امتیاز Twoing از روی بردارهای شمارش کلاس دو شاخه
+
+    Parameters:
+    left_counts : array-like
+        تعداد نمونه‌های هر کلاس در شاخه چپ (محور آخر = کلاس‌ها)
+    right_counts : array-like
+        تعداد نمونه‌های هر کلاس در شاخه راست
+
+    Returns:
+    float یا np.ndarray
+        امتیاز Twoing برای هر تقسیم
+    """
+    return score_counts(twoing_from_statistics, left_counts, right_counts)
@@ -0,0 +1,124 @@
+"""
+ذخیره و بارگذاری WeightedDecisionTreeModel در قالب فشرده روی دیسک
+
+قالب یک پوشه است:
+
+    model_dir/
+        metadata.json     نسخه قالب، نام معیارها، وزن‌ها، تنظیمات مدل، کلاس‌ها و نام ویژگی‌ها
+        feature.npy       آرایه‌های تخت درخت (خروجی Tree.to_arrays)
+        threshold.npy
+        ...
+
+دسته‌های ستون‌های دسته‌ای (category_encoder) در metadata و مجموعه دسته‌های فرزند چپ گره‌های
+دسته‌ای در category_bitset.npy ذخیره می‌شوند (قالب نسخه ۲؛ مدل‌های نسخه ۱ همچنان بارگذاری می‌شوند).
+
+آرایه‌ها با np.load(mmap_mode="r") بارگذاری می‌شوند؛ بنابراین چند پردازه پیش‌بینی
+یک نسخه از فایل‌ها را از page cache سیستم‌عامل به اشتراک می‌گذارند و بارگذاری تقریباً
+فوری است. داده آموزشی (a) ذخیره نمی‌شود.
+"""
+
+import json
+import os
+import numpy as np
+from model.tree_builder import Tree
+from criteria.registry import CRITERIA, get_criterion
+from model.weighted_decision_tree import WeightedDecisionTreeModel
+from utils.categorical import CategoryEncoder
+
+FORMAT_VERSION = 2
+# نسخه ۱ همان قالب بدون ویژگی‌های دسته‌ای است
+SUPPORTED_VERSIONS = (1, 2)
+METADATA_FILE = "metadata.json"
+# آرایه‌هایی که روی دیسک ذخیره می‌شوند؛ classes در metadata نگهداری می‌شود چون ممکن است متنی باشد
+TREE_ARRAYS = ("feature", "threshold", "children_left", "children_right", "value", "delta", "depth",
+               "node_weights", "category_bitset")
+
+
+def _to_json(value):
+    """تبدیل مقادیر NumPy (مثل np.int64 یا np.float64) به نوع‌های پایه پایتون."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def save_model(model, path):
+    """
+    ذخیره مدل آموزش‌دیده در پوشه path (در صورت وجود، فایل‌های قبلی بازنویسی می‌شوند)
+    """
+    if model.model is None:
+        raise ValueError("مدل هنوز آموزش داده نشده است.")
+    os.makedirs(path, exist_ok=True)
+    arrays = model.model.to_arrays()
+    for name in TREE_ARRAYS:
+        if name in arrays:
+            np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(arrays[name]))
+
+    metadata = {
+        "format_version": FORMAT_VERSION,
+        "criteria": [name for name, _ in model.criteria],
+        "weights": {name: float(weight) for name, weight in model.metric.weights_dict.items()},
+        "classes": [_to_json(label) for label in model.model.classes],
+        "positive_label": _to_json(model.positive_label),
+        "max_depth": model.max_depth,
+        "weighting": model.weighting,
+        "max_bins": model.max_bins,
+        "n_features": int(model.n_features_in_),
+        "feature_names": model.feature_names_in_,
+        "arrays": [name for name in TREE_ARRAYS if name in arrays],
+    }
+    encoder = model.category_encoder
+    if encoder is not None:
+        metadata["categorical_features"] = [int(j) for j in encoder.categorical_features_]
+        metadata["categories"] = [[_to_json(value) for value in categories] for categories in encoder.categories_]
+    # metadata آخر نوشته می‌شود تا پوشه نیمه‌کاره قابل بارگذاری نباشد
+    with open(os.path.join(path, METADATA_FILE), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+
+def load_model(path, mmap_mode="r", criteria=None):
+    """
+    بارگذاری مدل ذخیره شده با save_model
+
+    Parameters:
+    path : str
+        پوشه مدل
+    mmap_mode : str یا None
+        حالت np.load برای آرایه‌های درخت؛ "r" (پیش‌فرض) یعنی نگاشت فقط خواندنی حافظه و
+        None یعنی خواندن کامل در حافظه
+    criteria : list, optional
+        لیست (نام، تابع) معیارهای سفارشی؛ نام‌هایی که نه در این لیست و نه در معیارهای
+        داخلی (criteria.registry.CRITERIA) هستند با تابع None بارگذاری می‌شوند (برای پیش‌بینی لازم نیستند)
+
+    Returns:
+    WeightedDecisionTreeModel
+        مدل آماده پیش‌بینی
+    """
+    with open(os.path.join(path, METADATA_FILE), encoding="utf-8") as f:
+        metadata = json.load(f)
+    if metadata.get("format_version") not in SUPPORTED_VERSIONS:
+        raise ValueError(f"نسخه قالب مدل پشتیبانی نمی‌شود: {metadata.get('format_version')!r}")
+
+    # معیارهای داخلی تنبل هستند؛ بارگذاری مدل برای پیش‌بینی هیچ ماژول معیاری را import نمی‌کند
+    known = {name: get_criterion(name) for name in CRITERIA}
+    known.update(dict(criteria or []))
+    model = WeightedDecisionTreeModel(
+        criteria_funcs_weights=[(name, known.get(name)) for name in metadata["criteria"]],
+        positive_label=metadata["positive_label"],
+        max_depth=metadata["max_depth"],
+        weighting=metadata["weighting"],
+        max_bins=metadata["max_bins"],
+    )
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+              for name in metadata["arrays"]}
+    model.model = Tree.from_arrays({**arrays, "classes": np.array(metadata["classes"])})
+    model.metric.weights_dict = dict(metadata["weights"])
+    model.metric.classes = model.model.classes
+    model.feature_names_in_ = metadata["feature_names"]
+    model.n_features_in_ = metadata["n_features"]
+    if "categorical_features" in metadata:
+        encoder = CategoryEncoder(metadata["categorical_features"])
+        encoder.categorical_features_ = np.array(metadata["categorical_features"], dtype=np.intp)
+        # دسته‌های متنی با dtype=object بارگذاری می‌شوند تا با مقادیر DataFrame مقایسه شوند
+        encoder.categories_ = [np.array(values, dtype=object if any(isinstance(v, str) for v in values) else None)
+                               for values in metadata["categories"]]
+        model.categorical_features = metadata["categorical_features"]
+        model.category_encoder = encoder
+    return model
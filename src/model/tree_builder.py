@@ -0,0 +1,874 @@
+"""
+موتور داخلی ساخت درخت تصمیم برای WeightedDecisionTreeModel
+
+- اندیس‌های مرتب هر ویژگی فقط یک بار در ریشه محاسبه می‌شوند و در هر تقسیم به صورت
+  پایدار بین دو فرزند پخش می‌شوند (بدون مرتب‌سازی دوباره)
+- گره‌ها در آرایه‌های NumPy نگهداری می‌شوند (feature, threshold, left, right, value)
+- همه آستانه‌های یک ویژگی با یک فراخوانی `metric.evaluate_counts` امتیازدهی می‌شوند
+- در حالت هیستوگرامی (max_bins) ویژگی‌ها یک بار به بازه‌های uint8 نگاشت می‌شوند و
+  فقط مرز بازه‌ها امتیازدهی می‌شود؛ هیستوگرام فرزند بزرگ‌تر از تفریق هیستوگرام فرزند
+  کوچک‌تر از گره پدر به دست می‌آید
+- با growth="level" درخت سطح‌به‌سطح رشد می‌کند: همه گره‌های یک عمق با یک آرایه
+  تخصیص سطر به گره با هم هیستوگرام و امتیازدهی می‌شوند
+- با split_n_jobs ویژگی‌های هر گره بزرگ به چند بلوک پیوسته تقسیم و در یک Thread Pool
+  جستجو می‌شوند؛ بهترین تقسیم بلوک‌ها به ترتیب ویژگی‌ها ادغام می‌شود، پس درخت با
+  اجرای ترتیبی یکسان است
+- ستون‌های دسته‌ای (categorical_features، کد صحیح دسته‌ها) با تقسیم چندتایی جستجو
+  می‌شوند: شمارش کلاس‌های هر دسته یک بار در هر گره جمع و دسته‌ها بر اساس نرخ کلاس
+  مثبت مرتب می‌شوند (utils.categorical)؛ مجموعه دسته‌های فرزند چپ در بیت‌ست گره ذخیره می‌شود
+- ماتریس‌های scipy.sparse چگال نمی‌شوند (utils.sparse): در هر گره فقط غیرصفرهای هر ویژگی
+  پیمایش و صفرهای ضمنی گره یک بلوک شمرده می‌شوند؛ پیمایش پیش‌بینی مقدار هر (سطر، ویژگی)
+  را با جستجوی دودویی در غیرصفرها می‌خواند
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+import numpy as np
+from utils.binning import (BinMapper, bin_histograms, grouped_bin_histograms, grouped_histogram_split_candidates,
+                           histogram_split_candidates)
+from utils.categorical import (category_bitset, category_ranks, category_split_candidates, in_category_set,
+                               validate_codes)
+from utils.instrumentation import NULL_STATS
+from utils.parallel import resolve_n_jobs
+from utils.presorted import argsort_columns, partition_sorted
+from utils.sparse import SparseColumns, SparseMatrix, is_sparse
+from utils.split_sweep import grouped_class_count_sweep, score_sorted_feature, sparse_class_count_sweep
+
+TREE_LEAF = -1
+GROWTH_MODES = ("depth", "level")
+# گره‌های کوچک‌تر از این تعداد سطر ترتیبی جستجو می‌شوند (هزینه ارسال task بیشتر از سود است)
+MIN_PARALLEL_ROWS = 2048
+
+
+def _regroup_columns(columns, row_group):
+    """
+    گروه‌بندی دوباره ستون‌های اندیس مرتب (تعداد ویژگی × تعداد سطر فعال) بر اساس گره جدید
+
+    سطرهای با گره -1 حذف می‌شوند و مرتب‌سازی پایدار بر اساس شماره گره ترتیب صعودی
+    مقدار ویژگی را داخل هر گره حفظ می‌کند (تعمیم partition_sorted به چند گره).
+    """
+    keys = row_group[columns]
+    keep = keys >= 0
+    if not keep.all():
+        # هر ستون همان سطرها را (با ترتیب دیگر) دارد، پس تعداد سطرهای باقی‌مانده همه ستون‌ها برابر است
+        columns = columns[keep].reshape(len(columns), -1)
+        keys = keys[keep].reshape(len(columns), -1)
+    if keys.size and keys.max() < np.iinfo(np.int16).max:
+        # کلیدهای ۱۶ بیتی با radix sort پایدار مرتب می‌شوند
+        keys = keys.astype(np.int16)
+    order = np.argsort(keys, axis=1, kind="stable")
+    return np.take_along_axis(columns, order, axis=1)
+
+
+def _best_per_group(groups, scores, thresholds):
+    """
+    بهترین کاندید هر گره با همان قاعده _find_best_split: اولین بیشینه (np.argmax)، گره‌ای که
+    کاندید NaN دارد یا بیشینه آن (گرد شده تا ۱۰ رقم) صفر است کنار گذاشته می‌شود.
+    groups باید صعودی باشد.
+
+    Returns:
+    tuple یا None
+        (groups, scores, thresholds) برای گره‌های معتبر
+    """
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    nan = np.isnan(scores)
+    has_nan = np.logical_or.reduceat(nan, starts)
+    filled = np.where(nan, -np.inf, scores)
+    group_max = np.maximum.reduceat(filled, starts)
+    is_max = filled == np.repeat(group_max, np.diff(np.r_[starts, len(scores)]))
+    first = np.minimum.reduceat(np.where(is_max, np.arange(len(scores)), len(scores)), starts)
+    valid = ~has_nan & (np.round(group_max, 10) != 0)
+    if not valid.any():
+        return None
+    first = first[valid]
+    return groups[first], scores[first], thresholds[first]
+
+
+def _goes_left(values, split):
+    """ماسک فرزند چپ: split آستانه (مقدار <= آستانه) یا آرایه کد دسته‌های فرزند چپ است."""
+    if isinstance(split, np.ndarray):
+        return np.isin(values, split)
+    return values <= split
+
+
+def resolve_max_features(max_features, n_features):
+    """تبدیل max_features (None، int، float، "sqrt" یا "log2") به تعداد ویژگی‌ها."""
+    if max_features is None:
+        return n_features
+    if max_features == "sqrt":
+        n = int(np.sqrt(n_features))
+    elif max_features == "log2":
+        n = int(np.log2(n_features)) if n_features > 0 else 0
+    elif isinstance(max_features, float):
+        n = int(max_features * n_features)
+    elif isinstance(max_features, (int, np.integer)):
+        n = int(max_features)
+    else:
+        raise ValueError(f"max_features نامعتبر است: {max_features!r}")
+    return min(n_features, max(1, n))
+
+
+class Tree:
+    """
+    ساختار آرایه‌ای یک درخت آموزش‌دیده
+
+    Attributes:
+    feature : np.ndarray
+        اندیس ویژگی تقسیم هر گره (برای برگ‌ها TREE_LEAF)
+    threshold : np.ndarray
+        آستانه تقسیم؛ نمونه‌های با مقدار <= آستانه به فرزند چپ می‌روند. در گره‌های
+        دسته‌ای NaN است
+    children_left, children_right : np.ndarray
+        اندیس فرزندان هر گره (برای برگ‌ها TREE_LEAF)
+    value : np.ndarray
+        شمارش کلاس‌های نمونه‌های هر گره (تعداد گره × تعداد کلاس)
+    delta : np.ndarray
+        امتیاز وزنی تقسیم انتخاب شده در هر گره
+    depth : np.ndarray
+        عمق هر گره
+    classes : np.ndarray
+        کلاس‌های مرتب متناظر با ستون‌های value
+    node_weights : np.ndarray یا None
+        وزن معیارها در هر گره (تعداد گره × تعداد معیار) در حالت وزن‌دهی گره‌به‌گره
+    category_bitset : np.ndarray یا None
+        بیت‌ست uint8 (تعداد گره × تعداد بایت) دسته‌های فرزند چپ گره‌های دسته‌ای (گره‌های
+        غیربرگ با threshold برابر NaN)؛ نمونه‌ای که کد دسته آن در مجموعه نیست (از جمله
+        دسته‌های ناشناخته) به فرزند راست می‌رود. None یعنی درخت تقسیم دسته‌ای ندارد
+    """
+    def __init__(self, feature, threshold, children_left, children_right, value, delta, depth, classes,
+                 node_weights=None, category_bitset=None):
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=float)
+        self.children_left = np.asarray(children_left, dtype=np.intp)
+        self.children_right = np.asarray(children_right, dtype=np.intp)
+        self.value = np.asarray(value, dtype=float)
+        self.delta = np.asarray(delta, dtype=float)
+        self.depth = np.asarray(depth, dtype=np.intp)
+        self.classes = np.asarray(classes)
+        self.node_weights = None if node_weights is None else np.asarray(node_weights, dtype=float)
+        self.category_bitset = None if category_bitset is None else np.asarray(category_bitset, dtype=np.uint8)
+
+    # نام آرایه‌های تخت درخت به ترتیب آرگومان‌های سازنده
+    ARRAY_FIELDS = ("feature", "threshold", "children_left", "children_right", "value", "delta", "depth",
+                    "classes", "node_weights", "category_bitset")
+    # آرایه‌های اختیاری که فقط در صورت وجود در خروجی to_arrays می‌آیند
+    OPTIONAL_FIELDS = ("node_weights", "category_bitset")
+
+    @property
+    def node_count(self):
+        return len(self.feature)
+
+    def to_arrays(self):
+        """خروجی درخت به صورت dict از آرایه‌های تخت NumPy (node_weights و category_bitset فقط در صورت وجود)."""
+        arrays = {name: getattr(self, name) for name in self.ARRAY_FIELDS}
+        for name in self.OPTIONAL_FIELDS:
+            if arrays[name] is None:
+                del arrays[name]
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """ساخت دوباره درخت از خروجی to_arrays."""
+        return cls(**{name: arrays[name] for name in cls.ARRAY_FIELDS if name in arrays})
+
+    def apply(self, X, chunk_size=None):
+        """
+        اندیس برگ مقصد هر نمونه
+
+        پیمایش سطح‌به‌سطح و برداری است: در هر دور همه نمونه‌هایی که هنوز به برگ نرسیده‌اند
+        با یک مقایسه آرایه‌ای یک سطح پایین می‌روند (حداکثر به اندازه عمق درخت دور).
+        با chunk_size ورودی (مثلاً np.memmap) تکه‌تکه به float تبدیل و پیمایش می‌شود.
+        ماتریس scipy.sparse (ترجیحاً CSR) چگال نمی‌شود: مقدار هر (سطر، ویژگی گره) با جستجوی
+        دودویی در غیرصفرهای آن خوانده می‌شود.
+        """
+        n_samples = X.shape[0]
+        if chunk_size is None or chunk_size >= n_samples:
+            return self._apply_matrix(X)
+        leaves = np.empty(n_samples, dtype=np.intp)
+        for start in range(0, n_samples, chunk_size):
+            stop = min(start + chunk_size, n_samples)
+            leaves[start:stop] = self._apply_matrix(X[start:stop])
+        return leaves
+
+    def _apply_matrix(self, X):
+        if is_sparse(X):
+            X = SparseMatrix(X)
+        if isinstance(X, SparseMatrix):
+            return self._traverse(X.shape[0], X.values_at)
+        X = np.asarray(X, dtype=float)
+        return self._traverse(X.shape[0], lambda rows, features: X[rows, features])
+
+    def _traverse(self, n_samples, values_at):
+        """پیمایش سطح‌به‌سطح؛ values_at(rows, features) مقدار ویژگی گره فعلی هر سطر است."""
+        node = np.zeros(n_samples, dtype=np.intp)
+        rows = np.arange(n_samples) if self.children_left[0] != TREE_LEAF else np.zeros(0, dtype=np.intp)
+        while len(rows):
+            current = node[rows]
+            values = values_at(rows, self.feature[current])
+            go_left = values <= self.threshold[current]
+            if self.category_bitset is not None:
+                categorical = np.isnan(self.threshold[current])
+                if categorical.any():
+                    go_left[categorical] = in_category_set(self.category_bitset, current[categorical],
+                                                           values[categorical])
+            current = np.where(go_left, self.children_left[current], self.children_right[current])
+            node[rows] = current
+            rows = rows[self.children_left[current] != TREE_LEAF]
+        return node
+
+    def predict_proba(self, X, chunk_size=None):
+        """احتمال هر کلاس برای هر نمونه بر اساس توزیع کلاس‌های برگ مقصد."""
+        # نرمال‌سازی یک بار برای هر گره انجام می‌شود، نه برای هر نمونه
+        node_proba = self.value / self.value.sum(axis=1, keepdims=True)
+        return node_proba[self.apply(X, chunk_size)]
+
+
+class TreeBuilder:
+    """
+    ساخت عمق-اول درخت با متریکی که `evaluate_counts` دارد
+    (WeightedVotingMetric یا SingleCriterionMetric).
+
+    Parameters:
+    metric : object
+        متریک امتیازدهی تقسیم‌ها
+    max_depth : int
+        حداکثر عمق درخت
+    min_samples_split : int
+        حداقل تعداد نمونه لازم برای تقسیم یک گره
+    node_weighting : bool
+        اگر True باشد، پیش از جستجوی تقسیم هر گره وزن معیارها با
+        `metric.update_node_weights` از روی زیرمجموعه همان گره به‌روز می‌شود
+    max_bins : int, optional
+        اگر داده شود درخت در حالت هیستوگرامی با حداکثر این تعداد بازه برای هر ویژگی
+        ساخته می‌شود (None یعنی حالت دقیق با همه آستانه‌ها)
+    bin_mapper : BinMapper, optional
+        نگاشت آموزش‌دیده بازه‌ها برای استفاده دوباره؛ اگر داده نشود در build ساخته می‌شود
+    max_features : int، float، "sqrt"، "log2" یا None
+        تعداد ویژگی‌هایی که در هر گره به صورت تصادفی برای جستجوی تقسیم انتخاب می‌شوند
+        (مثل جنگل تصادفی)؛ None یعنی همه ویژگی‌ها
+    random_state : int, optional
+        بذر انتخاب تصادفی ویژگی‌ها
+    split_n_jobs : int, optional
+        تعداد thread ها برای جستجوی موازی تقسیم بین ویژگی‌های یک گره (None یا 1 = ترتیبی،
+        -1 = همه هسته‌ها)؛ فقط گره‌های با حداقل MIN_PARALLEL_ROWS سطر موازی جستجو می‌شوند
+    growth : str
+        "depth": ساخت عمق-اول گره‌به‌گره. "level": ساخت سطح‌به‌سطح که همه گره‌های یک
+        عمق را با هم جستجو می‌کند (با node_weighting سازگار نیست). تقسیم هر گره در دو حالت
+        یکسان است؛ فقط شماره‌گذاری گره‌ها (و با max_features ترتیب انتخاب تصادفی
+        ویژگی‌ها) متفاوت است
+    categorical_features : array-like, optional
+        اندیس ستون‌های دسته‌ای X که باید کد صحیح نامنفی دسته‌ها باشند؛ اگر داده نشود از
+        metric.categorical_features (در صورت وجود) خوانده می‌شود تا درخت‌های موقت تخمین FN
+        هم همان تقسیم‌های دسته‌ای را ببینند. دسته‌ها بر اساس نرخ metric.positive_label مرتب
+        می‌شوند (اگر در کلاس‌ها نباشد، آخرین کلاس)
+    """
+    def __init__(self, metric, max_depth=5, min_samples_split=2, node_weighting=False, max_bins=None,
+                 bin_mapper=None, max_features=None, random_state=None, split_n_jobs=None, growth="depth",
+                 categorical_features=None):
+        if growth not in GROWTH_MODES:
+            raise ValueError(f"growth باید یکی از {GROWTH_MODES} باشد، نه {growth!r}.")
+        if growth == "level" and node_weighting:
+            raise ValueError("رشد سطح‌به‌سطح (growth='level') با وزن‌دهی گره‌به‌گره سازگار نیست.")
+        self.metric = metric
+        self.max_depth = max_depth
+        self.min_samples_split = min_samples_split
+        self.node_weighting = node_weighting
+        self.max_bins = max_bins
+        self.bin_mapper = bin_mapper
+        self.max_features = max_features
+        self.random_state = random_state
+        self.split_n_jobs = split_n_jobs
+        self.growth = growth
+        self.categorical_features = categorical_features
+
+    def build(self, X, y, sorted_idx=None, sample_weight=None, X_binned=None):
+        """
+        ساخت درخت روی (X, y)
+
+        اگر sorted_idx داده شود (اندیس‌های مرتب سطرهای یک گره، مثلاً از درخت اصلی)، فقط
+        همان سطرها استفاده می‌شوند و مرتب‌سازی دوباره انجام نمی‌شود.
+        با sample_weight شمارش کلاس‌ها (و در نتیجه امتیاز معیارها و value گره‌ها) وزنی است و
+        سطرهای با وزن صفر در درخت شرکت نمی‌کنند.
+        X_binned خروجی bin_mapper.transform(X) است تا داده بازه‌بندی شده بین چند build
+        (مثلاً مراحل boosting) دوباره ساخته نشود.
+        X می‌تواند ماتریس scipy.sparse یا SparseColumns باشد (فقط حالت دقیق عمق-اول بدون ستون
+        دسته‌ای)؛ در این صورت sorted_idx فقط یک ستون شماره سطرهای گره دارد (argsort_columns).
+        """
+        sparse = is_sparse(X) or isinstance(X, SparseColumns)
+        if sparse:
+            if not isinstance(X, SparseColumns):
+                X = SparseColumns(X)
+        else:
+            X = np.asarray(X, dtype=float)
+        y = np.asarray(y)
+        if sample_weight is not None:
+            sample_weight = np.asarray(sample_weight, dtype=float)
+        if not sparse and sorted_idx is None and np.any(np.isnan(X)):
+            raise ValueError("ورودی X شامل مقادیر NaN است.")
+        if X.shape[0] != y.shape[0]:
+            raise ValueError("تعداد سطرهای X و y برابر نیست.")
+
+        classes = self.metric.classes if getattr(self.metric, "classes", None) is not None else np.unique(y)
+        n_classes = len(classes)
+        y_codes = np.searchsorted(classes, y)
+
+        categorical = self.categorical_features
+        if categorical is None:
+            categorical = getattr(self.metric, "categorical_features", None)
+        categorical = np.zeros(0, dtype=np.intp) if categorical is None else np.asarray(categorical, dtype=np.intp)
+        if sparse and (len(categorical) or self.max_bins is not None or self.bin_mapper is not None
+                       or self.growth == "level"):
+            raise ValueError("ورودی sparse فقط در حالت دقیق (max_bins=None) با growth='depth' و بدون ستون‌های "
+                             "دسته‌ای پشتیبانی می‌شود.")
+        # تعداد دسته‌های هر ویژگی (صفر برای ویژگی‌های عددی) و کلاسی که دسته‌ها با نرخ آن مرتب می‌شوند
+        self._n_categories = np.zeros(X.shape[1], dtype=np.intp)
+        self._n_categories[categorical] = validate_codes(X, categorical)
+        positive = np.flatnonzero(classes == getattr(self.metric, "positive_label", None))
+        self._positive = int(positive[0]) if len(positive) else n_classes - 1
+
+        binned = self.max_bins is not None or self.bin_mapper is not None
+        if binned:
+            if self.bin_mapper is None:
+                self.bin_mapper = BinMapper(self.max_bins, categorical if len(categorical) else None).fit(X)
+            if X_binned is None:
+                X_binned = self.bin_mapper.transform(X)
+            n_bins = int(self.bin_mapper.n_bins_.max()) if X.shape[1] > 0 else 1
+
+        # اندیس‌های مرتب هر ویژگی: ستون f ترتیب صعودی نمونه‌ها بر اساس ویژگی f است
+        # (در حالت هیستوگرامی فقط برای وزن‌دهی گره‌به‌گره لازم است)
+        if sorted_idx is None and (not binned or self.node_weighting):
+            sorted_idx = argsort_columns(X)
+        root_rows = np.arange(X.shape[0]) if sorted_idx is None or X.shape[1] == 0 else sorted_idx[:, 0]
+        if sample_weight is not None and not np.all(sample_weight[root_rows] > 0):
+            # سطرهای با وزن صفر (مثلاً بیرون از نمونه bootstrap) مثل سطرهای حذف شده هستند و حتی
+            # آستانه کاندید نمی‌سازند؛ فقط اندیس‌های مرتب فیلتر می‌شوند، نه خود X
+            keep = sample_weight > 0
+            if sorted_idx is not None:
+                sorted_idx = partition_sorted(sorted_idx, keep)[0]
+            root_rows = root_rows[keep[root_rows]]
+        go_left = np.zeros(X.shape[0], dtype=bool)
+        # در حالت sparse: ماسک سطرهای گرهی که جستجو می‌شود (SparseColumns.node_nonzeros)
+        in_node = np.zeros(X.shape[0], dtype=bool) if sparse else None
+        n_candidates = resolve_max_features(self.max_features, X.shape[1])
+        rng = np.random.default_rng(self.random_state)
+
+        feature, threshold, children_left, children_right = [], [], [], []
+        value, delta, depth = [], [], []
+        node_weights = [] if self.node_weighting else None
+        category_sets = {}
+
+        def add_node(node_depth, rows, parent=None):
+            feature.append(TREE_LEAF)
+            threshold.append(np.nan)
+            children_left.append(TREE_LEAF)
+            children_right.append(TREE_LEAF)
+            value.append(np.bincount(y_codes[rows], None if sample_weight is None else sample_weight[rows],
+                                     minlength=n_classes))
+            delta.append(np.nan)
+            depth.append(node_depth)
+            if node_weights is not None:
+                # برگ‌ها وزن گره پدر را به ارث می‌برند
+                node_weights.append(np.full(len(self.metric.criteria), np.nan) if parent is None
+                                    else node_weights[parent])
+            return len(feature) - 1
+
+        stats = getattr(self.metric, "stats", NULL_STATS)
+        if self.growth == "level":
+            return self._build_level_wise(X, y, y_codes, classes, root_rows, None if binned else sorted_idx,
+                                          X_binned, n_bins if binned else None, sample_weight, n_candidates, rng,
+                                          stats)
+
+        if self.node_weighting:
+            with stats.timer("node_weighting"):
+                self.metric.start_node_weighting(X, y, sorted_idx, sample_weight)
+
+        if binned and not self.node_weighting:
+            # در حالت هیستوگرامی بدون وزن‌دهی گره‌به‌گره، سطرهای گره کافی است
+            sorted_idx = None
+        root_hist = bin_histograms(X_binned, y_codes, root_rows, n_bins, n_classes, sample_weight) if binned else None
+        stack = [(add_node(0, root_rows), sorted_idx, root_rows, root_hist)]
+        n_workers = resolve_n_jobs(self.split_n_jobs, X.shape[1])
+        with ThreadPoolExecutor(n_workers) if n_workers > 1 else nullcontext() as pool:
+            while stack:
+                node_id, node_sorted, rows, hist = stack.pop()
+                n_node = len(rows)
+                # گره خالص یا کوچک تقسیم نمی‌شود؛ فرزندان آن همان پیش‌بینی را می‌دادند
+                if (depth[node_id] >= self.max_depth or n_node < self.min_samples_split
+                        or np.count_nonzero(value[node_id]) < 2):
+                    continue
+
+                if self.node_weighting:
+                    with stats.timer("node_weighting"):
+                        node_weights[node_id] = self.metric.update_node_weights(X, y, node_sorted, depth[node_id],
+                                                                                sample_weight)
+
+                features = range(X.shape[1])
+                if n_candidates < X.shape[1]:
+                    # ترتیب صعودی حفظ می‌شود تا قاعده تساوی (اولین ویژگی) تغییر نکند
+                    features = np.sort(rng.choice(X.shape[1], n_candidates, replace=False))
+
+                stats.count("nodes_searched")
+                with stats.timer("split_search"):
+                    if binned:
+                        search = self._find_best_bin_split
+                        args = (X_binned, y, rows, hist)
+                    elif sparse:
+                        search = self._find_best_sparse_split
+                        args = (X, y, y_codes, n_classes, rows, value[node_id], in_node)
+                        in_node[rows] = True
+                    else:
+                        search = self._find_best_split
+                        args = (X, y, y_codes, n_classes, node_sorted)
+                    if pool is not None and n_node >= MIN_PARALLEL_ROWS:
+                        stats.count("parallel_split_searches")
+                        best = self._parallel_split(pool, n_workers, search, args, features, sample_weight)
+                    else:
+                        best = search(*args, features, sample_weight)
+                    if sparse:
+                        in_node[rows] = False
+                if best is None:
+                    continue
+                best_feature, best_split, best_delta = best
+
+                go_left[rows] = _goes_left(X.column(best_feature, rows) if sparse else X[rows, best_feature],
+                                           best_split)
+                left_rows, right_rows = rows[go_left[rows]], rows[~go_left[rows]]
+                left_sorted = right_sorted = None
+                if node_sorted is not None:
+                    # تقسیم پایدار: ترتیب مرتب هر ستون در فرزندان حفظ می‌شود
+                    left_sorted, right_sorted = partition_sorted(node_sorted, go_left)
+                    if not binned:
+                        left_rows, right_rows = left_sorted[:, 0], right_sorted[:, 0]
+
+                left_hist = right_hist = None
+                if binned:
+                    # هیستوگرام فقط برای فرزند کوچک‌تر ساخته می‌شود؛ فرزند دیگر = پدر - فرزند کوچک‌تر
+                    if len(left_rows) <= len(right_rows):
+                        left_hist = bin_histograms(X_binned, y_codes, left_rows, n_bins, n_classes, sample_weight)
+                        right_hist = hist - left_hist
+                    else:
+                        right_hist = bin_histograms(X_binned, y_codes, right_rows, n_bins, n_classes, sample_weight)
+                        left_hist = hist - right_hist
+
+                feature[node_id] = best_feature
+                if isinstance(best_split, np.ndarray):
+                    category_sets[node_id] = best_split
+                else:
+                    threshold[node_id] = best_split
+                delta[node_id] = best_delta
+                children_left[node_id] = add_node(depth[node_id] + 1, left_rows, node_id)
+                children_right[node_id] = add_node(depth[node_id] + 1, right_rows, node_id)
+                stack.append((children_right[node_id], right_sorted, right_rows, right_hist))
+                stack.append((children_left[node_id], left_sorted, left_rows, left_hist))
+
+        return Tree(feature, threshold, children_left, children_right, value, delta, depth, classes,
+                    node_weights, category_bitset(category_sets, len(feature)) if category_sets else None)
+
+    def _build_level_wise(self, X, y, y_codes, classes, root_rows, sorted_idx, X_binned, n_bins, sample_weight,
+                          n_candidates, rng, stats):
+        """
+        ساخت سطح‌به‌سطح (اول-سطح) درخت: همه گره‌های قابل تقسیم یک عمق با هم جستجو می‌شوند
+
+        - row_group گره فعال هر سطر در سطح جاری است (-1 برای سطرهای برگ‌ها)
+        - در حالت هیستوگرامی هیستوگرام فرزندان کوچک‌تر همه تقسیم‌های یک سطح با یک
+          bincount ساخته می‌شود و فرزند دیگر از تفریق از هیستوگرام پدر به دست می‌آید
+        - در حالت دقیق ستون‌های اندیس‌های مرتب به صورت پایدار بر اساس گره گروه‌بندی
+          می‌شوند و هر ویژگی با یک ماتریس تجمعی برای همه گره‌ها جاروب می‌شود
+        - کاندیدهای همه گره‌ها برای هر ویژگی با یک فراخوانی evaluate_counts امتیاز
+          می‌گیرند و بهترین تقسیم هر گره با همان قاعده تساوی حالت عمق-اول انتخاب می‌شود
+        - شمارش کلاس‌های هر (گره، دسته) ویژگی‌های دسته‌ای با یک bincount (یا از هیستوگرام
+          گره‌ها) ساخته می‌شود
+        """
+        n_rows, n_features = X.shape
+        n_classes = len(classes)
+        binned = X_binned is not None
+        feature, threshold, children_left, children_right = [], [], [], []
+        value, delta, depth = [], [], []
+        category_sets = {}
+
+        def add_node(node_depth, node_value):
+            feature.append(TREE_LEAF)
+            threshold.append(np.nan)
+            children_left.append(TREE_LEAF)
+            children_right.append(TREE_LEAF)
+            value.append(node_value)
+            delta.append(np.nan)
+            depth.append(node_depth)
+            return len(feature) - 1
+
+        row_group = np.full(n_rows, -1, dtype=np.intp)
+        row_group[root_rows] = 0
+        nodes = [add_node(0, np.bincount(y_codes[root_rows], None if sample_weight is None else sample_weight[root_rows],
+                                         minlength=n_classes))]
+        # ستون f: سطرهای فعال به ترتیب گره و داخل هر گره به ترتیب صعودی ویژگی f
+        columns = None if binned else np.ascontiguousarray(sorted_idx.T)
+        hist = grouped_bin_histograms(X_binned, y_codes, root_rows, np.zeros(len(root_rows), dtype=np.intp), 1,
+                                      n_bins, n_classes, sample_weight) if binned else None
+
+        n_workers = resolve_n_jobs(self.split_n_jobs, n_features)
+        with ThreadPoolExecutor(n_workers) if n_workers > 1 else nullcontext() as pool:
+            while nodes:
+                sizes = np.bincount(row_group[row_group >= 0], minlength=len(nodes))
+                splittable = np.array([depth[node] < self.max_depth and sizes[g] >= self.min_samples_split
+                                       and np.count_nonzero(value[node]) >= 2 for g, node in enumerate(nodes)],
+                                      dtype=bool)
+                if not splittable.any():
+                    break
+                if not splittable.all():
+                    # برگ‌های این سطح کنار گذاشته و گره‌های باقی‌مانده دوباره شماره‌گذاری می‌شوند
+                    remap = np.append(np.where(splittable, np.cumsum(splittable) - 1, -1), -1)
+                    row_group = remap[row_group]
+                    nodes = [node for node, keep in zip(nodes, splittable) if keep]
+                    sizes = sizes[splittable]
+                    if binned:
+                        hist = hist[splittable]
+                    else:
+                        columns = _regroup_columns(columns, row_group)
+
+                n_groups = len(nodes)
+                stats.count("levels")
+                stats.count("nodes_searched", n_groups)
+                feature_mask = None
+                if n_candidates < n_features:
+                    feature_mask = np.zeros((n_groups, n_features), dtype=bool)
+                    for g in range(n_groups):
+                        feature_mask[g, rng.choice(n_features, n_candidates, replace=False)] = True
+
+                best_score = np.full(n_groups, -np.inf)
+                best_feature = np.full(n_groups, TREE_LEAF, dtype=np.intp)
+                best_threshold = np.full(n_groups, np.nan)
+                # گره -> کد دسته‌های فرزند چپ برای گره‌هایی که بهترین تقسیم آن‌ها دسته‌ای است
+                best_sets = {}
+                with stats.timer("split_search"):
+                    if binned:
+                        search = partial(self._level_bin_split, X_binned=X_binned, y=y, row_group=row_group,
+                                         hist=hist, sample_weight=sample_weight, feature_mask=feature_mask)
+                    else:
+                        search = partial(self._level_exact_split, X=X, y=y, y_codes=y_codes, n_classes=n_classes,
+                                         columns=columns, group_sizes=sizes, sample_weight=sample_weight,
+                                         feature_mask=feature_mask)
+                    parallel = pool is not None and sizes.sum() >= MIN_PARALLEL_ROWS
+                    # ادغام به ترتیب ویژگی‌ها و فقط با امتیاز اکیداً بیشتر (اولین ویژگی در تساوی)
+                    for f, found in enumerate(pool.map(search, range(n_features)) if parallel
+                                              else map(search, range(n_features))):
+                        if found is None:
+                            continue
+                        groups, scores, thresholds = found[:3]
+                        better = scores > best_score[groups]
+                        groups = groups[better]
+                        best_score[groups] = scores[better]
+                        best_feature[groups] = f
+                        best_threshold[groups] = thresholds[better]
+                        if len(found) > 3:
+                            best_sets.update(zip(groups.tolist(), (found[3][i] for i in np.flatnonzero(better))))
+                        elif best_sets:
+                            for g in groups.tolist():
+                                best_sets.pop(g, None)
+
+                split = best_feature != TREE_LEAF
+                if not split.any():
+                    break
+                # تخصیص سطرها به فرزندان: فرزند چپ گره j ام تقسیم شده 2j و فرزند راست 2j+1
+                split_index = np.cumsum(split) - 1
+                active = np.flatnonzero(row_group >= 0)
+                groups = row_group[active]
+                active, groups = active[split[groups]], groups[split[groups]]
+                go_right = X[active, best_feature[groups]] > best_threshold[groups]
+                if best_sets:
+                    # گره‌های با تقسیم دسته‌ای (آستانه NaN): جدول (گره × کد دسته) فرزند چپ
+                    left_table = np.zeros((n_groups, int(self._n_categories.max())), dtype=bool)
+                    for g, codes in best_sets.items():
+                        left_table[g, codes] = True
+                    categorical = np.isnan(best_threshold[groups])
+                    cat_groups = groups[categorical]
+                    codes = X[active[categorical], best_feature[cat_groups]].astype(np.intp)
+                    go_right[categorical] = ~left_table[cat_groups, codes]
+                row_group = np.full(n_rows, -1, dtype=np.intp)
+                row_group[active] = 2 * split_index[groups] + go_right
+
+                n_children = 2 * int(split.sum())
+                child_value = np.bincount(row_group[active] * n_classes + y_codes[active],
+                                          None if sample_weight is None else sample_weight[active],
+                                          minlength=n_children * n_classes).reshape(n_children, n_classes)
+                next_nodes = []
+                for g in np.flatnonzero(split):
+                    node, j = nodes[g], split_index[g]
+                    feature[node] = int(best_feature[g])
+                    threshold[node] = best_threshold[g]
+                    if g in best_sets:
+                        category_sets[node] = best_sets[g]
+                    delta[node] = float(best_score[g])
+                    children_left[node] = add_node(depth[node] + 1, child_value[2 * j])
+                    children_right[node] = add_node(depth[node] + 1, child_value[2 * j + 1])
+                    next_nodes += [children_left[node], children_right[node]]
+
+                if binned:
+                    # هیستوگرام فقط برای فرزند کوچک‌تر هر تقسیم؛ فرزند دیگر = پدر - فرزند کوچک‌تر
+                    child_sizes = np.bincount(row_group[active], minlength=n_children).reshape(-1, 2)
+                    small = 2 * np.arange(n_children // 2) + (child_sizes[:, 0] > child_sizes[:, 1])
+                    small_rank = np.full(n_children, -1, dtype=np.intp)
+                    small_rank[small] = np.arange(len(small))
+                    rows = active[small_rank[row_group[active]] >= 0]
+                    small_hist = grouped_bin_histograms(X_binned, y_codes, rows, small_rank[row_group[rows]],
+                                                        len(small), n_bins, n_classes, sample_weight)
+                    next_hist = np.empty((n_children,) + hist.shape[1:])
+                    next_hist[small] = small_hist
+                    next_hist[small ^ 1] = hist[split] - small_hist
+                    hist = next_hist
+                else:
+                    columns = _regroup_columns(columns, row_group)
+                nodes = next_nodes
+
+        return Tree(feature, threshold, children_left, children_right, value, delta, depth, classes, None,
+                    category_bitset(category_sets, len(feature)) if category_sets else None)
+
+    def _level_exact_split(self, f, X, y, y_codes, n_classes, columns, group_sizes, sample_weight, feature_mask):
+        """
+        بهترین آستانه ویژگی f برای همه گره‌های یک سطح در حالت دقیق؛ (groups, scores, thresholds) یا None.
+        برای ویژگی دسته‌ای خروجی عنصر چهارمی (کد دسته‌های فرزند چپ هر گره) هم دارد.
+        """
+        order = columns[f]
+        if self._n_categories[f]:
+            n_categories = self._n_categories[f]
+            codes = X[order, f].astype(np.intp)
+            groups = np.repeat(np.arange(len(group_sizes)), group_sizes)
+            counts = np.bincount((groups * n_categories + codes) * n_classes + y_codes[order],
+                                 None if sample_weight is None else sample_weight[order],
+                                 minlength=len(group_sizes) * n_categories * n_classes)
+            return self._level_category_split(f, counts.reshape(len(group_sizes), n_categories, n_classes),
+                                              X[:, f], y, order, group_sizes, sample_weight, feature_mask)
+        groups, boundaries, thresholds, left_counts, right_counts = grouped_class_count_sweep(
+            X[:, f], y_codes, n_classes, order, group_sizes, sample_weight
+        )
+        if feature_mask is not None:
+            keep = feature_mask[groups, f]
+            groups, boundaries, thresholds = groups[keep], boundaries[keep], thresholds[keep]
+            left_counts, right_counts = left_counts[keep], right_counts[keep]
+        if len(groups) == 0:
+            return None
+        starts = np.cumsum(group_sizes) - group_sizes
+
+        def label_splits(t):
+            start, end = starts[groups[t]], starts[groups[t]] + group_sizes[groups[t]]
+            node_order = order[start:end]
+            cut = boundaries[t] + 1 - start
+            sorted_y = y[node_order]
+            if sample_weight is None:
+                return sorted_y[cut:], sorted_y[:cut]
+            sorted_w = sample_weight[node_order]
+            return sorted_y[cut:], sorted_y[:cut], sorted_w[cut:], sorted_w[:cut]
+
+        # مطابق حالت عمق-اول، نقش y_left را نمونه‌های بزرگ‌تر از آستانه بازی می‌کنند
+        scores = self.metric.evaluate_counts(right_counts, left_counts, label_splits)
+        return _best_per_group(groups, scores, thresholds)
+
+    def _level_bin_split(self, f, X_binned, y, row_group, hist, sample_weight, feature_mask):
+        """نسخه هیستوگرامی _level_exact_split."""
+        n_bins_f = self.bin_mapper.n_bins_[f]
+        if self._n_categories[f]:
+            active = np.flatnonzero(row_group >= 0)
+            order = active[np.argsort(row_group[active], kind="stable")]
+            group_sizes = np.bincount(row_group[active], minlength=len(hist))
+            return self._level_category_split(f, hist[:, f, :n_bins_f], X_binned[:, f], y, order, group_sizes,
+                                              sample_weight, feature_mask)
+        groups, candidate_bins, thresholds, lower_counts, upper_counts = grouped_histogram_split_candidates(
+            hist[:, f, :n_bins_f], self.bin_mapper.bin_thresholds_[f]
+        )
+        if feature_mask is not None:
+            keep = feature_mask[groups, f]
+            groups, candidate_bins, thresholds = groups[keep], candidate_bins[keep], thresholds[keep]
+            lower_counts, upper_counts = lower_counts[keep], upper_counts[keep]
+        if len(groups) == 0:
+            return None
+
+        def label_splits(t):
+            rows = np.flatnonzero(row_group == groups[t])
+            upper = X_binned[rows, f] > candidate_bins[t]
+            if sample_weight is None:
+                return y[rows][upper], y[rows][~upper]
+            node_weight = sample_weight[rows]
+            return y[rows][upper], y[rows][~upper], node_weight[upper], node_weight[~upper]
+
+        scores = self.metric.evaluate_counts(upper_counts, lower_counts, label_splits)
+        return _best_per_group(groups, scores, thresholds)
+
+    def _level_category_split(self, f, counts, codes, y, order, group_sizes, sample_weight, feature_mask):
+        """
+        بهترین افراز دسته‌های ویژگی f برای همه گره‌های یک سطح از روی شمارش کلاس‌های
+        (گره × دسته × کلاس)؛ order سطرهای فعال به ترتیب گره است.
+
+        Returns:
+        tuple یا None
+            (groups, scores, thresholds, category_sets) که آستانه‌ها NaN هستند
+        """
+        groups, positions, category_order, lower_counts, upper_counts = category_split_candidates(counts,
+                                                                                                  self._positive)
+        if feature_mask is not None:
+            keep = feature_mask[groups, f]
+            groups, positions = groups[keep], positions[keep]
+            lower_counts, upper_counts = lower_counts[keep], upper_counts[keep]
+        if len(groups) == 0:
+            return None
+        starts = np.cumsum(group_sizes) - group_sizes
+        ranks = category_ranks(category_order)
+
+        def label_splits(t):
+            g = groups[t]
+            rows = order[starts[g]:starts[g] + group_sizes[g]]
+            upper = ranks[g, codes[rows].astype(np.intp)] > positions[t]
+            if sample_weight is None:
+                return y[rows][upper], y[rows][~upper]
+            node_weight = sample_weight[rows]
+            return y[rows][upper], y[rows][~upper], node_weight[upper], node_weight[~upper]
+
+        scores = self.metric.evaluate_counts(upper_counts, lower_counts, label_splits)
+        found = _best_per_group(groups, scores, np.arange(len(groups)))
+        if found is None:
+            return None
+        best_groups, best_scores, candidates = found
+        category_sets = [np.sort(category_order[g, :positions[t] + 1]) for g, t in zip(best_groups, candidates)]
+        return best_groups, best_scores, np.full(len(best_groups), np.nan), category_sets
+
+    @staticmethod
+    def _parallel_split(pool, n_workers, search, args, features, sample_weight):
+        """
+        جستجوی بلوک‌های پیوسته ویژگی‌ها در thread های pool و ادغام قطعی نتایج
+
+        بلوک‌ها به ترتیب ویژگی‌ها ادغام می‌شوند و بهترین بلوک بعدی فقط با امتیاز
+        اکیداً بیشتر جایگزین می‌شود؛ پس قاعده تساوی (اولین ویژگی) مثل اجرای ترتیبی است.
+        """
+        blocks = [block for block in np.array_split(np.asarray(features), n_workers) if len(block)]
+        best = None
+        for result in pool.map(lambda block: search(*args, block, sample_weight), blocks):
+            if result is not None and (best is None or result[2] > best[2]):
+                best = result
+        return best
+
+    def _find_best_split(self, X, y, y_codes, n_classes, node_sorted, features=None, sample_weight=None):
+        """
+        بهترین (ویژگی، آستانه، امتیاز) گره؛ در تساوی اولین ویژگی و کوچک‌ترین آستانه انتخاب می‌شود.
+        برای ویژگی دسته‌ای به جای آستانه آرایه کد دسته‌های فرزند چپ برگردانده می‌شود.
+        """
+        best = None
+        for f in range(X.shape[1]) if features is None else features:
+            if self._n_categories[f]:
+                rows = node_sorted[:, f]
+                codes = X[rows, f].astype(np.intp)
+                counts = np.bincount(codes * n_classes + y_codes[rows],
+                                     None if sample_weight is None else sample_weight[rows],
+                                     minlength=self._n_categories[f] * n_classes).reshape(-1, n_classes)
+                found = self._best_category_split(counts, codes, rows, y, sample_weight)
+                if found is not None and (best is None or found[1] > best[2]):
+                    best = (f, *found)
+                continue
+            thresholds, scores = score_sorted_feature(
+                self.metric, X[:, f], y, y_codes, n_classes, node_sorted[:, f], sample_weight
+            )
+            if len(thresholds) == 0:
+                continue
+            i = int(np.argmax(scores))
+            score = float(scores[i])
+            if np.isnan(score) or np.round(score, 10) == 0:
+                continue
+            if best is None or score > best[2]:
+                best = (f, thresholds[i], score)
+        return best
+
+    def _find_best_sparse_split(self, X, y, y_codes, n_classes, rows, node_counts, in_node, features=None,
+                                sample_weight=None):
+        """
+        نسخه sparse _find_best_split: فقط غیرصفرهای سطرهای گره (rows) پیمایش می‌شوند و صفرهای
+        ضمنی هر ویژگی یک بلوک با شمارش node_counts منهای شمارش غیرصفرهای آن هستند. کاندیدهای
+        همه ویژگی‌ها با یک فراخوانی evaluate_counts امتیاز می‌گیرند و قاعده تساوی همان حالت
+        دقیق است (اولین ویژگی، کوچک‌ترین آستانه).
+        """
+        columns, values, nonzero_rows = X.node_nonzeros(rows, in_node, features)
+        groups, thresholds, lower_counts, upper_counts = sparse_class_count_sweep(
+            columns, values, y_codes[nonzero_rows], X.shape[1], n_classes, node_counts, len(rows),
+            None if sample_weight is None else sample_weight[nonzero_rows]
+        )
+        # ویژگی‌های انتخاب نشده غیرصفری ندارند و بلوک صفرهای تنهای آن‌ها کاندیدی نمی‌سازد
+        if len(groups) == 0:
+            return None
+
+        def label_splits(t):
+            upper = X.column(groups[t], rows) > thresholds[t]
+            if sample_weight is None:
+                return y[rows][upper], y[rows][~upper]
+            node_weight = sample_weight[rows]
+            return y[rows][upper], y[rows][~upper], node_weight[upper], node_weight[~upper]
+
+        # مطابق حالت دقیق، نقش y_left را نمونه‌های بزرگ‌تر از آستانه بازی می‌کنند
+        scores = self.metric.evaluate_counts(upper_counts, lower_counts, label_splits)
+        found = _best_per_group(groups, scores, thresholds)
+        if found is None:
+            return None
+        best_groups, best_scores, best_thresholds = found
+        i = int(np.argmax(best_scores))
+        return int(best_groups[i]), best_thresholds[i], float(best_scores[i])
+
+    def _find_best_bin_split(self, X_binned, y, rows, hist, features=None, sample_weight=None):
+        """نسخه هیستوگرامی _find_best_split: فقط مرز بازه‌های غیرخالی گره امتیازدهی می‌شود."""
+        best = None
+        for f in range(X_binned.shape[1]) if features is None else features:
+            n_bins_f = self.bin_mapper.n_bins_[f]
+            if self._n_categories[f]:
+                # بازه هر سطر همان کد دسته آن است؛ هیستوگرام گره شمارش کلاس‌های هر دسته است
+                found = self._best_category_split(hist[f, :n_bins_f], X_binned[rows, f].astype(np.intp), rows, y,
+                                                  sample_weight)
+                if found is not None and (best is None or found[1] > best[2]):
+                    best = (f, *found)
+                continue
+            candidate_bins, thresholds, lower_counts, upper_counts = histogram_split_candidates(
+                hist[f, :n_bins_f], self.bin_mapper.bin_thresholds_[f]
+            )
+            if len(thresholds) == 0:
+                continue
+
+            def label_splits(t, f=f, candidate_bins=candidate_bins):
+                upper = X_binned[rows, f] > candidate_bins[t]
+                if sample_weight is None:
+                    return y[rows][upper], y[rows][~upper]
+                node_weight = sample_weight[rows]
+                return y[rows][upper], y[rows][~upper], node_weight[upper], node_weight[~upper]
+
+            # مطابق حالت دقیق، نقش y_left را نمونه‌های بزرگ‌تر از آستانه بازی می‌کنند
+            scores = self.metric.evaluate_counts(upper_counts, lower_counts, label_splits)
+            i = int(np.argmax(scores))
+            score = float(scores[i])
+            if np.isnan(score) or np.round(score, 10) == 0:
+                continue
+            if best is None or score > best[2]:
+                best = (f, thresholds[i], score)
+        return best
+
+    def _best_category_split(self, counts, codes, rows, y, sample_weight=None):
+        """
+        بهترین افراز دسته‌های یک ویژگی در گره از روی شمارش کلاس‌های هر دسته (تعداد دسته × تعداد کلاس)
+
+        codes کد دسته سطرهای rows است (فقط برای معیارهای بدون هسته شمارش‌محور استفاده می‌شود).
+
+        Returns:
+        tuple یا None
+            (کدهای مرتب دسته‌های فرزند چپ، امتیاز)
+        """
+        _, positions, order, lower_counts, upper_counts = category_split_candidates(counts[None], self._positive)
+        if len(positions) == 0:
+            return None
+        ranks = category_ranks(order[0])[codes]
+
+        def label_splits(t):
+            upper = ranks > positions[t]
+            if sample_weight is None:
+                return y[rows][upper], y[rows][~upper]
+            node_weight = sample_weight[rows]
+            return y[rows][upper], y[rows][~upper], node_weight[upper], node_weight[~upper]
+
+        # مثل تقسیم‌های عددی، نقش y_left را نمونه‌های فرزند راست (رتبه بالاتر) بازی می‌کنند
+        scores = self.metric.evaluate_counts(upper_counts, lower_counts, label_splits)
+        i = int(np.argmax(scores))
+        score = float(scores[i])
+        if np.isnan(score) or np.round(score, 10) == 0:
+            return None
+        return np.sort(order[0, :positions[i] + 1]), score
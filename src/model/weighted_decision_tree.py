@@ -1,35 +1,55 @@
+import logging
+from contextlib import ExitStack
 import numpy as np
-#from custom_tree_classifier.models.decision_tree import CustomDecisionTreeClassifier
-from custom_tree_classifier.metrics.metric_base import MetricBase
 # از آنجایی که دیگر از این کلاس استفاده نمی‌کنیم، می‌توان آن را حذف کرد یا کامنت کرد
 # from utils.voting_split_manager import FNWeightedSplitManager
 
-# Import معیارها (بدون تغییر)
-#from criteria.gini import gini_criterion
-from criteria.qg import gain_ratio_criterion
-from criteria.twoing import twoing_criterion
-from criteria.ng import normalized_gain_criterion
-from criteria.mch import multi_class_hellinger
-from criteria.marsh import marsh_criterion
-from criteria.gs import g_statistic_criterion
-from criteria.dkm import dkm_criterion
-from criteria.cs import chi_squared_criterion
-from criteria.bhy import bhattacharyya_criterion
-from criteria.ks import kolmogorov_smirnov_criterion
+# معیارها از رجیستری تنبل خوانده می‌شوند؛ ماژول هر معیار در اولین استفاده import می‌شود
+from criteria.base import class_counts
+from criteria.registry import default_criteria, get_count_kernel
+from utils.split_sweep import criterion_score_matrix, score_candidates, sweep_feature
+from model.tree_builder import TreeBuilder
+from utils.fn_estimators import get_fn_estimator
+from utils.fn_cache import FNCache, array_fingerprint, get_fn_cache, rows_fingerprint
+from utils.instrumentation import NULL_STATS, get_stats
+from utils.parallel import attach_shared, resolve_n_jobs, shared_arrays, shared_process_pool
+from utils.categorical import CategoryEncoder
+from utils.class_weight import compute_sample_weight
+from utils.presorted import PresortedDataset, argsort_columns, partition_sorted
+from utils.sparse import SparseColumns, SparseMatrix, is_sparse
+
+logger = logging.getLogger(__name__)
+
+# معیارهای پیش‌فرض WeightedDecisionTreeModel به صورت (نام، تابع)
+# (gini و gain_ratio در criteria.registry.CRITERIA هستند اما جزو پیش‌فرض‌ها نیستند)
+DEFAULT_CRITERIA = default_criteria()
+
+def _split_mask(split, n_samples):
+    """ماسک بولی شاخه چپ از روی split (ماسک بولی یا اندیس نمونه‌های شاخه چپ)."""
+    if split.dtype == bool:
+        return split
+    mask = np.zeros(n_samples, dtype=bool)
+    mask[split] = True
+    return mask
+
 
 # ================================================================
 # 🔥 کلاس ۱: SingleCriterionMetric (نسخه نهایی و اصلاح شده) 🔥
 # این نسخه به درستی مسئولیت امتیازدهی را به خود تابع معیار می‌سپارد.
 # ================================================================
-class SingleCriterionMetric(MetricBase):
+class SingleCriterionMetric:
     """
     یک کلاس کمکی بازطراحی شده که یک تابع معیار کیفیت تقسیم (Split Quality Function)
     را در قالبی که کتابخانه CustomDecisionTreeClassifier می‌پذیرد، بسته‌بندی می‌کند.
     """
-    def __init__(self, name, func):
-        super().__init__()
+    def __init__(self, name, func, positive_label=None, categorical_features=None):
         self.name = name
         self.func = func  # این تابع باید (y_left, y_right) را بپذیرد
+        self.kernel = get_count_kernel(func)  # نسخه شمارش‌محور معیار (در صورت وجود)
+        self.classes = None
+        # برای تقسیم‌های دسته‌ای درخت موقت: ستون‌های دسته‌ای و کلاسی که دسته‌ها با نرخ آن مرتب می‌شوند
+        self.positive_label = positive_label
+        self.categorical_features = categorical_features
 
     def compute_metric(self, metric_data: np.ndarray) -> float:
         """
@@ -38,21 +58,19 @@ class SingleCriterionMetric(MetricBase):
         """
         return 0.0
 
-    def compute_delta(self, split, metric_data):
+    def compute_delta(self, split, metric_data, sample_weight=None):
         """
         این متد به سادگی تابع معیار را با داده‌های تقسیم شده فراخوانی می‌کند.
         مقدار بازگشتی از تابع معیار، مستقیماً به عنوان امتیاز تقسیم استفاده می‌شود.
+        با sample_weight (هم‌تراز با metric_data) امتیاز از روی شمارش‌های وزنی کلاس‌ها است.
         """
         try:
             y = metric_data[:, 0] if metric_data.ndim > 1 else metric_data
             
             # جدا کردن داده‌ها بر اساس تقسیم
-            if split.dtype == bool:
-                y_left, y_right = y[split], y[~split]
-            else:
-                mask = np.ones(len(y), dtype=bool)
-                mask[split] = False
-                y_left, y_right = y[split], y[mask]
+            left_mask = _split_mask(split, len(y))
+            y_left, y_right = y[left_mask], y[~left_mask]
+            weights = () if sample_weight is None else (sample_weight[left_mask], sample_weight[~left_mask])
 
             # اگر یکی از فرزندان خالی باشد، تقسیم بی‌معناست
             if len(y_left) == 0 or len(y_right) == 0:
@@ -60,72 +78,248 @@ class SingleCriterionMetric(MetricBase):
 
             # 🔥 تغییر کلیدی: فراخوانی مستقیم تابع معیار 🔥
             # به جای محاسبه دستی information gain، خود تابع معیار (مثلاً gain_ratio_criterion)
-            # مسئول محاسبه امتیاز است.
-            return float(self.func(y_left, y_right))
+            # مسئول محاسبه امتیاز است. اگر هسته شمارش‌محور ثبت شده باشد، از آن استفاده می‌شود.
+            if self.kernel is not None:
+                _, left_counts, right_counts = class_counts(y_left, y_right, None, *weights)
+                return float(self.kernel(left_counts, right_counts))
+            return float(self.func(y_left, y_right, *weights))
         
         except Exception as e:
             # در صورت بروز خطا در تابع معیار، امتیاز صفر برگردان
             # print(f"[Debug] Error in criterion '{self.name}': {e}") # برای دیباگ می‌توانید این خط را فعال کنید
             return 0.0
 
+    def evaluate_counts(self, left_counts, right_counts, label_splits=None):
+        """امتیاز معیار برای دسته‌ای از تقسیم‌ها از روی ماتریس‌های شمارش کلاس."""
+        return criterion_score_matrix([(self.name, self.func)], left_counts, right_counts, label_splits)[:, 0]
+
+    def sweep_feature(self, values, y, sample_weight=None):
+        """امتیازدهی همه آستانه‌های یک ویژگی در یک گذر."""
+        return sweep_feature(self, values, y, self.classes, sample_weight)
+
 
 # ================================================================
 # کلاس ۲: WeightedVotingMetric (با متد evaluate اصلاح شده)
 # این مغز متفکر مدل شماست.
 # ================================================================
-class WeightedVotingMetric(MetricBase):
+class WeightedVotingMetric:
     """
     یک متریک سفارشی که از ترکیب وزن‌دار چندین معیار برای ارزیابی تقسیم‌ها استفاده می‌کند.
-    وزن‌ها به صورت پویا در هر گره بر اساس عملکرد هر معیار در کاهش False Negatives محاسبه می‌شوند.
+    وزن‌ها به صورت پویا بر اساس عملکرد هر معیار در کاهش False Negatives محاسبه می‌شوند:
+    یا یک بار در ریشه (update_weights_dynamic) یا در هر گره از روی سطرهای همان گره
+    (start_node_weighting / update_node_weights).
     """
-    def __init__(self, criteria, a):
-        super().__init__()
+    def __init__(self, criteria, a=None, fn_estimator="full", positive_label=1, n_jobs=None, node_refit_every=None,
+                 fn_cache=None):
         self.criteria = criteria  # لیستی از (نام، تابع) معیارها
-        self.a = a  # کل دیتاست ویژگی‌ها (X)
+        # a (کل دیتاست ویژگی‌ها) فقط برای سازگاری با نسخه‌های قبل پذیرفته و نگهداری نمی‌شود؛
+        # داده آموزشی فقط در طول fit و به صورت آرگومان به متدها داده می‌شود
+        self.fn_estimator = get_fn_estimator(fn_estimator)  # روش تخمین FN هر معیار
+        self.positive_label = positive_label
+        self.n_jobs = n_jobs  # تعداد پردازه‌ها برای تخمین موازی FN معیارها
+        self.node_refit_every = node_refit_every  # در وزن‌دهی گره‌به‌گره: هر چند سطح درخت‌های موقت دوباره آموزش ببینند
+        self.classes = None  # کلاس‌های مرتب داده آموزشی برای ساخت هیستوگرام ثابت
         self.weights_dict = {}  # دیکشنری برای نگهداری وزن‌های محاسبه شده در هر گره
-        self._fn_cache = {}  # کش برای جلوگیری از محاسبات تکراری FN
-
-    def estimate_fn_for_criterion(self, name, x_data, y_node):
-        """برای یک معیار مشخص، با ساختن یک درخت موقت، مقدار FN را تخمین می‌زند."""
-        from custom_tree_classifier.models.decision_tree import CustomDecisionTreeClassifier
-        cache_key = f"{name}_{len(x_data)}_{hash(y_node.tobytes())}_{hash(x_data.tobytes())}"
-        if cache_key in self._fn_cache:
-            return self._fn_cache[cache_key]
-
+        self.fn_cache = get_fn_cache(fn_cache)  # کش برای جلوگیری از محاسبات تکراری FN
+        self._dataset_key = None  # (X، y، وزن سطرها، اثر انگشت) دیتاست fit جاری برای کلیدهای کش
+        self._presorted = None  # PresortedDataset داده fit جاری (منبع مشترک اندیس‌های مرتب)
+        self.categorical_features = None  # اندیس ستون‌های دسته‌ای (کد دسته‌ها) برای درخت‌ها و درخت‌های موقت
+        self.stats = NULL_STATS  # اندازه‌گیری زمان و شمارنده‌ها (پیش‌فرض خاموش)
+        self._pool = None  # (Process Pool، handle های حافظه مشترک، ExitStack) داده fit جاری
+
+    def estimate_fn_for_criterion(self, name, x_data, y_node, sorted_idx=None, sample_weight=None):
+        """برای یک معیار مشخص، با تخمین‌گر FN انتخاب شده (درخت موقت) مقدار FN را تخمین می‌زند."""
         if x_data.shape[0] != y_node.shape[0]:
             return np.inf # در صورت عدم تطابق داده، یک پنالتی بزرگ در نظر می‌گیریم
 
+        index = [criterion_name for criterion_name, _ in self.criteria].index(name)
+        misses = self.estimate_misses(x_data, y_node, sorted_idx, indices=[index], sample_weight=sample_weight)[0]
+        rows = np.arange(len(y_node)) if sorted_idx is None else np.sort(sorted_idx[:, 0])
+        return np.inf if misses is None else self._fn_value(misses, rows, sample_weight)
+
+    @staticmethod
+    def _fn_value(misses, rows, sample_weight=None):
+        """تعداد FN یک ماسک (هم‌تراز با rows)؛ با sample_weight مجموع وزن سطرهای FN."""
+        if sample_weight is None:
+            return int(np.sum(misses))
+        return float(np.sum(sample_weight[rows][misses]))
+
+    def _criterion_misses(self, name, func, x_data, y_node, sorted_idx=None, fold=0, sample_weight=None):
+        """ماسک FN درخت موقت یک معیار (یک fold آن)؛ در صورت خطا None برمی‌گرداند."""
         try:
-            criterion_func = dict(self.criteria)[name]
-            metric_obj = SingleCriterionMetric(name, criterion_func)
-            
-            model = CustomDecisionTreeClassifier(max_depth=10, metric=metric_obj)
-            metric_data = y_node.reshape(-1, 1)
-            model.fit(x_data, y_node, metric_data)
-            
-            probas = model.predict_proba(x_data)
-            preds = (probas[:, 1] > 0.5).astype(int) if probas.shape[1] > 1 else np.zeros_like(y_node)
-            
-            fn_count = np.sum((y_node == 1) & (preds == 0))
-            self._fn_cache[cache_key] = fn_count
-            return fn_count
+            metric_obj = SingleCriterionMetric(name, func, self.positive_label, self.categorical_features)
+            return self.fn_estimator.predict_fold_misses(metric_obj, x_data, y_node, self.positive_label,
+                                                         sorted_idx, fold, sample_weight)
         except Exception as e:
-            print(f"[ERROR] در محاسبه FN برای {name}: {e}")
-            return np.inf
+            logger.error("در محاسبه FN برای %s: %s", name, e)
+            return None
 
-    # در کلاس WeightedVotingMetric
+    def release(self):
+        """
+        آزاد کردن داده‌های موقت fit (اثر انگشت دیتاست، Process Pool و حافظه مشترک تخمین موازی
+        FN و ماتریس‌های FN وزن‌دهی گره‌به‌گره).
+        """
+        self._close_pool()
+        self.set_dataset()
+        self._node_misses = None
+        self._node_failed = None
 
-    def update_weights_dynamic(self, x_data, y_node):
+    def set_dataset(self, x_data=None, y_node=None, sample_weight=None, presorted=None):
         """
-        🔥 نسخه نهایی با Softmax 🔥
-        FNها را برای تمام معیارها محاسبه و دیکشنری وزن‌ها را برای گره فعلی به‌روز می‌کند.
+        محاسبه اثر انگشت دیتاست آموزشی (یک بار در هر fit) برای کلیدهای کش FN؛
+        با فراخوانی بدون آرگومان پاک می‌شود. وزن نمونه‌ها هم جزء اثر انگشت است.
+        presorted (PresortedDataset همین داده) منبع اندیس‌های مرتب تخمین FN است تا درخت‌های
+        موقت و foldها داده را دوباره مرتب نکنند.
         """
-        if len(x_data) < 2:
-            return self.weights_dict 
+        self._close_pool()
+        self._presorted = presorted
+        if x_data is None:
+            self._dataset_key = None
+        else:
+            if not isinstance(x_data, SparseMatrix):
+                x_data = np.asarray(x_data, dtype=float)
+            self._dataset_key = (x_data, y_node, sample_weight, self._fingerprint(x_data, y_node, sample_weight))
+
+    def _is_fit_data(self, x_data, y_node, sample_weight):
+        """آیا (x_data, y_node, sample_weight) همان اشیای داده fit جاری (set_dataset) هستند."""
+        if self._dataset_key is None:
+            return False
+        fit_x, fit_y, fit_weight, _ = self._dataset_key
+        return x_data is fit_x and y_node is fit_y and sample_weight is fit_weight
+
+    def _fit_pool(self, x_data, y_node, sample_weight):
+        """
+        Process Pool تخمین موازی FN برای داده fit جاری (همان PresortedDataset)
 
-        fn_values = np.array([self.estimate_fn_for_criterion(name, x_data, y_node) for name, _ in self.criteria], dtype=float)
-        print(f"  FNs calculated: {dict(zip([c[0] for c in self.criteria], fn_values))}")
+        pool و آرایه‌های حافظه مشترک آن (X، y، وزن سطرها و اندیس‌های مرتب کل داده) در اولین
+        تخمین موازی fit ساخته می‌شوند و تا release باقی می‌مانند؛ برای داده دیگر None است.
+        """
+        data = self._presorted
+        if data is None or not self._is_fit_data(x_data, y_node, sample_weight):
+            return None
+        if self._pool is None:
+            n_workers = resolve_n_jobs(self.n_jobs, len(self.criteria) * self.fn_estimator.n_folds)
+            stack = ExitStack()
+            try:
+                handles = stack.enter_context(shared_arrays(**_shared_fn_arrays(x_data, y_node, data.sorted_idx,
+                                                                                sample_weight)))
+                pool = stack.enter_context(shared_process_pool(n_workers, handles))
+            except BaseException:
+                stack.close()
+                raise
+            self._pool = (pool, handles, stack)
+        return self._pool
+
+    def _close_pool(self):
+        if self._pool is not None:
+            self._pool, (_, _, stack) = None, self._pool
+            stack.close()
+
+    @staticmethod
+    def _fingerprint(x_data, y_node, sample_weight=None):
+        # برای داده sparse اثر انگشت از روی آرایه‌های فشرده (نه ماتریس چگال) ساخته می‌شود
+        x_arrays = (x_data.indptr, x_data.indices, x_data.data) if isinstance(x_data, SparseMatrix) else (x_data,)
+        arrays = x_arrays + (np.asarray(y_node),) + (() if sample_weight is None else (sample_weight,))
+        return array_fingerprint(*arrays)
+
+    def _sorted_idx(self, x_data):
+        """اندیس‌های مرتب x_data؛ برای داده fit جاری از PresortedDataset آن خوانده می‌شوند."""
+        if self._presorted is not None and x_data is self._presorted.X:
+            return self._presorted.sorted_idx
+        return argsort_columns(x_data)
+
+    def _dataset_fingerprint(self, x_data, y_node, sample_weight=None):
+        # اثر انگشت fit فقط برای خود داده fit استفاده می‌شود؛ ماتریس دیگری با همان شکل
+        # نباید ماسک‌های FN دیتاست دیگری را بگیرد
+        if self._is_fit_data(x_data, y_node, sample_weight):
+            return self._dataset_key[3]
+        return self._fingerprint(x_data, y_node, sample_weight)
+
+    def _fn_cache_key(self, name, func, data_fp, rows_fp):
+        func_id = f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}"
+        parts = (data_fp, rows_fp, name, func_id, repr(self.fn_estimator), self.positive_label)
+        if self.categorical_features is not None:
+            # درخت‌های موقت با تقسیم دسته‌ای ماسک دیگری می‌دهند
+            parts += (list(self.categorical_features),)
+        return FNCache.make_key(*parts)
+
+    def estimate_misses(self, x_data, y_node, sorted_idx=None, indices=None, sample_weight=None):
+        """
+        ماسک FN درخت موقت معیارها (به ترتیب self.criteria یا اندیس‌های indices)
+
+        - نتایج از کش FN خوانده می‌شوند؛ کلید آن اثر انگشت سطرهای گره است، نه داده گره
+        - اگر n_jobs بیشتر از یک باشد، تخمین‌های باقی‌مانده (که مستقل از هم هستند) بین
+          پردازه‌های یک Process Pool پخش می‌شوند و نتایج به همان ترتیب معیارها جمع‌آوری
+          می‌شوند، پس خروجی با اجرای ترتیبی یکسان است. برای داده fit جاری pool و حافظه
+          مشترک (X، y و اندیس‌های مرتب کل داده) یک بار در هر fit ساخته می‌شوند و هر کار فقط
+          شماره سطرهای گره را می‌فرستد؛ کارگر اندیس‌های مرتب گره را از اندیس‌های کل داده
+          فیلتر می‌کند.
+        - برای تخمین‌گرهای چند-fold (مثل "kfold") هر (معیار، fold) یک کار جداست و ماسک
+          foldهای هر معیار با OR ترکیب می‌شود.
+        - با sample_weight درخت‌های موقت روی شمارش‌های وزنی ساخته می‌شوند
+        """
+        if indices is None:
+            indices = range(len(self.criteria))
+        indices = list(indices)
+        if not indices:
+            return []
+        if not isinstance(x_data, SparseMatrix):
+            x_data = np.asarray(x_data, dtype=float)
+        rows = np.arange(len(y_node)) if sorted_idx is None else np.sort(sorted_idx[:, 0])
+        data_fp = self._dataset_fingerprint(x_data, y_node, sample_weight)
+        rows_fp = rows_fingerprint(rows, len(y_node))
+        keys = [self._fn_cache_key(*self.criteria[i], data_fp, rows_fp) for i in indices]
+        results = [self.fn_cache.get(key) for key in keys]
+        todo = [k for k, misses in enumerate(results) if misses is None]
+        if not todo:
+            return results
+
+        if sorted_idx is None:
+            sorted_idx = self._sorted_idx(x_data)
+        n_folds = self.fn_estimator.n_folds
+        tasks = [(*self.criteria[indices[k]], self.fn_estimator, self.positive_label, self.categorical_features,
+                  fold) for k in todo for fold in range(n_folds)]
+        n_workers = resolve_n_jobs(self.n_jobs, len(tasks))
+        fit_pool = self._fit_pool(x_data, y_node, sample_weight) if n_workers > 1 else None
+        with self.stats.timer("fn_estimation"):
+            if n_workers == 1:
+                parts = [self._criterion_misses(name, func, x_data, y_node, sorted_idx, fold, sample_weight)
+                         for name, func, _, _, _, fold in tasks]
+            elif fit_pool is not None:
+                pool, handles, _ = fit_pool
+                node_rows = None if sorted_idx is self._presorted.sorted_idx else rows
+                parts = list(pool.map(_estimate_misses_task, tasks, [handles] * len(tasks),
+                                      [node_rows] * len(tasks)))
+            else:
+                with shared_arrays(**_shared_fn_arrays(x_data, y_node, sorted_idx, sample_weight)) as handles:
+                    with shared_process_pool(n_workers, handles) as pool:
+                        parts = list(pool.map(_estimate_misses_task, tasks, [handles] * len(tasks)))
+        self.stats.count("fn_estimates", len(tasks))
+
+        computed = []
+        for j in range(len(todo)):
+            folds = parts[j * n_folds:(j + 1) * n_folds]
+            computed.append(None if any(misses is None for misses in folds) else np.logical_or.reduce(folds))
+
+        for k, misses in zip(todo, computed):
+            results[k] = misses
+            if misses is not None:
+                self.fn_cache.put(keys[k], misses)
+        return results
+
+    def estimate_fn_values(self, x_data, y_node, sample_weight=None):
+        """
+        FN همه معیارها را به ترتیب self.criteria برمی‌گرداند (با استفاده از کش)؛ با
+        sample_weight هر FN مجموع وزن سطرهای مثبتی است که منفی پیش‌بینی شده‌اند.
+        """
+        if x_data.shape[0] != y_node.shape[0]:
+            return [np.inf] * len(self.criteria)
+        rows = np.arange(len(y_node))
+        return [np.inf if misses is None else self._fn_value(misses, rows, sample_weight)
+                for misses in self.estimate_misses(x_data, y_node, sample_weight=sample_weight)]
 
+    def weights_from_fn(self, fn_values):
+        """تبدیل FN معیارها به وزن با Softmax روی -FN."""
         # ===== بخش کلیدی: محاسبه وزن با Softmax =====
 
         # پارامتر دما (قابل تنظیم)
@@ -135,7 +329,7 @@ class WeightedVotingMetric(MetricBase):
 
         # برای جلوگیری از مقادیر بی‌نهایت در تابع نمایی (exp)، امتیازها را شیفت می‌دهیم.
         # این یک تکنیک استاندارد برای پایداری عددی Softmax است و روی نتیجه نهایی تأثیری ندارد.
-        scores = -fn_values  # FN کمتر، امتیاز بالاتر
+        scores = -np.asarray(fn_values, dtype=float)  # FN کمتر، امتیاز بالاتر
         scores -= np.max(scores) # شیفت دادن برای پایداری
 
         # محاسبه Softmax
@@ -151,61 +345,126 @@ class WeightedVotingMetric(MetricBase):
             normalized_weights = np.full(num_criteria, 1.0 / num_criteria)
         
         # ============================================
-        
+        return normalized_weights
+
+    def update_weights_dynamic(self, x_data, y_node, sample_weight=None):
+        """
+        🔥 نسخه نهایی با Softmax 🔥
+        FNها را برای تمام معیارها محاسبه و دیکشنری وزن‌ها را برای گره فعلی به‌روز می‌کند.
+        """
+        if len(x_data) < 2:
+            return self.weights_dict 
+
+        fn_values = np.array(self.estimate_fn_values(x_data, y_node, sample_weight), dtype=float)
+        logger.debug("FNs calculated: %s", dict(zip([c[0] for c in self.criteria], fn_values)))
+
+        normalized_weights = self.weights_from_fn(fn_values)
         self.weights_dict = {name: weight for (name, _), weight in zip(self.criteria, normalized_weights)}
-        print(f"  New weights set (using Softmax): {self.weights_dict}")
+        logger.debug("New weights set (using Softmax): %s", self.weights_dict)
         return self.weights_dict
 
+    # ------------------------------------------------------------
+    # وزن‌دهی گره‌به‌گره (weighting="node")
+    # ------------------------------------------------------------
+    def start_node_weighting(self, x_data, y_node, sorted_idx, sample_weight=None):
+        """
+        آماده‌سازی وزن‌دهی گره‌به‌گره در ریشه: ماسک FN درخت موقت هر معیار برای همه
+        سطرها یک بار محاسبه و در ماتریس (تعداد سطر × تعداد معیار) نگهداری می‌شود.
+        FN هر گره بعداً فقط با جمع (وزنی) همین ماتریس روی سطرهای گره به دست می‌آید.
+        """
+        self._node_misses = np.zeros((len(y_node), len(self.criteria)), dtype=bool)
+        self._node_failed = np.zeros((len(y_node), len(self.criteria)), dtype=bool)
+        self._refresh_node_misses(x_data, y_node, sorted_idx, sample_weight)
+
+    def _refresh_node_misses(self, x_data, y_node, node_sorted, sample_weight=None):
+        """محاسبه دوباره ماسک FN معیارها روی سطرهای یک گره (با اندیس‌های مرتب همان گره)."""
+        rows = np.sort(node_sorted[:, 0])
+        node_misses = self.estimate_misses(x_data, y_node, node_sorted, sample_weight=sample_weight)
+        for j, misses in enumerate(node_misses):
+            self._node_failed[rows, j] = misses is None
+            self._node_misses[rows, j] = False if misses is None else misses
+
+    def update_node_weights(self, x_data, y_node, node_sorted, depth, sample_weight=None):
+        """
+        وزن معیارها برای یک گره از روی زیرمجموعه سطرهای همان گره
+
+        - به صورت پیش‌فرض ماسک FN گره پدر (که در ریشه ساخته شده) روی سطرهای گره جمع
+          زده می‌شود و هیچ درخت موقتی دوباره ساخته نمی‌شود
+        - اگر node_refit_every تنظیم شده باشد، در عمق‌های مضرب آن درخت‌های موقت روی
+          سطرهای همین گره (با اندیس‌های مرتب آن و بدون مرتب‌سازی دوباره) آموزش داده
+          می‌شوند و ماسک زیردرخت این گره جایگزین می‌شود
+
+        Returns:
+        np.ndarray
+            وزن‌های معیارها به ترتیب self.criteria
+        """
+        if (self.node_refit_every and depth > 0 and depth % self.node_refit_every == 0
+                and node_sorted.shape[0] >= 2):
+            self._refresh_node_misses(x_data, y_node, node_sorted, sample_weight)
+
+        rows = node_sorted[:, 0]
+        if sample_weight is None:
+            fn_values = self._node_misses[rows].sum(axis=0).astype(float)
+        else:
+            fn_values = sample_weight[rows] @ self._node_misses[rows]
+        fn_values[self._node_failed[rows].any(axis=0)] = np.inf
+        normalized_weights = self.weights_from_fn(fn_values)
+        self.weights_dict = {name: weight for (name, _), weight in zip(self.criteria, normalized_weights)}
+        return normalized_weights
+
 
 
 # ================================================================
 # 🔥 بلوک نهایی کد برای کلاس WeightedVotingMetric 🔥
 # ================================================================
 
-    def evaluate(self, y_left, y_right, split_info=None):
+    def evaluate(self, y_left, y_right, split_info=None, sample_weight_left=None, sample_weight_right=None):
         """
         نسخه نهایی: امتیاز نهایی یک تقسیم را با نرمال‌سازی امتیازات معیارها (Min-Max) و سپس
-        اعمال میانگین وزنی، محاسبه می‌کند.
+        اعمال میانگین وزنی، محاسبه می‌کند. با وزن نمونه‌های دو شاخه، همه معیارها روی
+        شمارش‌های وزنی کلاس‌ها امتیاز می‌دهند.
         """
+        self.stats.count("evaluate")
         if len(y_left) == 0 or len(y_right) == 0:
             return 0.0
 
         # اگر به هر دلیلی وزن‌ها محاسبه نشده باشند، از وزن مساوی استفاده کن
         if not self.weights_dict:
-            print("[WARNING] `evaluate` فراخوانی شد در حالی که وزن‌ها تنظیم نشده بودند. استفاده از وزن مساوی.")
+            logger.warning("`evaluate` فراخوانی شد در حالی که وزن‌ها تنظیم نشده بودند. استفاده از وزن مساوی.")
             self.weights_dict = {name: 1.0 / len(self.criteria) for name, _ in self.criteria}
         
-        # ۱. محاسبه امتیاز خام برای هر معیار با فراخوانی مستقیم تابع آن
-        raw_scores = []
-        for name, func in self.criteria:
-            try:
-                # امتیازدهی مستقیم توسط خود تابع معیار
-                raw_scores.append(float(func(y_left, y_right)))
-            except Exception:
-                raw_scores.append(0.0)
-
-        # ۲. نرمال‌سازی امتیازات به بازه [0, 1] برای مقایسه عادلانه (Min-Max Scaling)
-        scores_np = np.array(raw_scores)
-        min_score, max_score = np.min(scores_np), np.max(scores_np)
-        
-        # جلوگیری از تقسیم بر صفر اگر همه امتیازات یکسان باشند
-        if (max_score - min_score) > 1e-9:
-            normalized_scores = (scores_np - min_score) / (max_score - min_score)
-        else:
-            # اگر همه امتیازات یکسان بودند، همه نرمالایز شده‌ها 0.5 می‌شوند
-            normalized_scores = np.full_like(scores_np, 0.5)
+        # ۱. ساخت هیستوگرام کلاس‌ها فقط یک بار؛ امتیاز خام همه معیارها، نرمال‌سازی Min-Max و
+        # میانگین وزنی در یک مسیر برداری (score_candidates) روی همین یک کاندید محاسبه می‌شوند.
+        # معیارهایی که هسته شمارش‌محور ندارند، همچنان با برچسب‌های خام فراخوانی می‌شوند.
+        weights = ()
+        if sample_weight_left is not None or sample_weight_right is not None:
+            weights = (sample_weight_left, sample_weight_right)
+        _, left_counts, right_counts = class_counts(y_left, y_right, self.classes, *weights)
+        criterion_weights = [self.weights_dict.get(name, 0.0) for name, _ in self.criteria]
+        weighted_score = score_candidates(self.criteria, criterion_weights, left_counts[None], right_counts[None],
+                                          lambda t: (y_left, y_right, *weights))[0]
+        return float(weighted_score)
 
-        # ۳. خواندن وزن‌های از پیش محاسبه شده
-        weights = np.array([self.weights_dict.get(name, 0.0) for name, _ in self.criteria])
+    def evaluate_counts(self, left_counts, right_counts, label_splits=None):
+        """
+        نسخه برداری evaluate: امتیاز وزنی همه تقسیم‌های کاندید را از روی ماتریس‌های
+        (تعداد کاندید × تعداد کلاس) شمارش کلاس، بدون فراخوانی جداگانه برای هر کاندید محاسبه می‌کند.
+        """
+        if not self.weights_dict:
+            logger.warning("`evaluate_counts` فراخوانی شد در حالی که وزن‌ها تنظیم نشده بودند. استفاده از وزن مساوی.")
+            self.weights_dict = {name: 1.0 / len(self.criteria) for name, _ in self.criteria}
 
-        # ۴. محاسبه امتیاز نهایی با استفاده از امتیازات نرمالایز شده
-        if weights.sum() > 0:
-            # np.dot حاصلضرب داخلی دو بردار را محاسبه می‌کند که همان میانگین وزنی است
-            weighted_score = np.dot(normalized_scores, weights)
-        else:
-            weighted_score = np.mean(normalized_scores) if len(normalized_scores) > 0 else 0.0
-            
-        return float(weighted_score)
+        self.stats.count("evaluate_counts")
+        self.stats.count("candidates_scored", len(left_counts))
+        weights = [self.weights_dict.get(name, 0.0) for name, _ in self.criteria]
+        return score_candidates(self.criteria, weights, left_counts, right_counts, label_splits, self.stats)
+
+    def sweep_feature(self, values, y, sample_weight=None):
+        """
+        همه آستانه‌های یک ویژگی را با یک بار مرتب‌سازی و ماتریس‌های تجمعی شمارش کلاس
+        امتیازدهی می‌کند و (thresholds, scores) برمی‌گرداند.
+        """
+        return sweep_feature(self, values, y, self.classes, sample_weight)
 
 
     def compute_metric(self, metric_data: np.ndarray) -> float:
@@ -218,25 +477,63 @@ class WeightedVotingMetric(MetricBase):
         return 0.0
 
 
-    def compute_delta(self, split: np.ndarray, metric_data: np.ndarray) -> float:
+    def compute_delta(self, split: np.ndarray, metric_data: np.ndarray, sample_weight=None) -> float:
         """
         این متد به درستی وظیفه تقسیم داده‌ها را انجام داده و سپس `evaluate` را
-        برای محاسبه امتیاز نهایی فراخوانی می‌کند.
+        برای محاسبه امتیاز نهایی فراخوانی می‌کند. sample_weight (هم‌تراز با metric_data)
+        همراه برچسب‌ها بین دو شاخه تقسیم می‌شود.
         """
+        self.stats.count("compute_delta")
         y = metric_data[:, 0] if metric_data.ndim > 1 else metric_data
         
-        if split.dtype == bool:
-            y_left, y_right = y[split], y[~split]
-        else:
-            mask = np.ones(len(y), dtype=bool)
-            mask[split] = False
-            y_left, y_right = y[split], y[mask]
+        left_mask = _split_mask(split, len(y))
+        weights = () if sample_weight is None else (sample_weight[left_mask], sample_weight[~left_mask])
             
         # فراخوانی متد evaluate نهایی و اصلاح شده
-        return self.evaluate(y_left, y_right)
+        return self.evaluate(y[left_mask], y[~left_mask], None, *weights)
 
 
 
+def _shared_fn_arrays(x_data, y_node, sorted_idx, sample_weight=None):
+    """آرایه‌هایی از داده که برای تخمین موازی FN در حافظه مشترک قرار می‌گیرند."""
+    arrays = dict(y=np.asarray(y_node), sorted_idx=sorted_idx)
+    if isinstance(x_data, SparseColumns):
+        # آرایه‌های فشرده ماتریس sparse جداگانه به اشتراک گذاشته می‌شوند
+        arrays.update({f"x_{name}": array for name, array in x_data.to_arrays().items()})
+    else:
+        arrays["x"] = x_data
+    if sample_weight is not None:
+        arrays["sample_weight"] = sample_weight
+    return arrays
+
+
+def _estimate_misses_task(task, handles, node_rows=None):
+    """
+    کار هر پردازه کارگر در تخمین موازی FN: X، y و اندیس‌های مرتب از حافظه مشترک خوانده می‌شوند.
+    اگر node_rows (سطرهای یک گره) داده شود، اندیس‌های مرتب گره از اندیس‌های کل داده فیلتر می‌شوند.
+    """
+    name, func, fn_estimator, positive_label, categorical_features, fold = task
+    if "x" in handles:
+        x_data = attach_shared(handles["x"])
+    else:
+        x_data = SparseColumns.from_arrays({key[2:]: attach_shared(handle) for key, handle in handles.items()
+                                            if key.startswith("x_")})
+    y_node = attach_shared(handles["y"])
+    sorted_idx = attach_shared(handles["sorted_idx"])
+    if node_rows is not None:
+        in_node = np.zeros(len(y_node), dtype=bool)
+        in_node[node_rows] = True
+        sorted_idx = partition_sorted(sorted_idx, in_node)[0]
+    sample_weight = attach_shared(handles["sample_weight"]) if "sample_weight" in handles else None
+    try:
+        metric_obj = SingleCriterionMetric(name, func, positive_label, categorical_features)
+        return fn_estimator.predict_fold_misses(metric_obj, x_data, y_node, positive_label, sorted_idx, fold,
+                                                sample_weight)
+    except Exception as e:
+        logger.error("در محاسبه FN برای %s: %s", name, e)
+        return None
+
+
 # ================================================================
 # کلاس ۳: CriterionWrapper (بدون تغییر)
 # ================================================================
@@ -261,101 +558,259 @@ class WeightedDecisionTreeModel:
 # در فایل src/model/weighted_decision_tree.py
 # در کلاس WeightedDecisionTreeModel
 
-    def __init__(self, criteria_funcs_weights=None, positive_label=1, max_depth=5, a=None):
+    def __init__(self, criteria_funcs_weights=None, positive_label=1, max_depth=5, a=None, fn_estimator="full",
+                 n_jobs=None, weighting="root", node_refit_every=None, fn_cache=None, instrumentation=False,
+                 callback=None, max_bins=None, max_features=None, random_state=None, class_weight=None,
+                 split_n_jobs=None, growth="depth", categorical_features=None):
+        """
+        fn_estimator : str یا BaseFNEstimator
+            روش تخمین FN برای وزن‌دهی معیارها: "full" (درخت کامل عمق ۱۰)، "stump"
+            (درخت کم‌عمق)، "subsample" (درخت روی زیرنمونه)، "kfold" (FN خارج از fold) و
+            "holdout" (FN روی سطرهای کنار گذاشته شده) یا یک نمونه از utils.fn_estimators
+        n_jobs : int, optional
+            تعداد پردازه‌ها برای تخمین موازی FN معیارها (None یا 1 = ترتیبی، -1 = همه هسته‌ها)
+        weighting : str
+            "root": وزن معیارها یک بار در ریشه محاسبه و در کل درخت استفاده می‌شود.
+            "node": وزن‌ها در هر گره از روی سطرهای همان گره محاسبه می‌شوند؛ ماسک FN
+            درخت‌های موقت یک بار در ریشه ساخته شده و در گره‌های پایین‌تر فقط روی سطرهای
+            گره جمع زده می‌شود.
+        node_refit_every : int, optional
+            در حالت "node"، درخت‌های موقت هر چند سطح یک بار روی سطرهای گره دوباره آموزش
+            می‌بینند (None یعنی هرگز؛ فقط استفاده افزایشی از آمار گره پدر)
+        fn_cache : None، str یا FNCache
+            کش نتایج FN: None یعنی کش جدید در حافظه، مسیر یک پوشه یعنی کش با لایه دیسکی،
+            و یک نمونه FNCache را می‌توان بین چند مدل (مثلاً در جستجوی ابرپارامتر) مشترک کرد
+        instrumentation : bool، "memory" یا FitStats
+            اندازه‌گیری زمان مراحل fit (weight_init، split_search، criteria:fused برای همه
+            معیارهای داخلی با هم، criterion:<نام> برای معیارهای سفارشی، ...) و
+            شمارنده‌ها (compute_delta، evaluate_counts، ...). پیش‌فرض خاموش است؛ نتیجه در
+            self.stats.summary() قرار می‌گیرد. "memory" به جای زمان‌ها اوج حافظه fit را با
+            tracemalloc اندازه می‌گیرد (که fit را چند برابر کند می‌کند)
+        callback : callable, optional
+            callback(name, seconds) پس از پایان هر بازه زمانی؛ تعیین آن اندازه‌گیری را روشن می‌کند
+        a : ignored
+            فقط برای سازگاری با کدهای قبلی پذیرفته می‌شود؛ مدل کپی داده آموزشی را نگه نمی‌دارد
+        max_bins : int, optional
+            حالت هیستوگرامی: هر ویژگی یک بار به حداکثر max_bins (<= 255) بازه نگاشت می‌شود
+            و فقط مرز بازه‌ها امتیازدهی می‌شود (درخت‌های موقت تخمین FN که از روی نام ساخته
+            می‌شوند هم هیستوگرامی هستند). None یعنی حالت دقیق با همه آستانه‌ها
+        max_features : int، float، "sqrt"، "log2" یا None
+            تعداد ویژگی‌های تصادفی که در هر گره درخت اصلی بررسی می‌شوند (برای جنگل تصادفی)؛
+            درخت‌های موقت تخمین FN همیشه همه ویژگی‌ها را می‌بینند
+        random_state : int, optional
+            بذر انتخاب تصادفی ویژگی‌ها
+        class_weight : "balanced"، dict یا None
+            وزن کلاس‌ها که در وزن نمونه‌ها ضرب می‌شود: "balanced" وزن هر کلاس را
+            n_samples / (n_classes * تعداد نمونه‌های کلاس) می‌گذارد و dict نگاشت برچسب -> وزن
+            است؛ جایگزین تکرار سطرهای کلاس کمیاب پیش از fit
+        split_n_jobs : int, optional
+            تعداد thread ها برای جستجوی موازی تقسیم بین ویژگی‌های هر گره درخت اصلی (None یا
+            1 = ترتیبی، -1 = همه هسته‌ها)؛ درخت حاصل با اجرای ترتیبی یکسان است
+        growth : str
+            "depth" (پیش‌فرض): ساخت عمق-اول گره‌به‌گره. "level": ساخت سطح‌به‌سطح که همه
+            گره‌های یک عمق را با یک آرایه تخصیص سطر به گره با هم هیستوگرام و امتیازدهی
+            می‌کند (برای درخت‌های عمیق سریع‌تر؛ فقط با weighting="root"). تقسیم‌ها در دو حالت
+            یکسان‌اند (با max_features انتخاب تصادفی ویژگی‌ها ترتیب دیگری دارد)
+        categorical_features : list, optional
+            ستون‌های دسته‌ای (اندیس، نام ستون DataFrame یا ماسک بولی) که به جای one-hot با
+            تقسیم چندتایی جستجو می‌شوند: مقادیر هر ستون (عددی یا متنی) در fit به کد دسته‌ها
+            نگاشت می‌شوند (category_encoder)، در هر گره دسته‌ها بر اساس نرخ positive_label
+            مرتب و افرازهای «چند دسته اول به چپ» با همان رای‌گیری وزن‌دار معیارها امتیازدهی
+            می‌شوند. دسته‌هایی که در آموزش دیده نشده‌اند در پیش‌بینی به فرزند راست می‌روند.
+            در حالت هیستوگرامی تعداد دسته‌های هر ستون نباید از max_bins بیشتر باشد
+        """
+        if weighting not in ("root", "node"):
+            raise ValueError(f"weighting باید 'root' یا 'node' باشد، نه {weighting!r}.")
+        if growth == "level" and weighting == "node":
+            raise ValueError("growth='level' فقط با weighting='root' پشتیبانی می‌شود.")
         if criteria_funcs_weights is None:
-            criteria_funcs_weights = [
-                #("gini", gini_criterion), ("gain_ratio", gain_ratio_criterion),
-                ("twoing", twoing_criterion), ("normalized_gain", normalized_gain_criterion),
-                ("multi_class_hellinger", multi_class_hellinger), ("marshall", marsh_criterion),
-                ("g_statistic", g_statistic_criterion), ("dkm", dkm_criterion),
-                ("chi_squared", chi_squared_criterion), ("bhattacharyya", bhattacharyya_criterion),
-                ("kolmogorov_smirnov", kolmogorov_smirnov_criterion),
-            ]
+            criteria_funcs_weights = list(DEFAULT_CRITERIA)
         self.criteria = criteria_funcs_weights
         self.positive_label = positive_label
         
         # 🔥 خط اصلاح شده و بسیار مهم که فراموش شده بود
         self.max_depth = max_depth
         
-        if a is None:
-            raise ValueError("a باید داده ویژگی‌های کامل را به مدل بدهید.")
-        
-        self.a = np.array(a.values) if hasattr(a, "values") else np.array(a)
-        
-        self.metric = WeightedVotingMetric(self.criteria, self.a)
+        # a دیگر لازم نیست و برای جلوگیری از کپی دوباره داده آموزشی نگهداری نمی‌شود
+        self.fn_estimator = fn_estimator
+        self.n_jobs = n_jobs
+        self.weighting = weighting
+        self.node_refit_every = node_refit_every
+        self.max_bins = max_bins
+        self.max_features = max_features
+        self.random_state = random_state
+        self.class_weight = class_weight
+        self.split_n_jobs = split_n_jobs
+        self.growth = growth
+        self.categorical_features = categorical_features
+        self.category_encoder = None
+        self.bin_mapper = None
+        self.feature_names_in_ = None
+        self.n_features_in_ = None
+        self.metric = WeightedVotingMetric(self.criteria, fn_estimator=get_fn_estimator(fn_estimator, max_bins),
+                                           positive_label=positive_label, n_jobs=n_jobs,
+                                           node_refit_every=node_refit_every, fn_cache=fn_cache)
+        self.stats = get_stats(instrumentation, callback)
+        self.metric.stats = self.stats
         self.model = None
 
 
-    def compute_initial_weights(self, X, y):
-        from custom_tree_classifier.models.decision_tree import CustomDecisionTreeClassifier
-
+    def compute_initial_weights(self, X, y, sample_weight=None):
         """وزن‌های اولیه را برای گره ریشه محاسبه می‌کند."""
-        print("[INIT] شروع محاسبه وزن‌های اولیه برای گره ریشه...")
+        logger.debug("شروع محاسبه وزن‌های اولیه برای گره ریشه...")
         # از همان منطق `update_weights_dynamic` استفاده می‌کنیم
-        initial_weights = self.metric.update_weights_dynamic(X, y)
+        initial_weights = self.metric.update_weights_dynamic(X, y, sample_weight)
         self.metric.weights_dict = initial_weights
-        print(f"وزن‌های اولیه تنظیم شد: {initial_weights}")
+        logger.debug("وزن‌های اولیه تنظیم شد: %s", initial_weights)
 
     # در کلاس WeightedDecisionTreeModel
     
 # در فایل src/model/weighted_decision_tree.py
 
-    def fit(self, x, y):
+    def fit(self, x, y=None, sample_weight=None):
         """
         مدل را با استفاده از داده‌های ورودی آموزش می‌دهد.
-        """
-        # 🔥 اصلاحیه ۱: ایمپورت محلی برای شکستن چرخه وابستگی
-        from custom_tree_classifier.models.decision_tree import CustomDecisionTreeClassifier
 
-        # 🔥 اصلاحیه ۲ (بسیار مهم): ساخت مدل در لحظه نیاز
-        # اگر مدل ساخته نشده (None است)، آن را بساز
-        if self.model is None:
-            # در متد __init__ کلاس WeightedDecisionTreeModel
-            #self.model = CustomDecisionTreeClassifier() # درست: یک نمونه از کلاس ساخته‌اید
+        x می‌تواند یک PresortedDataset باشد (در این صورت y و sample_weight از همان خوانده
+        می‌شوند)؛ اندیس‌های مرتب آن بین چند fit، درخت‌های موقت تخمین FN و درخت اصلی مشترک
+        است و داده دوباره مرتب نمی‌شود.
+
+        sample_weight (وزن هر سطر) در class_weight ضرب می‌شود؛ همه شمارش‌های کلاس
+        (امتیاز معیارها، value گره‌ها و درخت‌های موقت تخمین FN) وزنی هستند و FN هر
+        معیار مجموع وزن سطرهای مثبت از دست رفته است. وزن صحیح w برای یک سطر همان
+        نتیجه تکرار w بار آن سطر را می‌دهد.
+
+        x می‌تواند ماتریس scipy.sparse (ترجیحاً CSC) باشد: ماتریس چگال نمی‌شود، غیرصفرهای هر
+        ستون یک بار مرتب می‌شوند و جستجوی تقسیم هر گره فقط غیرصفرها را پیمایش می‌کند (صفرهای
+        ضمنی گره یک بلوک هستند). درخت حاصل با fit روی همان داده چگال یکسان است (با وزن‌های
+        غیرصحیح، از میان تقسیم‌های هم‌امتیاز در حد خطای گرد کردن ممکن است دیگری انتخاب شود).
+        ورودی sparse فقط در حالت دقیق (max_bins=None) با growth="depth" و بدون
+        categorical_features پشتیبانی می‌شود.
+        """
+        self.stats.reset()
+        with self.stats.timer("fit"), self.stats.memory("fit"):
+            try:
+                self._fit(x, y, sample_weight)
+            finally:
+                # ارجاع‌ها به داده آموزشی و ماتریس‌های موقت پس از fit آزاد می‌شوند
+                self.metric.release()
 
-            self.model = CustomDecisionTreeClassifier(
-                max_depth=self.max_depth,
-                metric=self.metric
-            )
-        
+    def _fit(self, x, y, sample_weight=None):
         # مرحله ۱: آماده‌سازی داده‌ها (بدون تغییر)
-        X_fit = x.values if hasattr(x, "values") else x
-        y_fit = y.values if hasattr(y, "values") else y
-        
-        print(f"شروع آموزش مدل - شکل داده: x={X_fit.shape}, y={y_fit.shape}")
+        sparse = is_sparse(x) or (isinstance(x, PresortedDataset) and isinstance(x.X, SparseColumns))
+        if sparse and (self.categorical_features is not None or self.max_bins is not None or self.growth == "level"):
+            raise ValueError("ورودی sparse فقط در حالت دقیق (max_bins=None) با growth='depth' و بدون "
+                             "categorical_features پشتیبانی می‌شود.")
+        if isinstance(x, PresortedDataset):
+            if y is not None or sample_weight is not None:
+                raise ValueError("با PresortedDataset، y و sample_weight از خود داده خوانده می‌شوند.")
+            data = x
+            self.feature_names_in_ = None
+            self.category_encoder = None
+            if self.categorical_features is not None:
+                # نگاشت مقادیر به کد دسته‌ها یکنوا است، پس اندیس‌های مرتب داده معتبر می‌مانند
+                self.category_encoder = CategoryEncoder(self.categorical_features).fit(data.X)
+                data = PresortedDataset(self.category_encoder.transform(data.X), data.y, data.sample_weight,
+                                        data.sorted_idx if data.is_sorted else None)
+        else:
+            self.category_encoder = None
+            if is_sparse(x):
+                # ماتریس چگال نمی‌شود؛ PresortedDataset آن را به SparseColumns تبدیل می‌کند
+                X_fit = x
+            elif self.categorical_features is None:
+                # یک تبدیل به float64؛ اگر ورودی از قبل آرایه float64 باشد کپی ساخته نمی‌شود
+                X_fit = x.values if hasattr(x, "values") else x
+            else:
+                # ستون‌های دسته‌ای (حتی متنی) به کد دسته‌ها و بقیه به float تبدیل می‌شوند
+                self.category_encoder = CategoryEncoder(self.categorical_features)
+                X_fit = self.category_encoder.fit_transform(x)
+            data = PresortedDataset(X_fit, y.values if hasattr(y, "values") else y, sample_weight)
+            # چینش ستون‌های زمان آموزش برای هم‌تراز کردن ورودی‌های پیش‌بینی جریانی
+            self.feature_names_in_ = list(x.columns) if hasattr(x, "columns") else None
+        if self.category_encoder is not None and self.max_bins is not None:
+            too_many = self.category_encoder.n_categories_ > self.max_bins
+            if too_many.any():
+                columns = self.category_encoder.categorical_features_[too_many].tolist()
+                raise ValueError(f"ستون‌های دسته‌ای {columns} "
+                                 f"بیشتر از max_bins={self.max_bins} دسته دارند.")
+        self.metric.categorical_features = (None if self.category_encoder is None
+                                            else self.category_encoder.categorical_features_)
+        X_fit, y_fit = data.X, data.y
+        self.n_features_in_ = X_fit.shape[1]
+
+        logger.info("شروع آموزش مدل - شکل داده: x=%s, y=%s", X_fit.shape, y_fit.shape)
+        self.metric.classes = np.unique(y_fit)
+        sample_weight = compute_sample_weight(self.class_weight, y_fit, data.sample_weight)
+        if sample_weight is not data.sample_weight:
+            data = data.with_sample_weight(sample_weight)
+        self.metric.set_dataset(X_fit, y_fit, sample_weight, presorted=data)
         
-        # مرحله ۲: محاسبه و تنظیم وزن‌های اولیه (بدون تغییر)
-        self.compute_initial_weights(X_fit, y_fit)
+        # مرحله ۲: محاسبه و تنظیم وزن‌های اولیه (در حالت "node" وزن‌ها داخل سازنده درخت و در هر گره محاسبه می‌شوند)
+        if self.weighting == "root":
+            with self.stats.timer("weight_init"):
+                self.compute_initial_weights(X_fit, y_fit, sample_weight)
         
-        # مرحله ۳: آماده‌سازی داده متریک (بدون تغییر)
-        metric_data = y_fit.reshape(-1, 1)
-
- 
-
-        import custom_tree_classifier.models.decision_tree as dt
+        # مرحله ۳: ساخت درخت با موتور داخلی (اندیس‌های از پیش مرتب و امتیازدهی دسته‌ای آستانه‌ها)
+        builder = TreeBuilder(self.metric, max_depth=self.max_depth, node_weighting=self.weighting == "node",
+                              max_bins=self.max_bins, max_features=self.max_features,
+                              random_state=self.random_state, split_n_jobs=self.split_n_jobs,
+                              growth=self.growth)
+        # اندیس‌های مرتب فقط در حالت دقیق یا وزن‌دهی گره‌به‌گره لازم‌اند (همان اندیس‌های تخمین FN)
+        sorted_idx = data.sorted_idx if self.max_bins is None or self.weighting == "node" else None
+        with self.stats.timer("tree_build"):
+            self.model = builder.build(X_fit, y_fit, sorted_idx, sample_weight)
+        self.bin_mapper = builder.bin_mapper
 
-        print("Path of the loaded module:", dt.__file__)
+        if self.weighting == "node":
+            # برای گزارش، وزن‌های گره ریشه در weights_dict قرار می‌گیرند
+            self.metric.weights_dict = {name: weight for (name, _), weight in zip(self.criteria, self.model.node_weights[0])}
 
+        logger.info("آموزش تکمیل شد!")
 
-        # مرحله ۴: فراخوانی fit اصلی کتابخانه (حالا بدون خطا اجرا می‌شود)
-        self.model.fit(X_fit, y_fit, metric_data)
 
+    def predict(self, x, chunk_size=None):
+        """
+        پیش‌بینی کلاس‌ها با پیمایش برداری سطح‌به‌سطح درخت؛ با chunk_size ورودی‌های بزرگ
+        (مثلاً np.memmap) تکه‌تکه پردازش می‌شوند. ماتریس scipy.sparse (ترجیحاً CSR) بدون
+        تبدیل به آرایه چگال پیمایش می‌شود.
+        """
+        probas = self.model.predict_proba(self._feature_matrix(x), chunk_size)
+        return self.model.classes[np.argmax(probas, axis=1)]
 
+    def predict_proba(self, x, chunk_size=None):
+        return self.model.predict_proba(self._feature_matrix(x), chunk_size)
 
-        print("آموزش تکمیل شد!")
-
-
-    def predict(self, x):
-        X_pred = x.values if hasattr(x, "values") else x
-        probas = self.model.predict_proba(X_pred)
-        if probas.shape[1] > 1:
-            return np.argmax(probas, axis=1)
-        else:
-            return (probas[:, 0] > 0.5).astype(int)
+    def _feature_matrix(self, x):
+        """ماتریس ویژگی‌های پیش‌بینی؛ ستون‌های دسته‌ای با category_encoder به کد دسته‌ها تبدیل می‌شوند."""
+        if self.category_encoder is not None:
+            return self.category_encoder.transform(x)
+        return x.values if hasattr(x, "values") else x
 
-    def predict_proba(self, x):
-        X_pred = x.values if hasattr(x, "values") else x
-        return self.model.predict_proba(X_pred)
+    def predict_file(self, input_path, output_path, chunk_size=100_000, max_memory_mb=None, proba=False,
+                     keep_columns=None, **read_kwargs):
+        """
+        پیش‌بینی جریانی یک فایل CSV/Parquet با حافظه محدود (جزئیات در utils.streaming.predict_file).
+        """
+        from utils.streaming import predict_file
+        return predict_file(self, input_path, output_path, chunk_size=chunk_size, max_memory_mb=max_memory_mb,
+                            proba=proba, keep_columns=keep_columns, **read_kwargs)
+
+    def save(self, path):
+        """ذخیره مدل در پوشه path با قالب model.persistence (بدون داده آموزشی)."""
+        from model.persistence import save_model
+        save_model(self, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode="r", criteria=None):
+        """بارگذاری مدل ذخیره شده؛ آرایه‌های درخت به صورت پیش‌فرض memory-map می‌شوند."""
+        from model.persistence import load_model
+        return load_model(path, mmap_mode=mmap_mode, criteria=criteria)
+
+    def export_tree(self):
+        """درخت آموزش‌دیده به صورت آرایه‌های تخت NumPy (feature، threshold، children_left، ...)."""
+        if self.model is None:
+            raise ValueError("مدل هنوز آموزش داده نشده است.")
+        return self.model.to_arrays()
 
 # ================================================================
 # بخش اجرایی (بدون تغییر)
@@ -367,7 +822,7 @@ if __name__ == "__main__":
     X_data, y_data = make_classification(n_samples=100, n_features=10, n_informative=5, n_redundant=0, n_classes=2, random_state=42)
     
     # ساخت و آموزش مدل
-    model = WeightedDecisionTreeModel(a=X_data, max_depth=5)
+    model = WeightedDecisionTreeModel(max_depth=5)
     model.fit(X_data, y_data)
     
     # پیش‌بینی
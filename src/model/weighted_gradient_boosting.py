@@ -0,0 +1,188 @@
+"""
+Gradient Boosting دودویی با قاعده تقسیم رای‌گیری وزن‌دار معیارها
+
+در هر مرحله با تابع زیان log-loss:
+- گرادیان g = p - y و هسیان h = p(1 - p) برای هر سطر محاسبه می‌شود
+- درخت مرحله با WeightedVotingMetric روی شمارش‌های کلاس وزنی ساخته می‌شود: برچسب هر
+  سطر علامت باقی‌مانده (y - p) و وزن آن |g| است؛ یعنی سطرهایی که مدل فعلی بدتر
+  پیش‌بینی می‌کند سهم بیشتری در امتیاز معیارها دارند
+- مقدار برگ‌ها با گام نیوتن -sum(g) / (sum(h) + l2_regularization) تعیین می‌شود
+
+جستجوی تقسیم هیستوگرامی است و داده بازه‌بندی شده (uint8) فقط یک بار ساخته و در همه
+مراحل استفاده می‌شود. وزن معیارها یک بار در ابتدا با تخمین FN محاسبه می‌شود.
+"""
+
+import logging
+import numpy as np
+from model.tree_builder import TreeBuilder
+from model.weighted_decision_tree import DEFAULT_CRITERIA, WeightedVotingMetric
+from utils.binning import BinMapper
+from utils.fn_estimators import get_fn_estimator
+
+logger = logging.getLogger(__name__)
+
+
+def _sigmoid(raw):
+    return 1.0 / (1.0 + np.exp(-np.clip(raw, -500, 500)))
+
+
+def _log_loss(y, raw):
+    # log(1 + exp(raw)) - y * raw به شکل پایدار عددی
+    return float(np.mean(np.logaddexp(0.0, raw) - y * raw))
+
+
+class WeightedGradientBoosting:
+    """
+    Parameters:
+    n_estimators : int
+        حداکثر تعداد مراحل (درخت‌ها)
+    learning_rate : float
+        ضریب کوچک‌سازی سهم هر درخت
+    max_depth : int
+        حداکثر عمق درخت هر مرحله
+    max_bins : int
+        حداکثر تعداد بازه هر ویژگی (<= 255)
+    criteria_funcs_weights : list, optional
+        لیست (نام، تابع) معیارها؛ پیش‌فرض همان معیارهای WeightedDecisionTreeModel
+    positive_label : int
+        برچسب کلاس مثبت؛ داده باید دقیقاً دو کلاس داشته باشد
+    fn_estimator : str یا BaseFNEstimator
+        روش تخمین FN برای وزن معیارها (مانند WeightedDecisionTreeModel)
+    l2_regularization : float
+        جمله منظم‌سازی مخرج گام نیوتن برگ‌ها
+    validation_fraction : float یا None
+        نسبت سطرهایی که برای توقف زودهنگام کنار گذاشته می‌شوند؛ None یعنی بدون توقف زودهنگام
+    n_iter_no_change : int
+        اگر زیان اعتبارسنجی در این تعداد مرحله بیش از tol بهتر نشود آموزش متوقف می‌شود
+    tol : float
+        حداقل بهبود زیان اعتبارسنجی
+    random_state : int, optional
+        بذر انتخاب سطرهای اعتبارسنجی
+    split_n_jobs : int, optional
+        تعداد thread ها برای جستجوی موازی تقسیم بین ویژگی‌های هر گره (مانند TreeBuilder)
+    """
+    def __init__(self, n_estimators=100, learning_rate=0.1, max_depth=3, max_bins=255, criteria_funcs_weights=None,
+                 positive_label=1, fn_estimator="full", l2_regularization=0.0, validation_fraction=0.1,
+                 n_iter_no_change=10, tol=1e-7, random_state=None, split_n_jobs=None):
+        self.n_estimators = n_estimators
+        self.learning_rate = learning_rate
+        self.max_depth = max_depth
+        self.max_bins = max_bins
+        self.criteria = list(DEFAULT_CRITERIA) if criteria_funcs_weights is None else criteria_funcs_weights
+        self.positive_label = positive_label
+        self.fn_estimator = fn_estimator
+        self.l2_regularization = l2_regularization
+        self.validation_fraction = validation_fraction
+        self.n_iter_no_change = n_iter_no_change
+        self.tol = tol
+        self.random_state = random_state
+        self.split_n_jobs = split_n_jobs
+        self.estimators_ = []
+        self.leaf_values_ = []
+        self.init_score_ = 0.0
+        self.train_score_ = []
+        self.validation_score_ = []
+        self.weights_dict = {}
+        self.classes_ = None
+        self.bin_mapper_ = None
+        self.feature_names_in_ = None
+        self.n_features_in_ = None
+
+    def fit(self, x, y):
+        X_fit = np.asarray(x.values if hasattr(x, "values") else x, dtype=float)
+        y_fit = np.asarray(y.values if hasattr(y, "values") else y)
+        if np.any(np.isnan(X_fit)):
+            raise ValueError("ورودی X شامل مقادیر NaN است.")
+        self.classes_ = np.unique(y_fit)
+        if len(self.classes_) != 2 or self.positive_label not in self.classes_:
+            raise ValueError("Gradient Boosting فقط برای دو کلاس که یکی از آن‌ها positive_label است پشتیبانی می‌شود.")
+        self.feature_names_in_ = list(x.columns) if hasattr(x, "columns") else None
+        self.n_features_in_ = X_fit.shape[1]
+        y01 = (y_fit == self.positive_label).astype(np.intp)
+
+        X_train, y_train, X_val, y_val = X_fit, y01, None, None
+        early_stopping = bool(self.validation_fraction) and self.n_iter_no_change
+        if early_stopping:
+            order = np.random.default_rng(self.random_state).permutation(len(y01))
+            n_val = max(1, int(self.validation_fraction * len(y01)))
+            X_val, y_val = X_fit[order[:n_val]], y01[order[:n_val]]
+            X_train, y_train = X_fit[order[n_val:]], y01[order[n_val:]]
+
+        # بازه‌بندی فقط یک بار و برای همه مراحل
+        self.bin_mapper_ = BinMapper(self.max_bins).fit(X_train)
+        X_binned = self.bin_mapper_.transform(X_train)
+
+        metric = WeightedVotingMetric(self.criteria, fn_estimator=get_fn_estimator(self.fn_estimator, self.max_bins),
+                                      positive_label=1)
+        metric.classes = np.array([0, 1])
+        self.weights_dict = dict(metric.update_weights_dynamic(X_train, y_train))
+        metric.release()
+        builder = TreeBuilder(metric, max_depth=self.max_depth, bin_mapper=self.bin_mapper_,
+                              split_n_jobs=self.split_n_jobs)
+
+        positive_rate = np.clip(y_train.mean(), 1e-12, 1 - 1e-12)
+        self.init_score_ = float(np.log(positive_rate / (1 - positive_rate)))
+        raw = np.full(len(y_train), self.init_score_)
+        raw_val = None if X_val is None else np.full(len(y_val), self.init_score_)
+        self.estimators_, self.leaf_values_ = [], []
+        self.train_score_, self.validation_score_ = [], []
+        best_loss, best_n = np.inf, 0
+
+        for stage in range(self.n_estimators):
+            proba = _sigmoid(raw)
+            gradient = proba - y_train
+            hessian = proba * (1 - proba)
+            # برچسب = علامت باقی‌مانده (برابر y)، وزن = |g|
+            tree = builder.build(X_train, y_train, sample_weight=np.abs(gradient), X_binned=X_binned)
+
+            leaves = tree.apply(X_train)
+            sum_gradient = np.bincount(leaves, gradient, minlength=tree.node_count)
+            sum_hessian = np.bincount(leaves, hessian, minlength=tree.node_count) + self.l2_regularization
+            leaf_values = np.divide(-sum_gradient, sum_hessian, out=np.zeros(tree.node_count), where=sum_hessian > 0)
+
+            raw += self.learning_rate * leaf_values[leaves]
+            self.estimators_.append(tree)
+            self.leaf_values_.append(leaf_values)
+            self.train_score_.append(_log_loss(y_train, raw))
+
+            if early_stopping:
+                raw_val += self.learning_rate * leaf_values[tree.apply(X_val)]
+                loss = _log_loss(y_val, raw_val)
+                self.validation_score_.append(loss)
+                if loss < best_loss - self.tol:
+                    best_loss, best_n = loss, stage + 1
+                elif stage + 1 - best_n >= self.n_iter_no_change:
+                    logger.info("توقف زودهنگام در مرحله %d (بهترین: %d)", stage + 1, best_n)
+                    break
+
+        if early_stopping:
+            # مراحل بعد از بهترین زیان اعتبارسنجی کنار گذاشته می‌شوند
+            self.estimators_ = self.estimators_[:best_n]
+            self.leaf_values_ = self.leaf_values_[:best_n]
+        return self
+
+    @property
+    def n_iter_(self):
+        return len(self.estimators_)
+
+    def decision_function(self, x, chunk_size=None):
+        """امتیاز خام (log-odds کلاس مثبت)."""
+        if self.classes_ is None:
+            raise ValueError("مدل هنوز آموزش داده نشده است.")
+        X_pred = x.values if hasattr(x, "values") else x
+        raw = np.full(X_pred.shape[0], self.init_score_)
+        for tree, leaf_values in zip(self.estimators_, self.leaf_values_):
+            raw += self.learning_rate * leaf_values[tree.apply(X_pred, chunk_size)]
+        return raw
+
+    def predict_proba(self, x, chunk_size=None):
+        """احتمال هر کلاس (ستون‌ها به ترتیب classes_)."""
+        positive = _sigmoid(self.decision_function(x, chunk_size))
+        proba = np.empty((len(positive), 2))
+        positive_column = int(np.nonzero(self.classes_ == self.positive_label)[0][0])
+        proba[:, positive_column] = positive
+        proba[:, 1 - positive_column] = 1 - positive
+        return proba
+
+    def predict(self, x, chunk_size=None):
+        return self.classes_[np.argmax(self.predict_proba(x, chunk_size), axis=1)]
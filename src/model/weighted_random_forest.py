@@ -0,0 +1,169 @@
+"""
+جنگل تصادفی از درخت‌های WeightedDecisionTreeModel
+
+هر درخت روی یک نمونه bootstrap از سطرها و با انتخاب تصادفی ویژگی‌ها در هر گره
+(max_features) آموزش می‌بیند و وزن معیارهای خودش را از روی همان نمونه محاسبه می‌کند.
+نمونه bootstrap کپی نمی‌شود: تعداد تکرار هر سطر (صفر برای سطرهای بیرون از نمونه) وزن آن
+سطر روی همان X و همان اندیس‌های مرتب مشترک است.
+درخت‌ها در صورت n_jobs > 1 در یک Process Pool آموزش می‌بینند؛ X و y یک بار در حافظه
+مشترک قرار می‌گیرند و هر کارگر فقط خروجی تخت درخت (Tree.to_arrays) را برمی‌گرداند.
+پیش‌بینی میانگین احتمال‌های درخت‌های تخت است.
+"""
+
+import logging
+import numpy as np
+from model.tree_builder import Tree
+from model.weighted_decision_tree import WeightedDecisionTreeModel
+from utils.class_weight import class_weights, compute_sample_weight
+from utils.parallel import attach_shared, resolve_n_jobs, shared_arrays, shared_process_pool
+from utils.presorted import PresortedDataset
+
+logger = logging.getLogger(__name__)
+
+
+class WeightedRandomForest:
+    """
+    Parameters:
+    n_estimators : int
+        تعداد درخت‌ها
+    criteria_funcs_weights : list, optional
+        لیست (نام، تابع) معیارها؛ پیش‌فرض همان معیارهای WeightedDecisionTreeModel
+    positive_label : int
+        برچسب کلاس مثبت برای تخمین FN
+    max_depth : int
+        حداکثر عمق هر درخت
+    max_features : int، float، "sqrt"، "log2" یا None
+        تعداد ویژگی‌های تصادفی که در هر گره بررسی می‌شوند
+    bootstrap : bool
+        اگر False باشد همه درخت‌ها روی کل سطرها آموزش می‌بینند (فقط ویژگی‌ها تصادفی‌اند)
+    fn_estimator, weighting, max_bins, class_weight :
+        مانند WeightedDecisionTreeModel و برای هر درخت جداگانه (class_weight="balanced"
+        روی نمونه bootstrap هر درخت محاسبه می‌شود)
+    n_jobs : int, optional
+        تعداد پردازه‌ها برای آموزش موازی درخت‌ها (None یا 1 = ترتیبی، -1 = همه هسته‌ها)
+    random_state : int, optional
+        بذر نمونه‌گیری؛ نتیجه مستقل از n_jobs است
+    """
+    def __init__(self, n_estimators=100, criteria_funcs_weights=None, positive_label=1, max_depth=5,
+                 max_features="sqrt", bootstrap=True, fn_estimator="full", weighting="root", max_bins=None,
+                 n_jobs=None, random_state=None, class_weight=None):
+        self.n_estimators = n_estimators
+        self.criteria_funcs_weights = criteria_funcs_weights
+        self.positive_label = positive_label
+        self.max_depth = max_depth
+        self.max_features = max_features
+        self.bootstrap = bootstrap
+        self.fn_estimator = fn_estimator
+        self.weighting = weighting
+        self.max_bins = max_bins
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.class_weight = class_weight
+        self.estimators_ = []
+        self.weights_ = []
+        self.classes_ = None
+        self.feature_names_in_ = None
+        self.n_features_in_ = None
+
+    def _tree_params(self):
+        return {
+            "criteria_funcs_weights": self.criteria_funcs_weights,
+            "positive_label": self.positive_label,
+            "max_depth": self.max_depth,
+            "fn_estimator": self.fn_estimator,
+            "weighting": self.weighting,
+            "max_bins": self.max_bins,
+            "max_features": self.max_features,
+            "class_weight": self.class_weight,
+        }
+
+    def fit(self, x, y, sample_weight=None):
+        """sample_weight (وزن هر سطر) همراه سطرهای نمونه bootstrap به هر درخت داده می‌شود."""
+        X_fit = np.asarray(x.values if hasattr(x, "values") else x, dtype=float)
+        y_fit = np.asarray(y.values if hasattr(y, "values") else y)
+        if np.any(np.isnan(X_fit)):
+            raise ValueError("ورودی X شامل مقادیر NaN است.")
+        self.feature_names_in_ = list(x.columns) if hasattr(x, "columns") else None
+        self.n_features_in_ = X_fit.shape[1]
+        self.classes_ = np.unique(y_fit)
+        # درخت‌ها روی کد کلاس‌ها آموزش می‌بینند تا y (حتی متنی) در حافظه مشترک قرار بگیرد
+        y_codes = np.searchsorted(self.classes_, y_fit)
+        sample_weight = compute_sample_weight(None, y_fit, sample_weight)
+        positive = np.nonzero(self.classes_ == self.positive_label)[0]
+        class_weight = self.class_weight
+        if isinstance(class_weight, dict):
+            # درخت‌ها روی کد کلاس‌ها آموزش می‌بینند
+            class_weight = {code: class_weight.get(label, 1.0) for code, label in enumerate(self.classes_)}
+        params = dict(self._tree_params(), positive_label=int(positive[0]) if len(positive) else -1,
+                      class_weight=None if self.bootstrap else class_weight)
+
+        # بذر هر درخت از پیش تعیین می‌شود تا نتیجه به ترتیب اجرای کارها بستگی نداشته باشد
+        seeds = np.random.SeedSequence(self.random_state).generate_state(self.n_estimators)
+        tasks = [(int(seed), self.bootstrap, class_weight, params) for seed in seeds]
+        n_workers = resolve_n_jobs(self.n_jobs, len(tasks))
+        logger.info("آموزش %d درخت با %d پردازه - شکل داده: %s", len(tasks), n_workers, X_fit.shape)
+
+        # اندیس‌های مرتب یک بار برای کل داده ساخته می‌شوند و همه درخت‌ها (با وزن نمونه
+        # bootstrap خودشان) از همین اندیس‌ها استفاده می‌کنند؛ هیچ درختی داده را کپی یا مرتب نمی‌کند
+        data = PresortedDataset(X_fit, y_codes, sample_weight)
+        if n_workers == 1:
+            results = [_fit_tree(data, *task) for task in tasks]
+        else:
+            arrays = dict(x=X_fit, y=y_codes, sorted_idx=data.sorted_idx)
+            if sample_weight is not None:
+                arrays["sample_weight"] = sample_weight
+            with shared_arrays(**arrays) as handles:
+                with shared_process_pool(n_workers, handles) as pool:
+                    results = list(pool.map(_fit_tree_task, tasks, [handles] * len(tasks)))
+
+        self.estimators_ = [Tree.from_arrays(arrays) for arrays, _ in results]
+        self.weights_ = [weights for _, weights in results]
+        return self
+
+    def predict_proba(self, x, chunk_size=None):
+        """میانگین احتمال کلاس‌ها روی همه درخت‌ها (ستون‌ها به ترتیب classes_)."""
+        if not self.estimators_:
+            raise ValueError("مدل هنوز آموزش داده نشده است.")
+        X_pred = x.values if hasattr(x, "values") else x
+        proba = np.zeros((X_pred.shape[0], len(self.classes_)))
+        for tree in self.estimators_:
+            # کلاس‌های هر درخت کد کلاس‌های classes_ هستند؛ نمونه bootstrap ممکن است همه را نداشته باشد
+            proba[:, tree.classes.astype(np.intp)] += tree.predict_proba(X_pred, chunk_size)
+        return proba / len(self.estimators_)
+
+    def predict(self, x, chunk_size=None):
+        return self.classes_[np.argmax(self.predict_proba(x, chunk_size), axis=1)]
+
+
+def _fit_tree(data, seed, bootstrap, class_weight, params):
+    """
+    آموزش یک درخت روی نمونه bootstrap داده (PresortedDataset)؛ خروجی (آرایه‌های تخت درخت، وزن
+    معیارها) است
+
+    تعداد تکرار هر سطر در نمونه در وزن آن ضرب می‌شود؛ نتیجه با آموزش روی X[sample] یکسان
+    است (به جز مرز بازه‌های max_bins که از کل داده ساخته می‌شوند). class_weight (با کلیدهای
+    کد کلاس) روی همان نمونه محاسبه می‌شود.
+    """
+    rng = np.random.default_rng(seed)
+    if bootstrap:
+        sample = rng.integers(0, data.n_samples, size=data.n_samples)
+        sample_weight = np.bincount(sample, minlength=data.n_samples).astype(float)
+        if class_weight is not None:
+            classes = np.unique(data.y[sample])
+            weights = class_weights(class_weight, data.y[sample], classes)
+            # سطرهای کلاس‌های غایب در نمونه وزن صفر دارند
+            sample_weight *= weights[np.minimum(np.searchsorted(classes, data.y), len(classes) - 1)]
+        if data.sample_weight is not None:
+            sample_weight *= data.sample_weight
+        data = data.with_sample_weight(sample_weight)
+    model = WeightedDecisionTreeModel(random_state=int(rng.integers(2 ** 32)), **params)
+    model.fit(data)
+    return model.export_tree(), dict(model.metric.weights_dict)
+
+
+def _fit_tree_task(task, handles):
+    """کار هر پردازه کارگر: X، y، اندیس‌های مرتب و وزن سطرها از حافظه مشترک خوانده می‌شوند."""
+    sample_weight = attach_shared(handles["sample_weight"]) if "sample_weight" in handles else None
+    data = PresortedDataset(attach_shared(handles["x"]), attach_shared(handles["y"]), sample_weight,
+                            attach_shared(handles["sorted_idx"]))
+    return _fit_tree(data, *task)
@@ -0,0 +1,169 @@
+"""
+گسسته‌سازی ویژگی‌ها برای حالت هیستوگرامی ساخت درخت
+
+هر ویژگی یک بار به حداکثر max_bins (<= 255) بازه تقسیم و به صورت uint8 نگهداری می‌شود.
+در هر گره به جای مرتب‌سازی نمونه‌ها، هیستوگرام کلاس‌ها در هر بازه ساخته می‌شود و فقط
+مرزهای بین بازه‌ها به عنوان آستانه کاندید امتیازدهی می‌شوند.
+"""
+
+import numpy as np
+
+MAX_BINS = 255
+
+
+class BinMapper:
+    """
+    نگاشت مقادیر پیوسته هر ویژگی به شماره بازه (uint8)
+
+    اگر تعداد مقادیر متمایز یک ویژگی از max_bins بیشتر نباشد، هر مقدار متمایز یک بازه
+    جدا دارد و آستانه‌های کاندید دقیقاً همان آستانه‌های حالت دقیق هستند. در غیر این
+    صورت مرز بازه‌ها از روی چندک‌های ویژگی (از میان مقادیر واقعی داده) انتخاب می‌شود.
+    ستون‌های دسته‌ای (کد صحیح دسته‌ها) بازه‌ای برابر با کد خودشان می‌گیرند تا هیستوگرام
+    هر گره همان شمارش کلاس‌های هر دسته باشد.
+
+    Parameters:
+    max_bins : int
+        حداکثر تعداد بازه هر ویژگی (۲ تا ۲۵۵)
+    categorical_features : array-like, optional
+        اندیس ستون‌های دسته‌ای؛ تعداد دسته‌های هر کدام نباید از max_bins بیشتر باشد
+
+    Attributes:
+    bin_thresholds_ : list of np.ndarray
+        مرز بالای هر بازه به جز بازه آخر؛ مقدار v در بازه b است اگر
+        bin_thresholds_[b-1] < v <= bin_thresholds_[b]
+    n_bins_ : np.ndarray
+        تعداد بازه‌های هر ویژگی
+    """
+    def __init__(self, max_bins=MAX_BINS, categorical_features=None):
+        if not 2 <= max_bins <= MAX_BINS:
+            raise ValueError(f"max_bins باید بین 2 و {MAX_BINS} باشد، نه {max_bins!r}.")
+        self.max_bins = max_bins
+        self.categorical_features = categorical_features
+        self.bin_thresholds_ = None
+        self.n_bins_ = None
+
+    def fit(self, X):
+        X = np.asarray(X, dtype=float)
+        self.bin_thresholds_ = []
+        categorical = set()
+        if self.categorical_features is not None:
+            categorical = set(np.asarray(self.categorical_features).tolist())
+        for f in range(X.shape[1]):
+            if f in categorical:
+                n_categories = int(X[:, f].max()) + 1 if X.shape[0] else 1
+                if n_categories > self.max_bins:
+                    raise ValueError(f"ستون دسته‌ای {f} با {n_categories} دسته بیشتر از max_bins={self.max_bins} "
+                                     f"دسته دارد.")
+                # مرزهای 0، 1، ...: بازه هر کد دسته همان کد است
+                self.bin_thresholds_.append(np.arange(n_categories - 1, dtype=float))
+                continue
+            distinct = np.unique(X[:, f])
+            if len(distinct) <= self.max_bins:
+                edges = distinct[:-1]
+            else:
+                quantiles = np.linspace(0, 1, self.max_bins + 1)[1:-1]
+                edges = np.unique(np.quantile(X[:, f], quantiles, method="lower"))
+                edges = edges[edges < distinct[-1]]
+            self.bin_thresholds_.append(edges)
+        self.n_bins_ = np.array([len(edges) + 1 for edges in self.bin_thresholds_], dtype=np.intp)
+        return self
+
+    def transform(self, X):
+        """ماتریس شماره بازه‌ها (تعداد نمونه × تعداد ویژگی) با نوع uint8."""
+        X = np.asarray(X, dtype=float)
+        binned = np.empty(X.shape, dtype=np.uint8)
+        for f, edges in enumerate(self.bin_thresholds_):
+            binned[:, f] = np.searchsorted(edges, X[:, f], side="left")
+        return binned
+
+    def fit_transform(self, X):
+        return self.fit(X).transform(X)
+
+
+def bin_histograms(X_binned, y_codes, rows, n_bins, n_classes, sample_weight=None):
+    """
+    هیستوگرام کلاس‌ها در هر بازه همه ویژگی‌ها برای سطرهای یک گره با یک bincount
+    (با sample_weight مجموع وزن نمونه‌ها به جای تعداد آن‌ها)
+
+    Returns:
+    np.ndarray
+        آرایه (تعداد ویژگی × n_bins × n_classes) از شمارش نمونه‌ها
+    """
+    n_features = X_binned.shape[1]
+    offsets = np.arange(n_features, dtype=np.intp) * n_bins
+    flat = (X_binned[rows].astype(np.intp) + offsets) * n_classes + y_codes[rows][:, None]
+    weights = None
+    if sample_weight is not None:
+        weights = np.broadcast_to(sample_weight[rows][:, None], flat.shape).ravel()
+    counts = np.bincount(flat.ravel(), weights, minlength=n_features * n_bins * n_classes)
+    return counts.reshape(n_features, n_bins, n_classes)
+
+
+def grouped_bin_histograms(X_binned, y_codes, rows, groups, n_groups, n_bins, n_classes, sample_weight=None):
+    """
+    هیستوگرام کلاس‌ها برای چند گره با هم در یک bincount (رشد سطح‌به‌سطح درخت)
+
+    groups گره (0 تا n_groups-1) هر سطر rows است؛ هیستوگرام هر گره با bin_histograms
+    روی سطرهای همان گره (به همان ترتیب) یکسان است.
+
+    Returns:
+    np.ndarray
+        آرایه (n_groups × تعداد ویژگی × n_bins × n_classes)
+    """
+    n_features = X_binned.shape[1]
+    offsets = np.arange(n_features, dtype=np.intp) * n_bins
+    cells = np.asarray(groups, dtype=np.intp)[:, None] * (n_features * n_bins) + offsets
+    flat = (X_binned[rows].astype(np.intp) + cells) * n_classes + y_codes[rows][:, None]
+    weights = None
+    if sample_weight is not None:
+        weights = np.broadcast_to(sample_weight[rows][:, None], flat.shape).ravel()
+    counts = np.bincount(flat.ravel(), weights, minlength=n_groups * n_features * n_bins * n_classes)
+    return counts.reshape(n_groups, n_features, n_bins, n_classes)
+
+
+def histogram_split_candidates(hist, thresholds):
+    """
+    آستانه‌های کاندید یک ویژگی از روی هیستوگرام (n_bins × n_classes) گره
+
+    فقط مرز بعد از بازه‌های غیرخالی (به جز آخرین آن‌ها) کاندید است؛ بنابراین هر تقسیم
+    متمایز یک بار امتیازدهی می‌شود. برای هیستوگرام‌های وزنی، باقی‌مانده‌های گرد کردن
+    تفریق هیستوگرام‌ها (مثل 1e-17) خالی حساب می‌شوند.
+
+    Returns:
+    tuple
+        (candidate_bins, thresholds, lower_counts, upper_counts) که شمارش‌ها ماتریس‌های
+        (تعداد کاندید × تعداد کلاس) نمونه‌های <= آستانه و > آستانه هستند
+    """
+    totals = hist.sum(axis=1)
+    nonempty = np.nonzero(totals > 1e-9 * max(1.0, totals.sum()))[0]
+    candidate_bins = nonempty[:-1]
+    cumulative = np.cumsum(hist, axis=0)
+    lower_counts = cumulative[candidate_bins]
+    upper_counts = cumulative[-1] - lower_counts
+    return candidate_bins, thresholds[candidate_bins], lower_counts, upper_counts
+
+
+def grouped_histogram_split_candidates(hist, thresholds):
+    """
+    نسخه چندگره‌ای histogram_split_candidates برای یک ویژگی
+
+    Parameters:
+    hist : np.ndarray
+        آرایه (تعداد گره × n_bins × n_classes)
+    thresholds : np.ndarray
+        آستانه هر بازه ویژگی
+
+    Returns:
+    tuple
+        (groups, candidate_bins, thresholds, lower_counts, upper_counts) که کاندیدها به ترتیب
+        گره و سپس بازه هستند
+    """
+    totals = hist.sum(axis=2)
+    nonempty = totals > 1e-9 * np.maximum(1.0, totals.sum(axis=1))[:, None]
+    # مرز بعد از آخرین بازه غیرخالی هر گره کاندید نیست
+    last = hist.shape[1] - 1 - np.argmax(nonempty[:, ::-1], axis=1)
+    groups, candidate_bins = np.nonzero(nonempty & (np.arange(hist.shape[1]) < last[:, None]))
+    cumulative = np.cumsum(hist, axis=1)
+    lower_counts = cumulative[groups, candidate_bins]
+    upper_counts = cumulative[groups, -1] - lower_counts
+    return groups, candidate_bins, thresholds[candidate_bins], lower_counts, upper_counts
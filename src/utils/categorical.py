@@ -0,0 +1,192 @@
+"""
+ویژگی‌های دسته‌ای با تقسیم چندتایی (زیرمجموعه‌ای از دسته‌ها به هر فرزند)
+
+هر ستون دسته‌ای یک بار با CategoryEncoder به کد صحیح دسته‌ها (0 تا تعداد دسته - 1)
+نگاشت می‌شود تا به جای چند ستون one-hot فقط یک ستون در ماتریس ویژگی‌ها بماند. در هر
+گره شمارش کلاس‌های هر دسته فقط یک بار (با یک bincount یا از هیستوگرام گره) جمع
+می‌شود، دسته‌ها بر اساس نرخ کلاس مثبت مرتب می‌شوند و فقط تقسیم‌های «k دسته اول به چپ»
+این ترتیب امتیازدهی می‌شوند. برای مسئله دودویی و معیارهای از نوع کاهش ناخالصی (مثل
+g_statistic، chi_squared، twoing و normalized_gain) بهترین افراز دسته‌ها همیشه در میان
+همین کاندیدها است (Breiman و همکاران، ۱۹۸۴)؛ برای بقیه معیارها تقریبی است.
+"""
+
+import numpy as np
+
+# کد دسته‌هایی که در زمان آموزش دیده نشده‌اند (یا مقدار گم‌شده)؛ در پیش‌بینی به فرزند راست می‌روند
+UNKNOWN_CATEGORY = -1
+
+
+def _is_missing(values):
+    if values.dtype.kind == "f":
+        return np.isnan(values)
+    if values.dtype.kind == "O":
+        return np.asarray((values != values) | (values == None), dtype=bool)  # noqa: E711
+    return np.zeros(len(values), dtype=bool)
+
+
+class CategoryEncoder:
+    """
+    نگاشت ستون‌های دسته‌ای (عددی یا متنی) به کد صحیح دسته‌ها؛ بقیه ستون‌ها به float تبدیل می‌شوند
+
+    Parameters:
+    categorical_features : list
+        اندیس ستون‌های دسته‌ای، نام آن‌ها (برای DataFrame) یا ماسک بولی روی ستون‌ها
+
+    Attributes:
+    categorical_features_ : np.ndarray
+        اندیس ستون‌های دسته‌ای
+    categories_ : list of np.ndarray
+        دسته‌های مرتب هر ستون دسته‌ای در داده آموزشی؛ کد هر مقدار مکان آن در همین آرایه است
+    """
+    def __init__(self, categorical_features):
+        self.categorical_features = categorical_features
+        self.categorical_features_ = None
+        self.categories_ = None
+
+    def _resolve_features(self, X):
+        features = np.asarray(self.categorical_features)
+        n_features = X.shape[1]
+        if features.dtype == bool:
+            if len(features) != n_features:
+                raise ValueError("طول ماسک categorical_features با تعداد ستون‌ها برابر نیست.")
+            return np.flatnonzero(features)
+        if features.dtype.kind in "iu":
+            if len(features) and not (features.min() >= 0 and features.max() < n_features):
+                raise ValueError(f"اندیس ستون دسته‌ای نامعتبر است: {self.categorical_features!r}")
+            return np.unique(features).astype(np.intp)
+        columns = list(getattr(X, "columns", []))
+        unknown = [name for name in self.categorical_features if name not in columns]
+        if unknown:
+            raise ValueError(f"ستون‌های دسته‌ای در داده وجود ندارند: {unknown}")
+        return np.unique([columns.index(name) for name in self.categorical_features]).astype(np.intp)
+
+    @staticmethod
+    def _column(X, j):
+        return X.iloc[:, j].to_numpy() if hasattr(X, "iloc") else np.asarray(X)[:, j]
+
+    def fit(self, X):
+        self.categorical_features_ = self._resolve_features(X)
+        self.categories_ = []
+        for j in self.categorical_features_:
+            values = self._column(X, j)
+            if _is_missing(values).any():
+                raise ValueError(f"ستون دسته‌ای {j} شامل مقادیر گم‌شده است.")
+            try:
+                self.categories_.append(np.unique(values))
+            except TypeError as e:
+                raise ValueError(f"دسته‌های ستون {j} قابل مرتب‌سازی نیستند: {e}") from e
+        return self
+
+    @property
+    def n_categories_(self):
+        """تعداد دسته‌های هر ستون دسته‌ای."""
+        return np.array([len(categories) for categories in self.categories_], dtype=np.intp)
+
+    def transform(self, X):
+        """
+        ماتریس float ویژگی‌ها که ستون‌های دسته‌ای آن کد دسته‌ها هستند؛ دسته‌های ناشناخته
+        و مقادیر گم‌شده کد UNKNOWN_CATEGORY می‌گیرند.
+        """
+        n_features = X.shape[1]
+        numeric = np.setdiff1d(np.arange(n_features), self.categorical_features_)
+        encoded = np.empty((X.shape[0], n_features))
+        if len(numeric):
+            encoded[:, numeric] = (X.iloc[:, numeric].to_numpy(dtype=float) if hasattr(X, "iloc")
+                                   else np.asarray(X)[:, numeric].astype(float))
+        for j, categories in zip(self.categorical_features_, self.categories_):
+            values = self._column(X, j)
+            codes = np.full(len(values), UNKNOWN_CATEGORY, dtype=np.intp)
+            known = ~_is_missing(values)
+            if known.any():
+                present = values[known]
+                position = np.minimum(np.searchsorted(categories, present), len(categories) - 1)
+                codes[known] = np.where(categories[position] == present, position, UNKNOWN_CATEGORY)
+            encoded[:, j] = codes
+        return encoded
+
+    def fit_transform(self, X):
+        return self.fit(X).transform(X)
+
+
+def validate_codes(X, features):
+    """
+    تعداد دسته‌های هر ستون دسته‌ای ماتریس کدها (بیشترین کد + ۱)
+
+    کدها باید اعداد صحیح نامنفی باشند (خروجی CategoryEncoder.transform روی داده آموزشی).
+    """
+    n_categories = np.zeros(len(features), dtype=np.intp)
+    for i, f in enumerate(features):
+        codes = X[:, f]
+        if len(codes) == 0:
+            continue
+        if codes.min() < 0 or np.any(codes != np.floor(codes)):
+            raise ValueError(f"ستون دسته‌ای {f} باید کد صحیح نامنفی دسته‌ها باشد.")
+        n_categories[i] = int(codes.max()) + 1
+    return n_categories
+
+
+def category_split_candidates(counts, positive):
+    """
+    تقسیم‌های کاندید یک ویژگی دسته‌ای برای یک یا چند گره
+
+    دسته‌های حاضر در هر گره به ترتیب صعودی نرخ کلاس positive (در تساوی، کد کوچک‌تر اول)
+    مرتب می‌شوند و کاندید k یعنی k + 1 دسته اول این ترتیب به فرزند چپ بروند. دسته‌های
+    غایب (یا با مجموع وزن تقریباً صفر، مثل باقی‌مانده تفریق هیستوگرام‌ها) کاندید نمی‌سازند.
+
+    Parameters:
+    counts : np.ndarray
+        آرایه (تعداد گره × تعداد دسته × تعداد کلاس) شمارش (وزنی) کلاس‌های هر دسته
+    positive : int
+        اندیس کلاسی که دسته‌ها بر اساس نرخ آن مرتب می‌شوند
+
+    Returns:
+    tuple
+        (groups, positions, order, lower_counts, upper_counts): گره و مکان هر کاندید در
+        ترتیب، ترتیب دسته‌های هر گره (تعداد گره × تعداد دسته) و شمارش کلاس‌های چپ و راست
+    """
+    totals = counts.sum(axis=2)
+    present = totals > 1e-9 * np.maximum(1.0, totals.sum(axis=1))[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(present, counts[:, :, positive] / totals, np.inf)
+    order = np.argsort(rate, axis=1, kind="stable")
+    cumulative = np.cumsum(np.take_along_axis(counts, order[:, :, None], axis=1), axis=1)
+    n_present = present.sum(axis=1)
+    groups, positions = np.nonzero(np.arange(counts.shape[1]) < (n_present - 1)[:, None])
+    lower_counts = cumulative[groups, positions]
+    upper_counts = cumulative[groups, -1] - lower_counts
+    return groups, positions, order, lower_counts, upper_counts
+
+
+def category_ranks(order):
+    """رتبه هر دسته در ترتیب order (معکوس جایگشت)؛ سطر با رتبه > مکان کاندید به فرزند راست می‌رود."""
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(order.shape[-1]), axis=-1)
+    return ranks
+
+
+def category_bitset(category_sets, n_nodes):
+    """
+    بیت‌ست دسته‌های فرزند چپ گره‌های دسته‌ای برای آرایه تخت درخت
+
+    Parameters:
+    category_sets : dict
+        گره -> کد دسته‌هایی که به فرزند چپ می‌روند
+    n_nodes : int
+        تعداد گره‌های درخت
+
+    Returns:
+    np.ndarray
+        آرایه uint8 (n_nodes × تعداد بایت)؛ بیت c (ترتیب little) گره یعنی دسته c به چپ می‌رود
+    """
+    n_bits = 1 + max(int(np.max(codes)) for codes in category_sets.values())
+    masks = np.zeros((n_nodes, 8 * ((n_bits + 7) // 8)), dtype=bool)
+    for node, codes in category_sets.items():
+        masks[node, codes] = True
+    return np.packbits(masks, axis=1, bitorder="little")
+
+
+def in_category_set(bitset, nodes, values):
+    """آیا کد values (هم‌تراز با nodes) در دسته‌های فرزند چپ گره‌ها است؛ کد نامعتبر یا NaN یعنی خیر."""
+    valid = (values >= 0) & (values < 8 * bitset.shape[1])
+    codes = np.where(valid, values, 0).astype(np.intp)
+    return valid & ((bitset[nodes, codes >> 3] >> (codes & 7)) & 1).astype(bool)
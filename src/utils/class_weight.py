@@ -0,0 +1,72 @@
+"""
+وزن نمونه‌ها از روی class_weight
+
+به جای تکرار سطرهای کلاس کمیاب (oversampling) پیش از fit، وزن هر کلاس به وزن
+نمونه‌های آن تبدیل می‌شود و شمارش‌های کلاس در همه معیارها وزنی می‌شوند. نتیجه برای
+وزن‌های صحیح با تکرار سطرها یکسان است اما اندازه داده و زمان آموزش بزرگ نمی‌شود.
+"""
+
+import numpy as np
+
+CLASS_WEIGHT_PRESETS = ("balanced",)
+
+
+def class_weights(class_weight, y, classes=None):
+    """
+    وزن هر کلاس به ترتیب classes
+
+    Parameters:
+    class_weight : "balanced" یا dict
+        "balanced": وزن هر کلاس n_samples / (n_classes * تعداد نمونه‌های کلاس)؛
+        dict: نگاشت برچسب -> وزن (کلاس‌های غایب وزن ۱ دارند)
+    y : array-like
+        برچسب‌ها
+    classes : array-like, optional
+        مجموعه مرتب کلاس‌ها؛ اگر داده نشود np.unique(y)
+
+    Returns:
+    np.ndarray
+        وزن هر کلاس
+    """
+    y = np.asarray(y)
+    classes = np.unique(y) if classes is None else np.asarray(classes)
+    if isinstance(class_weight, str):
+        if class_weight not in CLASS_WEIGHT_PRESETS:
+            raise ValueError(f"class_weight نامعتبر است: {class_weight!r}. "
+                             f"گزینه‌ها: {list(CLASS_WEIGHT_PRESETS)} یا dict")
+        counts = np.bincount(np.searchsorted(classes, y), minlength=len(classes)).astype(float)
+        with np.errstate(divide="ignore"):
+            return np.where(counts > 0, len(y) / (len(classes) * counts), 0.0)
+    if isinstance(class_weight, dict):
+        weights = np.array([float(class_weight.get(label, 1.0)) for label in classes])
+        if np.any(weights < 0):
+            raise ValueError("وزن کلاس‌ها نمی‌تواند منفی باشد.")
+        return weights
+    raise ValueError(f"class_weight باید 'balanced' یا dict باشد، نه {class_weight!r}.")
+
+
+def compute_sample_weight(class_weight, y, sample_weight=None):
+    """
+    ترکیب class_weight و sample_weight به یک بردار وزن برای هر سطر
+
+    اگر هر دو None باشند None برمی‌گرداند تا مسیر بدون وزن (و نتایج آن) دست‌نخورده بماند.
+    """
+    y = np.asarray(y)
+    if sample_weight is not None:
+        sample_weight = np.asarray(sample_weight, dtype=float)
+        if sample_weight.shape != (len(y),):
+            raise ValueError("طول sample_weight باید با تعداد سطرهای y برابر باشد.")
+        if np.any(sample_weight < 0) or not np.all(np.isfinite(sample_weight)):
+            raise ValueError("sample_weight باید نامنفی و متناهی باشد.")
+    if class_weight is None and sample_weight is None:
+        return None
+
+    row_weights = sample_weight
+    if class_weight is not None:
+        classes = np.unique(y)
+        row_weights = class_weights(class_weight, y, classes)[np.searchsorted(classes, y)]
+        if sample_weight is not None:
+            row_weights = row_weights * sample_weight
+    if not row_weights.sum() > 0:
+        raise ValueError("مجموع وزن نمونه‌ها باید مثبت باشد.")
+    return row_weights
@@ -0,0 +1,143 @@
+"""
+کش محتوا-محور برای نتایج تخمین FN
+
+کلید هر مدخل از این اجزا ساخته می‌شود:
+- اثر انگشت دیتاست (یک بار در هر fit از روی X و y محاسبه می‌شود، نه در هر جستجو)
+- اثر انگشت شماره سطرهای گره (نه بایت‌های داده گره)
+- نام معیار، تنظیمات تخمین‌گر FN و برچسب کلاس مثبت
+
+مقدار هر مدخل ماسک FN سطرهای گره است که به صورت فشرده (np.packbits) نگهداری می‌شود.
+مدخل‌ها با سیاست LRU و بر اساس سقف حجم (بایت) حذف می‌شوند و در صورت تعیین disk_dir
+روی دیسک هم ذخیره می‌شوند تا fitهای تکراری روی همان داده از آن‌ها استفاده کنند.
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+import numpy as np
+
+
+def array_fingerprint(*arrays):
+    """اثر انگشت blake2b چند آرایه (بدون ساخت کپی bytes از داده‌های پیوسته)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        digest.update(memoryview(array).cast("B"))
+    return digest.hexdigest()
+
+
+def rows_fingerprint(rows, n_total):
+    """اثر انگشت شماره سطرهای یک گره؛ گره شامل همه سطرها یک کلید ثابت دارد."""
+    if len(rows) == n_total:
+        return f"all{n_total}"
+    return array_fingerprint(np.asarray(rows, dtype=np.int64))
+
+
+class FNCache:
+    """
+    کش LRU با سقف حجم برای ماسک‌های FN
+
+    Parameters:
+    max_bytes : int
+        سقف حجم مدخل‌های داخل حافظه (بایت)
+    disk_dir : str, optional
+        پوشه لایه دیسکی؛ اگر داده شود هر مدخل جدید به صورت فایل .npy هم ذخیره می‌شود
+
+    Attributes:
+    hits, misses, disk_hits, evictions : int
+        شمارنده‌های عملکرد کش
+    """
+    def __init__(self, max_bytes=64 * 1024 ** 2, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+        self._entries = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(*parts):
+        """ساخت کلید ثابت (مستقل از hash تصادفی پایتون) از اجزای کلید."""
+        return hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=16).hexdigest()
+
+    def get(self, key):
+        """ماسک FN ذخیره شده برای کلید یا None."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._unpack(self._entries[key])
+
+        path = self._disk_path(key)
+        if path is not None and os.path.exists(path):
+            entry = np.load(path)
+            self.disk_hits += 1
+            self._store(key, entry)
+            return self._unpack(entry)
+
+        self.misses += 1
+        return None
+
+    def put(self, key, misses):
+        """ذخیره ماسک FN؛ مدخل‌های قدیمی در صورت عبور از سقف حجم حذف می‌شوند."""
+        misses = np.asarray(misses, dtype=bool)
+        # ۸ بایت اول طول ماسک را نگه می‌دارد تا بیت‌های اضافه packbits کنار گذاشته شوند
+        entry = np.concatenate([np.array([len(misses)], dtype=np.uint64).view(np.uint8),
+                                np.packbits(misses)])
+        path = self._disk_path(key)
+        if path is not None and not os.path.exists(path):
+            np.save(path, entry)
+        self._store(key, entry)
+
+    def clear(self):
+        """خالی کردن لایه حافظه (لایه دیسکی دست نمی‌خورد)."""
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _store(self, key, entry):
+        if entry.nbytes > self.max_bytes:
+            return
+        if key in self._entries:
+            self.current_bytes -= self._entries.pop(key).nbytes
+        self._entries[key] = entry
+        self.current_bytes += entry.nbytes
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def _disk_path(self, key):
+        if self.disk_dir is None:
+            return None
+        return os.path.join(self.disk_dir, f"{key}.npy")
+
+    @staticmethod
+    def _unpack(entry):
+        length = int(entry[:8].view(np.uint64)[0])
+        return np.unpackbits(entry[8:], count=length).astype(bool)
+
+
+def get_fn_cache(fn_cache):
+    """ساخت کش از روی None (فقط حافظه)، مسیر پوشه (با لایه دیسکی) یا برگرداندن نمونه آماده."""
+    if isinstance(fn_cache, FNCache):
+        return fn_cache
+    if fn_cache is None:
+        return FNCache()
+    return FNCache(disk_dir=os.fspath(fn_cache))
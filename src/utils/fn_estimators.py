@@ -0,0 +1,270 @@
+"""
+تخمین‌گرهای False Negative برای محاسبه وزن معیارها
+
+WeightedVotingMetric برای هر معیار، با یک درخت موقت (shadow tree) که فقط با همان معیار
+ساخته می‌شود، تعداد FN را تخمین می‌زند. این ماژول چند روش با هزینه متفاوت ارائه می‌دهد:
+
+- FullTreeFNEstimator : درخت کامل با عمق ۱۰ روی کل داده (رفتار اصلی پروژه)
+- StumpFNEstimator    : درخت کم‌عمق (stump با عمق ۱ یا lookahead با عمق ۲)
+- SubsampleFNEstimator: درخت روی زیرنمونه تصادفی و شمارش FN روی کل داده
+- KFoldFNEstimator    : FN خارج از fold؛ هر سطر با درختی سنجیده می‌شود که آن را ندیده است
+- HoldoutFNEstimator  : درخت روی بخشی از سطرها و شمارش FN روی سطرهای کنار گذاشته شده
+
+سه تخمین‌گر اول FN را روی همان داده آموزش درخت می‌شمارند (resubstitution)؛ برای
+درخت‌های عمیق این مقدار نزدیک صفر است و وزن‌ها تقریباً یکنواخت می‌شوند. دو تخمین‌گر
+آخر خطای خارج از نمونه را می‌شمارند.
+
+همه تخمین‌گرها پارامتر max_bins دارند؛ اگر داده شود درخت‌های موقت هم در حالت
+هیستوگرامی ساخته می‌شوند. با sample_weight درخت‌های موقت روی شمارش‌های وزنی کلاس‌ها
+ساخته می‌شوند (ماسک FN همچنان بولی است و وزن‌دهی FN در WeightedVotingMetric انجام می‌شود).
+"""
+
+from abc import ABC, abstractmethod
+import numpy as np
+from model.tree_builder import TreeBuilder
+from utils.presorted import argsort_columns, partition_sorted
+
+
+class BaseFNEstimator(ABC):
+    """
+    کلاس پایه انتزاعی برای تخمین‌گرهای FN
+
+    تخمین‌گرهایی که از چند بخش مستقل (fold) تشکیل شده‌اند n_folds را بیشتر از یک
+    می‌گذارند و predict_fold_misses را پیاده می‌کنند؛ WeightedVotingMetric این بخش‌ها
+    را به صورت کارهای جدا (در صورت n_jobs > 1 به صورت موازی) اجرا و ماسک‌ها را OR می‌کند.
+    """
+    n_folds = 1
+    @abstractmethod
+    def predict_misses(self, metric, X, y, positive_label=1, sorted_idx=None, sample_weight=None):
+        """
+        ماسک نمونه‌های مثبتی که درخت موقت معیار، منفی پیش‌بینی می‌کند
+
+        Parameters:
+        -----------
+        metric : SingleCriterionMetric
+            متریک تک‌معیاره‌ای که درخت موقت با آن ساخته می‌شود
+        X : np.ndarray
+            ویژگی‌ها
+        y : np.ndarray
+            برچسب‌ها
+        positive_label : int
+            برچسب کلاس مثبت
+        sorted_idx : np.ndarray, optional
+            اندیس‌های مرتب سطرهای گره (از درخت اصلی)؛ اگر داده شود فقط همین سطرها
+            استفاده می‌شوند و داده دوباره مرتب نمی‌شود
+        sample_weight : np.ndarray, optional
+            وزن هر سطر X برای ساخت درخت موقت
+
+        Returns:
+        --------
+        np.ndarray of bool
+            یک مقدار برای هر سطر گره به ترتیب صعودی شماره سطر (node_rows)
+        """
+        pass
+
+    def predict_fold_misses(self, metric, X, y, positive_label=1, sorted_idx=None, fold=0, sample_weight=None):
+        """ماسک FN یک fold روی سطرهای گره؛ تخمین‌گرهای تک‌بخشی فقط fold=0 دارند."""
+        return self.predict_misses(metric, X, y, positive_label, sorted_idx, sample_weight)
+
+    def estimate(self, metric, X, y, positive_label=1, sorted_idx=None, sample_weight=None):
+        """تعداد نمونه‌های مثبتی که منفی پیش‌بینی شده‌اند (با sample_weight مجموع وزن آن‌ها)."""
+        misses = self.predict_misses(metric, X, y, positive_label, sorted_idx, sample_weight)
+        if sample_weight is None:
+            return int(np.sum(misses))
+        return float(np.sum(np.asarray(sample_weight)[self.node_rows(y, sorted_idx)][misses]))
+
+    @staticmethod
+    def node_rows(y, sorted_idx=None):
+        """شماره سطرهای گره به ترتیب صعودی."""
+        if sorted_idx is None:
+            return np.arange(len(y))
+        return np.sort(sorted_idx[:, 0])
+
+    @staticmethod
+    def node_data(X, y, rows):
+        """داده سطرهای گره؛ اگر گره همه سطرها را داشته باشد کپی ساخته نمی‌شود."""
+        if len(rows) == len(y):
+            return X, y
+        return X[rows], y[rows]
+
+    def misses(self, tree, X, y, positive_label=1):
+        """ماسک FN یک درخت آموزش‌دیده روی (X, y)."""
+        positive = np.nonzero(tree.classes == positive_label)[0]
+        if len(positive) == 0:
+            preds_positive = np.zeros(len(y), dtype=bool)
+        else:
+            preds_positive = tree.predict_proba(X)[:, positive[0]] > 0.5
+        return (y == positive_label) & ~preds_positive
+
+    def __repr__(self):
+        params = ", ".join(f"{key}={value!r}" for key, value in sorted(vars(self).items()))
+        return f"{type(self).__name__}({params})"
+
+
+class FullTreeFNEstimator(BaseFNEstimator):
+    """درخت کامل روی کل داده گره و شمارش FN روی همان داده."""
+    def __init__(self, max_depth=10, max_bins=None):
+        self.max_depth = max_depth
+        self.max_bins = max_bins
+
+    def predict_misses(self, metric, X, y, positive_label=1, sorted_idx=None, sample_weight=None):
+        rows = self.node_rows(y, sorted_idx)
+        builder = TreeBuilder(metric, max_depth=self.max_depth, max_bins=self.max_bins)
+        tree = builder.build(X, y, sorted_idx, sample_weight)
+        return self.misses(tree, *self.node_data(X, y, rows), positive_label)
+
+
+class StumpFNEstimator(BaseFNEstimator):
+    """
+    درخت با عمق محدود: depth=1 یک stump است و depth=2 یک سطح lookahead اضافه می‌کند.
+    هزینه آن در حد چند جستجوی تقسیم است، نه یک آموزش کامل.
+    """
+    def __init__(self, depth=1, max_bins=None):
+        self.depth = depth
+        self.max_bins = max_bins
+
+    def predict_misses(self, metric, X, y, positive_label=1, sorted_idx=None, sample_weight=None):
+        rows = self.node_rows(y, sorted_idx)
+        builder = TreeBuilder(metric, max_depth=self.depth, max_bins=self.max_bins)
+        tree = builder.build(X, y, sorted_idx, sample_weight)
+        return self.misses(tree, *self.node_data(X, y, rows), positive_label)
+
+
+class SubsampleFNEstimator(BaseFNEstimator):
+    """
+    درخت کامل روی زیرنمونه‌ای تصادفی از سطرها؛ FN روی کل داده گره شمرده می‌شود تا
+    مقادیر همه معیارها قابل مقایسه بمانند.
+
+    Parameters:
+    fraction : float
+        نسبت سطرهایی که برای آموزش درخت موقت برداشته می‌شود
+    max_depth : int
+        حداکثر عمق درخت موقت
+    min_samples : int
+        حداقل تعداد سطرهای زیرنمونه
+    random_state : int
+        بذر تولید اعداد تصادفی؛ همه معیارها روی یک زیرنمونه سنجیده می‌شوند
+    max_bins : int, optional
+        تعداد بازه‌های حالت هیستوگرامی درخت موقت (None یعنی حالت دقیق)
+    """
+    def __init__(self, fraction=0.2, max_depth=10, min_samples=200, random_state=0, max_bins=None):
+        self.fraction = fraction
+        self.max_depth = max_depth
+        self.min_samples = min_samples
+        self.random_state = random_state
+        self.max_bins = max_bins
+
+    def predict_misses(self, metric, X, y, positive_label=1, sorted_idx=None, sample_weight=None):
+        rows = self.node_rows(y, sorted_idx)
+        n_sub = min(len(rows), max(self.min_samples, int(self.fraction * len(rows))))
+        rng = np.random.default_rng(self.random_state)
+        sample = np.zeros(len(y), dtype=bool)
+        sample[rng.choice(rows, size=n_sub, replace=False)] = True
+        if sorted_idx is None:
+            sorted_idx = argsort_columns(X)
+        sub_sorted, _ = partition_sorted(sorted_idx, sample)
+        builder = TreeBuilder(metric, max_depth=self.max_depth, max_bins=self.max_bins)
+        tree = builder.build(X, y, sub_sorted, sample_weight)
+        return self.misses(tree, *self.node_data(X, y, rows), positive_label)
+
+
+class KFoldFNEstimator(BaseFNEstimator):
+    """
+    FN خارج از fold: سطرهای گره به n_splits بخش تقسیم می‌شوند و FN هر بخش با درختی
+    شمرده می‌شود که روی بقیه بخش‌ها آموزش دیده است.
+
+    اندیس‌های مرتب گره فقط یک بار ساخته و برای داده آموزشی هر fold با partition_sorted
+    (بدون مرتب‌سازی دوباره) جدا می‌شوند. تقسیم سطرها با random_state ثابت است، پس همه
+    معیارها روی foldهای یکسان سنجیده می‌شوند.
+
+    Parameters:
+    n_splits : int
+        تعداد foldها
+    max_depth : int
+        حداکثر عمق درخت موقت
+    random_state : int
+        بذر جایگشت تصادفی سطرها بین foldها
+    max_bins : int, optional
+        تعداد بازه‌های حالت هیستوگرامی درخت موقت (None یعنی حالت دقیق)
+    """
+    def __init__(self, n_splits=5, max_depth=10, random_state=0, max_bins=None):
+        if n_splits < 2:
+            raise ValueError("n_splits باید حداقل 2 باشد.")
+        self.n_splits = n_splits
+        self.max_depth = max_depth
+        self.random_state = random_state
+        self.max_bins = max_bins
+
+    @property
+    def n_folds(self):
+        return self.n_splits
+
+    def fold_ids(self, n_rows):
+        """شماره fold هر سطر گره (به ترتیب صعودی شماره سطر)."""
+        return np.random.default_rng(self.random_state).permutation(n_rows) % self.n_splits
+
+    def predict_fold_misses(self, metric, X, y, positive_label=1, sorted_idx=None, fold=0, sample_weight=None):
+        rows = self.node_rows(y, sorted_idx)
+        if sorted_idx is None:
+            sorted_idx = argsort_columns(X)
+        test = self.fold_ids(len(rows)) == fold
+        misses = np.zeros(len(rows), dtype=bool)
+        if not test.any() or test.all():
+            return misses
+
+        train = np.zeros(len(y), dtype=bool)
+        train[rows[~test]] = True
+        train_sorted, _ = partition_sorted(sorted_idx, train)
+        builder = TreeBuilder(metric, max_depth=self.max_depth, max_bins=self.max_bins)
+        tree = builder.build(X, y, train_sorted, sample_weight)
+        misses[test] = self.misses(tree, X[rows[test]], y[rows[test]], positive_label)
+        return misses
+
+    def predict_misses(self, metric, X, y, positive_label=1, sorted_idx=None, sample_weight=None):
+        if sorted_idx is None:
+            sorted_idx = argsort_columns(X)
+        folds = [self.predict_fold_misses(metric, X, y, positive_label, sorted_idx, fold, sample_weight)
+                 for fold in range(self.n_folds)]
+        return np.logical_or.reduce(folds)
+
+
+class HoldoutFNEstimator(KFoldFNEstimator):
+    """
+    درخت روی (1 - test_fraction) سطرهای گره و شمارش FN روی test_fraction باقی‌مانده؛
+    ارزان‌تر از KFoldFNEstimator (یک درخت به جای n_splits درخت) اما پرنوسان‌تر.
+    """
+    n_folds = 1
+
+    def __init__(self, test_fraction=0.25, max_depth=10, random_state=0, max_bins=None):
+        if not 0 < test_fraction < 1:
+            raise ValueError("test_fraction باید بین 0 و 1 باشد.")
+        self.test_fraction = test_fraction
+        self.max_depth = max_depth
+        self.random_state = random_state
+        self.max_bins = max_bins
+
+    def fold_ids(self, n_rows):
+        """0 برای سطرهای آزمون و 1 برای سطرهای آموزش."""
+        n_test = int(np.ceil(self.test_fraction * n_rows))
+        return (np.random.default_rng(self.random_state).permutation(n_rows) >= n_test).astype(np.intp)
+
+
+FN_ESTIMATORS = {
+    "full": FullTreeFNEstimator,
+    "stump": StumpFNEstimator,
+    "subsample": SubsampleFNEstimator,
+    "kfold": KFoldFNEstimator,
+    "holdout": HoldoutFNEstimator,
+}
+
+
+def get_fn_estimator(fn_estimator, max_bins=None):
+    """
+    ساخت تخمین‌گر از روی نام ("full"، "stump"، "subsample"، "kfold"، "holdout") یا برگرداندن نمونه آماده.
+    max_bins فقط برای تخمین‌گرهایی که از روی نام ساخته می‌شوند اعمال می‌شود.
+    """
+    if isinstance(fn_estimator, BaseFNEstimator):
+        return fn_estimator
+    if fn_estimator not in FN_ESTIMATORS:
+        raise ValueError(f"تخمین‌گر FN نامعتبر است: {fn_estimator!r}. گزینه‌ها: {list(FN_ESTIMATORS)}")
+    return FN_ESTIMATORS[fn_estimator](max_bins=max_bins)
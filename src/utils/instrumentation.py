@@ -0,0 +1,178 @@
+"""
+ابزار اندازه‌گیری زمان و شمارش رویدادهای آموزش، بدون چاپ در خروجی
+
+به صورت پیش‌فرض از NULL_STATS استفاده می‌شود که همه متدهایش هیچ کاری نمی‌کنند، پس
+هزینه اندازه‌گیری وقتی خاموش است ناچیز است. با FitStats زمان هر مرحله (مثلاً
+weight_init، split_search، criteria:fused) و شمارنده‌ها (مثلاً compute_delta) جمع
+می‌شوند و در صورت تعیین callback، پایان هر بازه زمانی به آن اطلاع داده می‌شود. معیارهای
+داخلی با هم در یک گذر امتیاز می‌گیرند و فقط یک زمان مشترک criteria:fused دارند؛ زمان
+جداگانه criterion:<نام معیار> فقط برای معیارهای سفارشی بدون فرمول ترکیبی ثبت می‌شود.
+
+اوج حافظه هر بازه memory(name) فقط با FitStats(track_memory=True) و با tracemalloc اندازه
+گرفته می‌شود (فقط تخصیص‌های همین پردازه، شامل آرایه‌های NumPy؛ پردازه‌های کارگر Process
+Pool شمرده نمی‌شوند). tracemalloc اجرا را چند برابر کند می‌کند، پس در این حالت زمان‌ها
+اندازه گرفته نمی‌شوند؛ برای زمان و حافظه دو fit جداگانه لازم است.
+"""
+
+import logging
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import nullcontext
+
+logger = logging.getLogger(__name__)
+_NULL_CONTEXT = nullcontext()
+
+
+class FitStats:
+    """
+    جمع‌آوری زمان مراحل و شمارنده‌ها در طول fit
+
+    Parameters:
+    callback : callable, optional
+        تابعی با امضای callback(name, seconds) که پس از پایان هر بازه زمانی صدا زده می‌شود
+    log_level : int, optional
+        اگر داده شود، پایان هر بازه زمانی با این سطح در logger این ماژول ثبت می‌شود
+    track_memory : bool
+        اندازه‌گیری اوج حافظه بازه‌های memory(name) به جای زمان‌ها (پیش‌فرض خاموش)
+    """
+    enabled = True
+
+    def __init__(self, callback=None, log_level=None, track_memory=False):
+        self.callback = callback
+        self.log_level = log_level
+        self.track_memory = track_memory
+        self.timers = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.peak_memory = {}
+        # جستجوی موازی تقسیم (TreeBuilder با split_n_jobs) از چند thread شمارنده‌ها را به‌روز می‌کند
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def timer(self, name):
+        # زمان‌ها زیر tracemalloc هزینه خود آن را اندازه می‌گیرند
+        return _NULL_CONTEXT if self.track_memory else _Timer(self, name)
+
+    def memory(self, name):
+        """اندازه‌گیری اوج حافظه تخصیص داده شده (بایت) در طول بلاک with (فقط با track_memory)."""
+        return _MemoryTracker(self, name) if self.track_memory else _NULL_CONTEXT
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.timers[name] += seconds
+            self.calls[name] += 1
+        if self.log_level is not None:
+            logger.log(self.log_level, "%s: %.6f s", name, seconds)
+        if self.callback is not None:
+            self.callback(name, seconds)
+
+    def reset(self):
+        self.timers.clear()
+        self.calls.clear()
+        self.counters.clear()
+        self.peak_memory.clear()
+
+    def summary(self):
+        """خلاصه به صورت dict: زمان کل و تعداد دفعات هر مرحله، شمارنده‌ها و اوج حافظه."""
+        return {
+            "timers": {name: {"seconds": seconds, "calls": self.calls[name]}
+                       for name, seconds in sorted(self.timers.items())},
+            "counters": dict(sorted(self.counters.items())),
+            "peak_memory_bytes": dict(sorted(self.peak_memory.items())),
+        }
+
+
+class _Timer:
+    __slots__ = ("stats", "name", "start")
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _MemoryTracker:
+    __slots__ = ("stats", "name", "started", "baseline")
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.started = not tracemalloc.is_tracing()
+        if self.started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self.baseline = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc):
+        peak = tracemalloc.get_traced_memory()[1] - self.baseline
+        if self.started:
+            tracemalloc.stop()
+        self.stats.peak_memory[self.name] = max(peak, self.stats.peak_memory.get(self.name, 0))
+        if self.stats.log_level is not None:
+            logger.log(self.stats.log_level, "%s: peak %.1f MiB", self.name, peak / 1024 ** 2)
+        return False
+
+
+class _NullStats:
+    """نسخه خاموش FitStats: هیچ زمانی اندازه گرفته و هیچ شمارنده‌ای نگهداری نمی‌شود."""
+    enabled = False
+
+    def timer(self, name):
+        return _NULL_CONTEXT
+
+    def memory(self, name):
+        return _NULL_CONTEXT
+
+    def count(self, name, n=1):
+        pass
+
+    def record(self, name, seconds):
+        pass
+
+    def reset(self):
+        pass
+
+    def summary(self):
+        return {"timers": {}, "counters": {}, "peak_memory_bytes": {}}
+
+
+NULL_STATS = _NullStats()
+
+
+def get_stats(instrumentation=False, callback=None):
+    """
+    ساخت شیء اندازه‌گیری: False (پیش‌فرض) خاموش است، True یک FitStats جدید می‌سازد،
+    "memory" یک FitStats با track_memory=True و یک نمونه FitStats همان را برمی‌گرداند.
+    تعیین callback به معنای روشن بودن است.
+    """
+    if isinstance(instrumentation, (FitStats, _NullStats)):
+        return instrumentation
+    if instrumentation == "memory":
+        return FitStats(callback=callback, track_memory=True)
+    if instrumentation or callback is not None:
+        return FitStats(callback=callback)
+    return NULL_STATS
@@ -0,0 +1,75 @@
+"""
+ابزارهای اجرای موازی با Process Pool
+
+آرایه‌های بزرگ (مثل X و y) یک بار در حافظه مشترک (shared memory) قرار می‌گیرند و هر
+پردازه کارگر فقط یک بار هنگام راه‌اندازی به آن‌ها متصل می‌شود؛ بنابراین داده برای هر
+task دوباره pickle و کپی نمی‌شود.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+import numpy as np
+
+# آرایه‌های متصل شده در پردازه کارگر: نام -> (آرایه، بلوک حافظه مشترک)
+_ATTACHED = {}
+
+
+def resolve_n_jobs(n_jobs, n_tasks=None):
+    """
+    تبدیل n_jobs به تعداد پردازه: None یا 1 یعنی اجرای ترتیبی و مقادیر منفی مثل
+    joblib از تعداد هسته‌ها کم می‌شوند (-1 یعنی همه هسته‌ها).
+    """
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    n_cpus = os.cpu_count() or 1
+    n_workers = n_jobs if n_jobs > 0 else max(1, n_cpus + 1 + n_jobs)
+    if n_tasks is not None:
+        n_workers = min(n_workers, n_tasks)
+    return max(1, n_workers)
+
+
+@contextmanager
+def shared_arrays(**arrays):
+    """
+    کپی آرایه‌ها در حافظه مشترک و برگرداندن handle قابل pickle برای هر کدام
+
+    handle ها به صورت (نام بلوک، shape، dtype) هستند و با attach_shared در کارگرها باز
+    می‌شوند. بلوک‌ها در پایان بلاک with آزاد می‌شوند.
+    """
+    blocks = []
+    handles = {}
+    try:
+        for key, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            blocks.append(shm)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+            handles[key] = (shm.name, array.shape, array.dtype.str)
+        yield handles
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+
+def attach_shared(handle):
+    """باز کردن (فقط خواندنی) آرایه حافظه مشترک در پردازه کارگر؛ اتصال‌ها کش می‌شوند."""
+    name, shape, dtype = handle
+    if name not in _ATTACHED:
+        shm = shared_memory.SharedMemory(name=name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        array.flags.writeable = False
+        _ATTACHED[name] = (array, shm)
+    return _ATTACHED[name][0]
+
+
+def _attach_all(handles):
+    for handle in handles.values():
+        attach_shared(handle)
+
+
+def shared_process_pool(n_workers, handles):
+    """Process Pool که کارگرهایش هنگام راه‌اندازی به آرایه‌های حافظه مشترک متصل می‌شوند."""
+    return ProcessPoolExecutor(max_workers=n_workers, initializer=_attach_all, initargs=(handles,))
@@ -0,0 +1,106 @@
+"""
+داده آموزشی با اندیس‌های از پیش مرتب هر ویژگی
+
+اندیس‌های مرتب (argsort پایدار هر ستون X) فقط یک بار ساخته و در آرایه int32 نگهداری
+می‌شوند؛ درخت اصلی، درخت‌های موقت تخمین FN و foldهای تخمین‌گرهای خارج از نمونه همگی
+زیرمجموعه‌های خود را با تقسیم پایدار همین اندیس‌ها (partition_sorted) به دست می‌آورند و
+هیچ‌کدام داده را دوباره مرتب نمی‌کنند. نمونه bootstrap جنگل تصادفی هم کپی نمی‌شود و به
+صورت وزن سطرها (with_sample_weight) روی همین داده و همین اندیس‌ها اعمال می‌شود.
+"""
+
+import numpy as np
+from utils.sparse import SparseColumns, is_sparse
+
+
+def partition_sorted(node_sorted, go_left):
+    """
+    تقسیم پایدار اندیس‌های مرتب یک گره بین دو فرزند بدون مرتب‌سازی دوباره
+
+    Parameters:
+    node_sorted : np.ndarray
+        ماتریس (تعداد نمونه گره × تعداد ویژگی) اندیس‌های مرتب هر ویژگی
+    go_left : np.ndarray
+        ماسک بولی روی کل سطرهای داده؛ True یعنی نمونه به فرزند چپ می‌رود
+
+    Returns:
+    tuple of np.ndarray
+        (left_sorted, right_sorted) با همان ترتیب مرتب در هر ستون
+    """
+    n_node, n_features = node_sorted.shape
+    left_mask = go_left[node_sorted]
+    n_left = int(left_mask[:, 0].sum()) if n_features > 0 else 0
+    left_sorted = node_sorted.T[left_mask.T].reshape(n_features, n_left).T
+    right_sorted = node_sorted.T[~left_mask.T].reshape(n_features, n_node - n_left).T
+    return left_sorted, right_sorted
+
+
+def argsort_columns(X):
+    """
+    اندیس‌های مرتب پایدار هر ستون X به صورت int32
+
+    برای SparseColumns فقط یک ستون (شماره سطرها به ترتیب صعودی) ساخته می‌شود؛ ترتیب
+    غیرصفرهای هر ویژگی در خود ماتریس است.
+    """
+    if isinstance(X, SparseColumns):
+        return np.arange(X.shape[0], dtype=np.int32)[:, None]
+    return np.argsort(X, axis=0, kind="mergesort").astype(np.int32)
+
+
+class PresortedDataset:
+    """
+    (X, y, sample_weight) به همراه اندیس‌های مرتب هر ویژگی که فقط یک بار ساخته می‌شوند
+
+    اندیس‌ها در اولین دسترسی به sorted_idx محاسبه می‌شوند (در حالت هیستوگرامی بدون نیاز
+    به آن‌ها هرگز ساخته نمی‌شوند). یک نمونه را می‌توان به جای X به fit مدل داد تا چند مدل
+    (مثلاً در جستجوی ابرپارامتر) از همان اندیس‌های مرتب استفاده کنند.
+
+    Parameters:
+    X : array-like
+        ماتریس ویژگی‌ها (بدون NaN)؛ ماتریس scipy.sparse به SparseColumns تبدیل می‌شود
+    y : array-like
+        برچسب‌ها
+    sample_weight : np.ndarray, optional
+        وزن هر سطر
+    sorted_idx : np.ndarray, optional
+        اندیس‌های مرتب از پیش محاسبه شده (مثلاً از حافظه مشترک)؛ بررسی NaN در این حالت
+        انجام نمی‌شود
+    """
+    def __init__(self, X, y, sample_weight=None, sorted_idx=None):
+        if is_sparse(X):
+            # SparseColumns خودش NaN را بررسی می‌کند
+            X = SparseColumns(X)
+        y = np.asarray(y)
+        if not isinstance(X, SparseColumns):
+            X = np.asarray(X, dtype=float)
+            if X.ndim != 2:
+                raise ValueError("X باید یک ماتریس دوبعدی باشد.")
+            if sorted_idx is None and np.any(np.isnan(X)):
+                raise ValueError("ورودی X شامل مقادیر NaN است.")
+        if X.shape[0] != y.shape[0]:
+            raise ValueError("تعداد سطرهای X و y برابر نیست.")
+        if sample_weight is not None:
+            sample_weight = np.asarray(sample_weight, dtype=float)
+        self.X = X
+        self.y = y
+        self.sample_weight = sample_weight
+        self._sorted_idx = sorted_idx
+
+    @property
+    def n_samples(self):
+        return self.X.shape[0]
+
+    @property
+    def sorted_idx(self):
+        """ماتریس (تعداد سطر × تعداد ویژگی) int32؛ ستون f ترتیب صعودی سطرها بر اساس ویژگی f است."""
+        if self._sorted_idx is None:
+            self._sorted_idx = argsort_columns(self.X)
+        return self._sorted_idx
+
+    @property
+    def is_sorted(self):
+        """آیا اندیس‌های مرتب ساخته شده‌اند."""
+        return self._sorted_idx is not None
+
+    def with_sample_weight(self, sample_weight):
+        """همین داده (و همین اندیس‌های مرتب) با وزن سطرهای دیگر."""
+        return PresortedDataset(self.X, self.y, sample_weight, self._sorted_idx)
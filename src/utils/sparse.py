@@ -0,0 +1,214 @@
+"""
+ورودی sparse (scipy.sparse) برای آموزش و پیش‌بینی بدون ساخت ماتریس چگال
+
+ماتریس‌های one-hot و ویژگی‌های پرکاردینال عمدتاً صفر هستند و تبدیل آن‌ها به آرایه چگال
+(و ماتریس اندیس‌های مرتب تعداد سطر × تعداد ویژگی) چند برابر حجم غیرصفرها حافظه می‌گیرد.
+این ماژول فقط با آرایه‌های فشرده (indptr، indices، data) کار می‌کند:
+
+- SparseMatrix: ماتریس CSR یا CSC که مقدار جفت‌های (سطر، ستون) را با یک جستجوی دودویی
+  برداری روی کلید مرتب غیرصفرها می‌خواند؛ پیمایش درخت در پیش‌بینی از همین استفاده می‌کند
+- SparseColumns: ماتریس CSC داده آموزشی که غیرصفرهای هر ستون یک بار بر اساس مقدار مرتب
+  می‌شوند. در جستجوی تقسیم هر گره فقط غیرصفرهای سطرهای گره پیمایش می‌شوند و همه صفرهای
+  ضمنی گره در هر ویژگی یک بلوک هستند (split_sweep.sparse_class_count_sweep)
+
+اندیس‌های مرتب داده sparse (presorted.argsort_columns) فقط یک ستون دارند: شماره سطرهای
+گره به ترتیب صعودی؛ ترتیب مقدار هر ستون در خود SparseColumns است. scipy در این ماژول
+import نمی‌شود؛ فقط کاربری که خودش ماتریس sparse می‌سازد آن را بارگذاری کرده است.
+"""
+
+import sys
+import numpy as np
+
+
+def is_sparse(x):
+    """آیا x ماتریس scipy.sparse است (اگر scipy.sparse بارگذاری نشده باشد، x نمی‌تواند sparse باشد)."""
+    sparse = sys.modules.get("scipy.sparse")
+    return sparse is not None and sparse.issparse(x)
+
+
+class SparseMatrix:
+    """
+    ماتریس فشرده CSR (سطرمحور، مناسب پیش‌بینی) یا CSC (ستون‌محور، مناسب آموزش)
+
+    Parameters:
+    X : scipy.sparse matrix یا sparse array
+        ماتریس ورودی؛ درایه‌های تکراری جمع و اندیس‌ها مرتب می‌شوند (روی یک کپی)
+    format : str, optional
+        "csr" یا "csc"؛ اگر داده نشود قالب X (اگر CSR یا CSC باشد) حفظ می‌شود و در غیر
+        این صورت CSR
+
+    Attributes:
+    indptr, indices, data : np.ndarray
+        آرایه‌های فشرده؛ data از نوع float64
+    """
+    ARRAY_FIELDS = ("shape", "indptr", "indices", "data")
+
+    def __init__(self, X, format=None):
+        if format is None:
+            format = X.format if X.format in ("csr", "csc") else "csr"
+        X = X.tocsr() if format == "csr" else X.tocsc()
+        if not X.has_canonical_format:
+            X = X.copy()
+            X.sum_duplicates()
+        self.format = format
+        self.shape = X.shape
+        self.indptr = X.indptr
+        self.indices = X.indices
+        self.data = np.asarray(X.data, dtype=float)
+        self._keys = None
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    def to_arrays(self):
+        """آرایه‌های ماتریس (برای حافظه مشترک)؛ shape هم به صورت آرایه است."""
+        return {name: np.asarray(getattr(self, name)) for name in self.ARRAY_FIELDS}
+
+    @classmethod
+    def from_arrays(cls, arrays, format="csc"):
+        """ساخت دوباره ماتریس از خروجی to_arrays بدون کپی آرایه‌ها."""
+        matrix = cls.__new__(cls)
+        matrix.format = format
+        matrix.shape = tuple(int(n) for n in arrays["shape"])
+        for name in cls.ARRAY_FIELDS[1:]:
+            setattr(matrix, name, arrays[name])
+        matrix._keys = None
+        return matrix
+
+    @property
+    def keys(self):
+        """کلید مرتب هر غیرصفر (int64): اندیس محور اصلی × طول محور فرعی + اندیس فرعی."""
+        if self._keys is None:
+            n_minor = self.shape[1] if self.format == "csr" else self.shape[0]
+            major = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int64), np.diff(self.indptr))
+            self._keys = major * n_minor + self.indices
+        return self._keys
+
+    def values_at(self, rows, cols):
+        """مقدار درایه‌های (rows[i], cols[i]) با یک جستجوی دودویی برداری؛ درایه‌های ضمنی صفر هستند."""
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        query = rows * self.shape[1] + cols if self.format == "csr" else cols * self.shape[0] + rows
+        values = np.zeros(len(query))
+        keys = self.keys
+        if len(keys) == 0:
+            return values
+        position = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+        hit = keys[position] == query
+        values[hit] = self.data[position[hit]]
+        return values
+
+    def column(self, f, rows):
+        """مقدار ویژگی f در سطرهای rows."""
+        return self.values_at(rows, np.full(len(rows), f))
+
+    def __getitem__(self, rows):
+        """
+        زیرماتریس سطرهای rows (slice یا آرایه اندیس) با همان قالب؛ در قالب CSC سطرها نباید
+        تکراری باشند.
+        """
+        rows = np.arange(self.shape[0])[rows]
+        shape = np.array([len(rows), self.shape[1]])
+        if self.format == "csr":
+            lengths = np.diff(self.indptr)[rows]
+            indptr = np.r_[0, np.cumsum(lengths)]
+            positions = np.repeat(self.indptr[rows] - indptr[:-1], lengths) + np.arange(indptr[-1])
+            return SparseMatrix.from_arrays(dict(shape=shape, indptr=indptr, indices=self.indices[positions],
+                                                 data=self.data[positions]), "csr")
+        new_row = np.full(self.shape[0], -1, dtype=np.intp)
+        new_row[rows] = np.arange(len(rows))
+        mapped = new_row[self.indices]
+        keep = mapped >= 0
+        column = np.repeat(np.arange(self.shape[1]), np.diff(self.indptr))[keep]
+        mapped = mapped[keep]
+        # اگر rows صعودی نباشد، سطرهای هر ستون دوباره مرتب می‌شوند
+        order = np.lexsort((mapped, column))
+        indptr = np.r_[0, np.cumsum(np.bincount(column, minlength=self.shape[1]))]
+        return SparseMatrix.from_arrays(dict(shape=shape, indptr=indptr, indices=mapped[order],
+                                             data=self.data[keep][order]), "csc")
+
+
+class SparseColumns(SparseMatrix):
+    """
+    ماتریس CSC داده آموزشی با غیرصفرهای هر ستون مرتب بر اساس مقدار
+
+    صفرهای صریح حذف می‌شوند تا همه صفرهای یک ستون در یک بلوک باشند. یک نسخه سطرمحور
+    (CSR) غیرصفرها هم نگهداری می‌شود تا غیرصفرهای گره‌های کوچک بدون پیمایش همه غیرصفرها
+    جمع شوند. حافظه آن از مرتبه تعداد غیرصفرها است، نه تعداد سطر × تعداد ویژگی.
+
+    Attributes:
+    sorted_rows, sorted_values : np.ndarray
+        سطر و مقدار غیرصفرهای هر ستون f (بازه indptr[f]:indptr[f+1]) به ترتیب صعودی مقدار؛
+        مقادیر برابر به ترتیب شماره سطر می‌آیند
+    row_indptr, row_columns, row_values : np.ndarray
+        همان غیرصفرها به صورت CSR
+    """
+    ARRAY_FIELDS = SparseMatrix.ARRAY_FIELDS + ("sorted_rows", "sorted_values", "row_indptr", "row_columns",
+                                                "row_values")
+
+    def __init__(self, X):
+        super().__init__(X, "csc")
+        if np.isnan(self.data).any():
+            raise ValueError("ورودی X شامل مقادیر NaN است.")
+        column = np.repeat(np.arange(self.shape[1], dtype=np.int32), np.diff(self.indptr))
+        nonzero = self.data != 0
+        if not nonzero.all():
+            # صفرهای صریح جزء بلوک صفرهای ضمنی هستند
+            column = column[nonzero]
+            counts = np.bincount(column, minlength=self.shape[1])
+            self.indptr = np.r_[0, np.cumsum(counts)].astype(self.indptr.dtype)
+            self.indices = self.indices[nonzero]
+            self.data = self.data[nonzero]
+        # lexsort پایدار است: در مقادیر برابر ترتیب CSC (شماره سطر صعودی) حفظ می‌شود
+        order = np.lexsort((self.data, column))
+        self.sorted_rows = self.indices[order]
+        self.sorted_values = self.data[order]
+        order = np.argsort(self.indices, kind="stable")
+        self.row_indptr = np.r_[0, np.cumsum(np.bincount(self.indices, minlength=self.shape[0]))]
+        self.row_columns = column[order]
+        self.row_values = self.data[order]
+
+    def node_nonzeros(self, rows, in_node, features=None):
+        """
+        غیرصفرهای سطرهای یک گره به ترتیب (ویژگی، مقدار)؛ مقادیر برابر به ترتیب شماره سطر
+
+        in_node ماسک بولی سطرهای rows روی کل داده است. اگر غیرصفرهای سطرهای گره نسبت به کل
+        غیرصفرها کم باشند، از نسخه CSR جمع و فقط همان‌ها مرتب می‌شوند؛ وگرنه غیرصفرهای از
+        پیش مرتب همه ستون‌ها با in_node فیلتر می‌شوند (بدون مرتب‌سازی).
+
+        Parameters:
+        features : array-like, optional
+            فقط غیرصفرهای این ویژگی‌ها (None یعنی همه ویژگی‌ها)
+
+        Returns:
+        tuple
+            (columns, values, nonzero_rows)
+        """
+        selected = None
+        if features is not None and len(features) < self.shape[1]:
+            selected = np.zeros(self.shape[1], dtype=bool)
+            selected[np.asarray(features, dtype=np.intp)] = True
+        lengths = np.diff(self.row_indptr)[rows]
+        n_gathered = int(lengths.sum())
+        if n_gathered * np.log2(max(n_gathered, 2)) < self.nnz:
+            starts = np.cumsum(lengths) - lengths
+            positions = np.repeat(self.row_indptr[rows] - starts, lengths) + np.arange(n_gathered)
+            columns, values = self.row_columns[positions], self.row_values[positions]
+            nonzero_rows = np.repeat(np.asarray(rows), lengths)
+            if selected is not None:
+                keep = selected[columns]
+                columns, values, nonzero_rows = columns[keep], values[keep], nonzero_rows[keep]
+            order = np.lexsort((values, columns))
+            return columns[order], values[order], nonzero_rows[order]
+        keep = in_node[self.sorted_rows]
+        if selected is not None:
+            keep &= np.repeat(selected, np.diff(self.indptr))
+        # ستون غیرصفرهای باقی‌مانده از تعداد آن‌ها در بازه هر ستون
+        kept = np.r_[0, np.cumsum(keep)]
+        counts = kept[self.indptr[1:]] - kept[self.indptr[:-1]]
+        columns = np.repeat(np.arange(self.shape[1], dtype=np.int32), counts)
+        return columns, self.sorted_values[keep], self.sorted_rows[keep]
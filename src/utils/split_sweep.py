@@ -0,0 +1,285 @@
+import numpy as np
+from criteria.fused import fused_scores, is_fusable
+from criteria.registry import get_count_kernel
+from utils.instrumentation import NULL_STATS
+
+
+def class_count_sweep(values, y_codes, n_classes, order=None, sample_weight=None):
+    """
+    ساخت ماتریس‌های تجمعی شمارش کلاس برای همه آستانه‌های یک ویژگی در یک گذر
+
+    - ویژگی فقط یک بار مرتب می‌شود (یا ترتیب از پیش محاسبه شده استفاده می‌شود)
+    - برای هر آستانه، شاخه چپ نمونه‌های با مقدار <= آستانه است
+
+    Parameters:
+    values : np.ndarray
+        مقادیر یک ویژگی در گره
+    y_codes : np.ndarray
+        اندیس کلاس هر نمونه (0 تا n_classes-1)
+    n_classes : int
+        تعداد کلاس‌ها
+    order : np.ndarray, optional
+        اندیس‌های مرتب‌سازی values؛ اگر داده نشود محاسبه می‌شود
+    sample_weight : np.ndarray, optional
+        وزن هر نمونه (هم‌تراز با values)؛ شمارش‌ها مجموع وزن نمونه‌ها می‌شوند
+
+    Returns:
+    tuple
+        (thresholds, left_counts, right_counts, boundaries) که left_counts و right_counts
+        ماتریس‌های (تعداد آستانه × تعداد کلاس) هستند و boundaries مکان هر آستانه
+        در ترتیب مرتب را نشان می‌دهد
+    """
+    values = np.asarray(values)
+    y_codes = np.asarray(y_codes)
+    if order is None:
+        order = np.argsort(values, kind="mergesort")
+    sorted_values = values[order]
+    sorted_codes = y_codes[order]
+
+    n_samples = len(sorted_values)
+    cumulative = np.zeros((n_samples, n_classes))
+    cumulative[np.arange(n_samples), sorted_codes] = 1.0 if sample_weight is None else sample_weight[order]
+    np.cumsum(cumulative, axis=0, out=cumulative)
+
+    # فقط مرز بین دو مقدار متمایز یک آستانه معتبر است
+    boundaries = np.nonzero(sorted_values[:-1] != sorted_values[1:])[0]
+    left_counts = cumulative[boundaries]
+    right_counts = cumulative[-1] - left_counts
+    return sorted_values[boundaries], left_counts, right_counts, boundaries
+
+
+def grouped_class_count_sweep(values, y_codes, n_classes, order, group_sizes, sample_weight=None):
+    """
+    نسخه چندگره‌ای class_count_sweep برای یک ویژگی (رشد سطح‌به‌سطح درخت)
+
+    order سطرهای چند گره است که پشت سر هم (به ترتیب گره) و داخل هر گره به ترتیب صعودی
+    مقدار ویژگی آمده‌اند؛ group_sizes تعداد سطرهای هر گره است. ماتریس تجمعی شمارش فقط
+    یک بار برای همه گره‌ها ساخته می‌شود و شمارش هر گره با کم کردن مقدار تجمعی پیش از
+    شروع آن به دست می‌آید؛ آستانه‌ها مرز دو مقدار متمایز داخل یک گره هستند.
+
+    Returns:
+    tuple
+        (groups, boundaries, thresholds, left_counts, right_counts) که groups گره هر
+        کاندید و boundaries مکان آن در order است
+    """
+    values = np.asarray(values)
+    sorted_values = values[order]
+    sorted_codes = np.asarray(y_codes)[order]
+    group_sizes = np.asarray(group_sizes)
+
+    n_samples = len(sorted_values)
+    cumulative = np.zeros((n_samples, n_classes))
+    cumulative[np.arange(n_samples), sorted_codes] = 1.0 if sample_weight is None else sample_weight[order]
+    np.cumsum(cumulative, axis=0, out=cumulative)
+
+    ends = np.cumsum(group_sizes)
+    starts = ends - group_sizes
+    group_of = np.repeat(np.arange(len(group_sizes)), group_sizes)
+    boundaries = np.nonzero((sorted_values[:-1] != sorted_values[1:]) & (group_of[:-1] == group_of[1:]))[0]
+
+    # مقدار تجمعی پیش از شروع هر گره و مجموع شمارش هر گره
+    offsets = np.zeros((len(group_sizes), n_classes))
+    offsets[starts > 0] = cumulative[starts[starts > 0] - 1]
+    totals = np.zeros_like(offsets)
+    totals[group_sizes > 0] = cumulative[ends[group_sizes > 0] - 1] - offsets[group_sizes > 0]
+
+    groups = group_of[boundaries]
+    left_counts = cumulative[boundaries] - offsets[groups]
+    right_counts = totals[groups] - left_counts
+    return groups, boundaries, sorted_values[boundaries], left_counts, right_counts
+
+
+def sparse_class_count_sweep(columns, values, y_codes, n_features, n_classes, node_counts, n_node,
+                             sample_weight=None):
+    """
+    نسخه sparse class_count_sweep برای همه ویژگی‌های یک گره با هم
+
+    فقط غیرصفرهای گره (به ترتیب ویژگی و سپس مقدار) داده می‌شوند؛ صفرهای ضمنی هر ویژگی یک
+    بلوک با مقدار صفر بین غیرصفرهای منفی و مثبت همان ویژگی هستند که شمارش کلاس آن
+    node_counts منهای شمارش غیرصفرهای ویژگی است. ماتریس تجمعی شمارش یک بار برای همه
+    ویژگی‌ها ساخته می‌شود (مثل grouped_class_count_sweep)؛ آستانه‌ها و شمارش‌های هر ویژگی با
+    class_count_sweep روی ستون چگال گره یکسان‌اند.
+
+    Parameters:
+    columns, values : np.ndarray
+        ویژگی و مقدار غیرصفرهای گره، مرتب بر اساس (ویژگی، مقدار)
+    y_codes : np.ndarray
+        اندیس کلاس هر غیرصفر
+    n_features, n_classes : int
+        تعداد ویژگی‌ها و کلاس‌ها
+    node_counts : np.ndarray
+        شمارش (وزنی) کلاس‌های همه سطرهای گره
+    n_node : int
+        تعداد سطرهای گره
+    sample_weight : np.ndarray, optional
+        وزن هر غیرصفر
+
+    Returns:
+    tuple
+        (groups, thresholds, left_counts, right_counts) که groups ویژگی هر کاندید است و
+        کاندیدها به ترتیب ویژگی و سپس آستانه هستند
+    """
+    n_nonzero = np.bincount(columns, minlength=n_features)
+    n_negative = np.bincount(columns[values < 0], minlength=n_features)
+    has_zeros = n_nonzero < n_node
+    # دنباله هر ویژگی: غیرصفرهای منفی، بلوک صفرها (اگر ویژگی در گره صفر داشته باشد) و غیرصفرهای مثبت
+    sizes = n_nonzero + has_zeros
+    starts = np.cumsum(sizes) - sizes
+    local = np.arange(len(values)) - (np.cumsum(n_nonzero) - n_nonzero)[columns]
+    slots = starts[columns] + local + ((values > 0) & has_zeros[columns])
+    sequence = np.zeros(int(sizes.sum()))
+    sequence[slots] = values
+    increments = np.zeros((len(sequence), n_classes))
+    increments[slots, y_codes] = 1.0 if sample_weight is None else sample_weight
+    nonzero_counts = np.bincount(columns * n_classes + y_codes, sample_weight,
+                                 minlength=n_features * n_classes).reshape(n_features, n_classes)
+    zero_features = np.flatnonzero(has_zeros)
+    increments[starts[zero_features] + n_negative[zero_features]] = node_counts - nonzero_counts[zero_features]
+    cumulative = np.cumsum(increments, axis=0)
+
+    group_of = np.repeat(np.arange(n_features), sizes)
+    boundaries = np.nonzero((sequence[:-1] != sequence[1:]) & (group_of[:-1] == group_of[1:]))[0]
+    # مقدار تجمعی پیش از شروع هر ویژگی؛ مجموع هر ویژگی همان شمارش کل گره است
+    offsets = np.zeros((n_features, n_classes))
+    offsets[starts > 0] = cumulative[starts[starts > 0] - 1]
+    groups = group_of[boundaries]
+    left_counts = cumulative[boundaries] - offsets[groups]
+    right_counts = (cumulative[starts[groups] + sizes[groups] - 1] - offsets[groups]) - left_counts
+    return groups, sequence[boundaries], left_counts, right_counts
+
+
+def criterion_score_matrix(criteria, left_counts, right_counts, label_splits=None, stats=NULL_STATS):
+    """
+    محاسبه امتیاز خام همه معیارها روی همه تقسیم‌های کاندید به صورت عبارت‌های آرایه‌ای
+
+    معیارهای داخلی (که هسته آن‌ها در criteria.fused نسخه ترکیبی دارد) با هم و در یک
+    گذر با مقادیر میانی مشترک محاسبه می‌شوند؛ بقیه جداگانه.
+
+    Parameters:
+    criteria : list
+        لیست (نام، تابع) معیارها
+    left_counts, right_counts : np.ndarray
+        ماتریس‌های (تعداد کاندید × تعداد کلاس)
+    label_splits : callable, optional
+        تابعی که با گرفتن اندیس کاندید، (y_left, y_right) یا در حالت وزنی
+        (y_left, y_right, sample_weight_left, sample_weight_right) را برمی‌گرداند؛ فقط برای
+        معیارهایی که هسته شمارش‌محور ندارند استفاده می‌شود
+    stats : FitStats, optional
+        زمان امتیازدهی معیارهای ترکیبی با نام criteria:fused و هر معیار دیگر با نام
+        criterion:<نام معیار> در آن جمع می‌شود
+
+    Returns:
+    np.ndarray
+        ماتریس (تعداد کاندید × تعداد معیار)
+    """
+    n_candidates = len(left_counts)
+    raw_scores = np.zeros((n_candidates, len(criteria)))
+    kernels = [get_count_kernel(func) for _, func in criteria]
+    fused = [j for j, kernel in enumerate(kernels) if is_fusable(kernel)]
+    if fused:
+        with stats.timer("criteria:fused"):
+            raw_scores[:, fused] = fused_scores(left_counts, right_counts, [kernels[j] for j in fused])
+
+    for j, (name, func) in enumerate(criteria):
+        kernel = kernels[j]
+        if is_fusable(kernel):
+            continue
+        with stats.timer(f"criterion:{name}"):
+            try:
+                if kernel is not None:
+                    raw_scores[:, j] = kernel(left_counts, right_counts)
+                elif label_splits is not None:
+                    raw_scores[:, j] = [float(func(*label_splits(t))) for t in range(n_candidates)]
+            except Exception:
+                raw_scores[:, j] = 0.0
+    return raw_scores
+
+
+def score_candidates(criteria, weights, left_counts, right_counts, label_splits=None, stats=NULL_STATS):
+    """
+    امتیاز وزنی نهایی همه تقسیم‌های کاندید در یک مسیر: امتیاز خام معیارها
+    (criterion_score_matrix)، نرمال‌سازی Min-Max هر سطر (بین معیارها) و میانگین وزنی
+
+    نسخه برداری همان مراحل ۲ تا ۴ متد WeightedVotingMetric.evaluate است؛ نرمال‌سازی درجا
+    روی ماتریس امتیازها انجام می‌شود و آرایه میانی دیگری ساخته نمی‌شود.
+    """
+    raw_scores = criterion_score_matrix(criteria, left_counts, right_counts, label_splits, stats)
+    min_score = raw_scores.min(axis=1, keepdims=True)
+    spread = raw_scores.max(axis=1, keepdims=True)
+    spread -= min_score
+    valid = spread > 1e-9
+    raw_scores -= min_score
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(raw_scores, spread, out=raw_scores, where=valid)
+    raw_scores[~valid[:, 0]] = 0.5
+
+    return _weighted_mean(raw_scores, weights)
+
+
+def _weighted_mean(scores, weights):
+    """
+    ترکیب وزنی ستون‌های ماتریس امتیاز (یا میانگین ساده اگر مجموع وزن‌ها صفر باشد)
+
+    جمع ستون به ستون انجام می‌شود تا امتیاز هر کاندید مستقل از تعداد سطرهای ماتریس باشد
+    (ضرب ماتریسی BLAS بسته به اندازه دسته ترتیب جمع متفاوتی دارد)؛ بنابراین امتیازدهی
+    دسته‌ای کاندیدهای چند گره (رشد سطح‌به‌سطح) همان امتیاز امتیازدهی جداگانه هر گره است.
+    """
+    weights = np.asarray(weights, dtype=float)
+    divisor = 1.0
+    if not weights.sum() > 0:
+        weights = np.ones(scores.shape[1])
+        divisor = float(scores.shape[1])
+    total = np.zeros(len(scores))
+    for j, weight in enumerate(weights):
+        total += scores[:, j] * weight
+    return total / divisor if divisor != 1.0 else total
+
+
+def score_sorted_feature(metric, values, y, y_codes, n_classes, order, sample_weight=None):
+    """
+    امتیازدهی همه آستانه‌های یک ویژگی وقتی ترتیب مرتب نمونه‌های گره از قبل معلوم است
+
+    values، y و y_codes می‌توانند آرایه‌های کل داده باشند؛ order اندیس نمونه‌های گره
+    به ترتیب صعودی مقدار ویژگی است.
+
+    مطابق CustomDecisionTreeClassifier، نقش y_left در امتیازدهی را نمونه‌های با
+    مقدار بزرگ‌تر از آستانه بازی می‌کنند (split = values > threshold).
+
+    Returns:
+    tuple
+        (thresholds, scores) که scores بردار امتیاز وزنی هر آستانه است
+    """
+    thresholds, left_counts, right_counts, boundaries = class_count_sweep(
+        values, y_codes, n_classes, order, sample_weight
+    )
+    if len(thresholds) == 0:
+        return thresholds, np.zeros(0)
+
+    def label_splits(t):
+        sorted_y = y[order]
+        if sample_weight is None:
+            return sorted_y[boundaries[t] + 1:], sorted_y[:boundaries[t] + 1]
+        sorted_w = sample_weight[order]
+        return (sorted_y[boundaries[t] + 1:], sorted_y[:boundaries[t] + 1],
+                sorted_w[boundaries[t] + 1:], sorted_w[:boundaries[t] + 1])
+
+    return thresholds, metric.evaluate_counts(right_counts, left_counts, label_splits)
+
+
+def sweep_feature(metric, values, y, classes=None, sample_weight=None):
+    """
+    امتیازدهی همه آستانه‌های یک ویژگی با یک متریک (WeightedVotingMetric یا SingleCriterionMetric)
+    (با sample_weight امتیازها از روی شمارش‌های وزنی کلاس‌ها محاسبه می‌شوند)
+
+    Returns:
+    tuple
+        (thresholds, scores) که scores بردار امتیاز وزنی هر آستانه است
+    """
+    values = np.asarray(values)
+    y = np.asarray(y)
+    if classes is None:
+        classes = np.unique(y)
+    if sample_weight is not None:
+        sample_weight = np.asarray(sample_weight, dtype=float)
+    order = np.argsort(values, kind="mergesort")
+    return score_sorted_feature(metric, values, y, np.searchsorted(classes, y), len(classes), order, sample_weight)
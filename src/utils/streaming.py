@@ -0,0 +1,188 @@
+"""
+پیش‌بینی جریانی روی فایل‌های CSV/Parquet با حافظه محدود
+
+فایل ورودی تکه‌به‌تکه خوانده می‌شود، هر تکه به چینش ویژگی‌های زمان آموزش
+(feature_names_in_ مدل) تبدیل می‌شود، پیش‌بینی می‌شود و نتیجه بلافاصله در فایل خروجی
+نوشته می‌شود؛ بنابراین حافظه مصرفی به اندازه یک تکه است نه کل جدول.
+
+خواندن و نوشتن Parquet به pyarrow نیاز دارد که فقط در صورت استفاده import می‌شود.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 100_000
+# تعداد سطرهای نمونه برای تخمین حجم هر سطر هنگام تعیین max_memory_mb
+_PROBE_ROWS = 1_000
+
+
+def _is_parquet(path):
+    return os.fspath(path).lower().endswith((".parquet", ".pq"))
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("برای خواندن/نوشتن فایل Parquet باید pyarrow نصب باشد.") from e
+    return pyarrow
+
+
+def _read_probe(path, n_rows):
+    if _is_parquet(path):
+        pa = _require_pyarrow()
+        batch = next(pa.parquet.ParquetFile(path).iter_batches(batch_size=n_rows), None)
+        return pd.DataFrame() if batch is None else batch.to_pandas()
+    return pd.read_csv(path, nrows=n_rows)
+
+
+def resolve_chunk_size(path, chunk_size=DEFAULT_CHUNK_SIZE, max_memory_mb=None, n_outputs=1):
+    """
+    تعداد سطرهای هر تکه
+
+    اگر max_memory_mb داده شود، حجم هر سطر از روی چند سطر اول فایل تخمین زده می‌شود
+    (DataFrame خوانده شده + ماتریس float ویژگی‌ها + خروجی‌ها) و تکه طوری کوچک می‌شود
+    که از این سقف بیشتر نشود.
+    """
+    if chunk_size is None or chunk_size < 1:
+        raise ValueError("chunk_size باید عدد صحیح مثبت باشد.")
+    if max_memory_mb is None:
+        return chunk_size
+    probe = _read_probe(path, _PROBE_ROWS)
+    if len(probe) == 0:
+        return chunk_size
+    frame_bytes = probe.memory_usage(index=True, deep=True).sum() / len(probe)
+    row_bytes = 2 * frame_bytes + 8 * (probe.shape[1] + n_outputs)
+    return max(1, min(chunk_size, int(max_memory_mb * 1024 ** 2 // row_bytes)))
+
+
+def iter_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, **read_kwargs):
+    """تکه‌های DataFrame فایل CSV یا Parquet؛ read_kwargs به pd.read_csv داده می‌شود."""
+    if _is_parquet(path):
+        pa = _require_pyarrow()
+        for batch in pa.parquet.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, **read_kwargs)
+
+
+def _is_text(dtype):
+    """ستون متنی یا دسته‌ای (object، str/string یا category)."""
+    return (pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)
+            or isinstance(dtype, pd.CategoricalDtype))
+
+
+def to_feature_matrix(chunk, feature_names=None, category_encoder=None, n_features=None):
+    """
+    تبدیل یک تکه به ماتریس ویژگی‌ها با چینش زمان آموزش
+
+    ستون‌های متنی که ستون‌های یک‌داغ آن‌ها (<نام>_<دسته>) جزء feature_names است مثل
+    pd.get_dummies یک‌داغ می‌شوند و سپس ستون‌ها به ترتیب feature_names مرتب می‌شوند؛
+    دسته‌هایی که در این تکه دیده نشده‌اند با صفر پر می‌شوند و ستون‌های دیگر (مثلاً شناسه
+    متنی هر سطر) کنار گذاشته می‌شوند. اگر feature_names نامعلوم باشد (مدل روی آرایه NumPy
+    آموزش دیده)، همه ستون‌ها به همان ترتیب فایل استفاده می‌شوند و تعداد آن‌ها باید
+    n_features باشد. ستون‌هایی که خودشان ویژگی مدل هستند (ستون‌های دسته‌ای مدل) یک‌داغ
+    نمی‌شوند و با category_encoder به کد دسته‌ها تبدیل می‌شوند.
+    """
+    if feature_names is None:
+        if n_features is not None and chunk.shape[1] != n_features:
+            raise ValueError(f"فایل ورودی {chunk.shape[1]} ستون ویژگی دارد اما مدل با {n_features} "
+                             "ویژگی آموزش دیده است.")
+        return chunk.to_numpy(dtype=float) if category_encoder is None else category_encoder.transform(chunk)
+    missing = [name for name in feature_names if name not in chunk.columns]
+    if missing:
+        categorical = [name for name in chunk.columns
+                       if _is_text(chunk[name].dtype) and name not in feature_names
+                       and any(feature.startswith(f"{name}_") for feature in missing)]
+        if categorical:
+            chunk = pd.get_dummies(chunk[[name for name in chunk.columns
+                                          if name in feature_names or name in categorical]],
+                                   columns=categorical)
+    chunk = chunk.reindex(columns=feature_names, fill_value=0)
+    return chunk.to_numpy(dtype=float) if category_encoder is None else category_encoder.transform(chunk)
+
+
+class _ChunkWriter:
+    """نوشتن افزایشی تکه‌های خروجی در فایل CSV یا Parquet."""
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.parquet = _is_parquet(path)
+        self._writer = None
+        self._first = True
+
+    def write(self, frame):
+        if self.parquet:
+            pa = _require_pyarrow()
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pa.parquet.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="w" if self._first else "a", header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._first:
+            # فایل ورودی خالی: فقط سرستون‌های خروجی نوشته می‌شوند
+            self.write(pd.DataFrame(columns=self.columns))
+        if self._writer is not None:
+            self._writer.close()
+
+
+def predict_file(model, input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, max_memory_mb=None,
+                 proba=False, keep_columns=None, **read_kwargs):
+    """
+    پیش‌بینی جریانی یک فایل CSV/Parquet و نوشتن افزایشی نتیجه
+
+    Parameters:
+    model : WeightedDecisionTreeModel
+        مدل آموزش‌دیده؛ اگر روی DataFrame آموزش دیده باشد ستون‌ها با feature_names_in_ آن
+        هم‌تراز می‌شوند
+    input_path, output_path : str
+        مسیر فایل‌ها؛ پسوند .parquet یا .pq یعنی Parquet و در غیر این صورت CSV
+    chunk_size : int
+        حداکثر تعداد سطرهای هر تکه
+    max_memory_mb : float, optional
+        سقف تقریبی حافظه هر تکه؛ در صورت لزوم chunk_size کوچک‌تر می‌شود
+    proba : bool
+        اگر True باشد احتمال هر کلاس هم در ستون‌های proba_<کلاس> نوشته می‌شود
+    keep_columns : list, optional
+        ستون‌هایی از ورودی (مثلاً شناسه مشتری) که عیناً به خروجی منتقل می‌شوند
+
+    Returns:
+    int
+        تعداد سطرهای پیش‌بینی شده
+    """
+    if model.model is None:
+        raise ValueError("مدل هنوز آموزش داده نشده است.")
+    classes = model.model.classes
+    n_outputs = 1 + (len(classes) if proba else 0)
+    chunk_size = resolve_chunk_size(input_path, chunk_size, max_memory_mb, n_outputs)
+    feature_names = getattr(model, "feature_names_in_", None)
+    category_encoder = getattr(model, "category_encoder", None)
+    keep_columns = list(keep_columns or [])
+    # ستون‌های منتقل‌شده به خروجی قبل از تبدیل کنار گذاشته می‌شوند، مگر خودشان ویژگی مدل باشند
+    drop_columns = [name for name in keep_columns if feature_names is None or name not in feature_names]
+    n_features = getattr(model, "n_features_in_", None)
+
+    output_columns = keep_columns + ["prediction"] + ([f"proba_{label}" for label in classes] if proba else [])
+    writer = _ChunkWriter(output_path, output_columns)
+    n_rows = 0
+    try:
+        for chunk in iter_chunks(input_path, chunk_size, **read_kwargs):
+            features = to_feature_matrix(chunk.drop(columns=drop_columns), feature_names, category_encoder,
+                                         n_features)
+            probas = model.model.predict_proba(features)
+            result = chunk[keep_columns].reset_index(drop=True)
+            result["prediction"] = classes[np.argmax(probas, axis=1)]
+            if proba:
+                for j, label in enumerate(classes):
+                    result[f"proba_{label}"] = probas[:, j]
+            writer.write(result)
+            n_rows += len(chunk)
+    finally:
+        writer.close()
+    return n_rows
@@ -0,0 +1,50 @@
+"""
+تنظیمات مشترک تست‌ها
+
+مثل بقیه پروژه، ماژول‌ها با src روی sys.path import می‌شوند (from model...، from utils...)
+و ریشه پروژه هم برای بسته benchmarks اضافه می‌شود.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+for path in (os.path.join(PROJECT_ROOT, "src"), PROJECT_ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def _assert_same_tree(tree, expected):
+    """
+    ساختار، ویژگی، آستانه (یا دسته‌های فرزند چپ) هر گره و توزیع کلاس برگ‌ها در دو درخت
+    (Tree) یکسان باشد
+
+    گره‌ها از ریشه به صورت هم‌زمان پیمایش می‌شوند، پس ترتیب شماره‌گذاری گره‌ها (مثلاً در
+    رشد سطح‌به‌سطح) اهمیتی ندارد.
+    """
+    tree, expected = tree.to_arrays(), expected.to_arrays()
+    stack = [(0, 0, "root")]
+    while stack:
+        node, other, path = stack.pop()
+        assert tree["feature"][node] == expected["feature"][other], path
+        np.testing.assert_allclose(tree["value"][node], expected["value"][other], err_msg=path)
+        if expected["children_left"][other] == -1:
+            assert tree["children_left"][node] == -1, path
+            continue
+        # گره دسته‌ای آستانه NaN و bitset دسته‌های فرزند چپ دارد
+        assert tree["threshold"][node] == pytest.approx(expected["threshold"][other], nan_ok=True), path
+        if "category_bitset" in expected:
+            np.testing.assert_array_equal(tree["category_bitset"][node], expected["category_bitset"][other],
+                                          err_msg=path)
+        stack.append((tree["children_left"][node], expected["children_left"][other], path + "/L"))
+        stack.append((tree["children_right"][node], expected["children_right"][other], path + "/R"))
+    assert len(tree["feature"]) == len(expected["feature"])
+    assert ("category_bitset" in tree) == ("category_bitset" in expected)
+
+
+@pytest.fixture
+def assert_same_tree():
+    return _assert_same_tree
@@ -0,0 +1,66 @@
+"""
+تقسیم‌های دسته‌ای (categorical_features): دسته‌ها با نرخ کلاس مثبت مرتب و با یک bitset به
+فرزند چپ فرستاده می‌شوند.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from model.weighted_decision_tree import WeightedDecisionTreeModel
+
+
+def _frame(n_rows=1500, seed=2):
+    rng = np.random.default_rng(seed)
+    city = rng.integers(0, 12, n_rows)
+    # مقادیر گرد شده تا بازه‌های max_bins بدون اتلاف باشند
+    num = rng.normal(size=n_rows).round(1)
+    rate = np.linspace(0.05, 0.95, 12)[rng.permutation(12)]
+    y = (rng.random(n_rows) < 0.9 * rate[city] + 0.1 * (num > 0)).astype(int)
+    X = pd.DataFrame({"num": num, "city": np.array(list("abcdefghijkl"))[city]})
+    return X, y
+
+
+def _categorical_nodes(model):
+    tree = model.model
+    return int(np.sum(np.isnan(tree.threshold) & (tree.feature >= 0)))
+
+
+def test_categorical_split_is_used_and_predicts_unknown_categories():
+    X, y = _frame()
+    model = WeightedDecisionTreeModel(max_depth=4, fn_estimator="stump", categorical_features=["city"])
+    model.fit(X, y)
+    assert _categorical_nodes(model) > 0
+    unseen = X.head(5).assign(city=["zz", None, "a", "b", "zz"])
+    assert model.predict_proba(unseen).shape == (5, 2)
+
+
+def test_binary_category_matches_numeric_split():
+    # با دو دسته تنها تقسیم دسته‌ای همان تقسیم آستانه‌ای روی کد دسته است
+    rng = np.random.default_rng(2)
+    X = np.c_[rng.normal(size=600).round(1), rng.integers(0, 2, 600)]
+    y = (X[:, 0] + X[:, 1] + rng.normal(scale=0.5, size=600) > 0.5).astype(int)
+    numeric = WeightedDecisionTreeModel(max_depth=4, fn_estimator="stump")
+    categorical = WeightedDecisionTreeModel(max_depth=4, fn_estimator="stump", categorical_features=[1])
+    numeric.fit(X, y)
+    categorical.fit(X, y)
+    np.testing.assert_allclose(categorical.predict_proba(X), numeric.predict_proba(X))
+
+
+@pytest.mark.parametrize("kwargs", [{"max_bins": 255}, {"growth": "level"}])
+def test_categorical_modes_match_exact(kwargs):
+    X, y = _frame()
+    weights = np.random.default_rng(3).integers(1, 4, len(y)).astype(float)
+    exact = WeightedDecisionTreeModel(max_depth=4, fn_estimator="stump", categorical_features=["city"])
+    other = WeightedDecisionTreeModel(max_depth=4, fn_estimator="stump", categorical_features=["city"], **kwargs)
+    exact.fit(X, y, sample_weight=weights)
+    other.fit(X, y, sample_weight=weights)
+    assert _categorical_nodes(exact) > 0
+    np.testing.assert_allclose(other.predict_proba(X), exact.predict_proba(X))
+
+
+def test_too_many_categories_for_max_bins():
+    X, y = _frame()
+    model = WeightedDecisionTreeModel(max_depth=2, fn_estimator="stump", categorical_features=["city"], max_bins=8)
+    with pytest.raises(ValueError):
+        model.fit(X, y)
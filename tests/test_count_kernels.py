@@ -0,0 +1,108 @@
+"""
+هسته‌های شمارش‌محور معیارها باید همان امتیاز نسخه برچسب‌محور (y_left, y_right) را بدهند،
+مسیر ترکیبی (criteria.fused) دقیقاً همان امتیاز هسته‌ها را بدهد و درخت ساخته شده با هسته
+همان درخت مسیر برچسب‌محور باشد.
+"""
+
+import warnings
+
+import numpy as np
+import pytest
+
+from criteria.base import class_counts
+from criteria.fused import FUSED_SCORERS, CountStatistics, fused_scores
+from criteria.registry import CRITERIA, get_count_kernel, get_criterion
+from model.tree_builder import TreeBuilder
+from model.weighted_decision_tree import SingleCriterionMetric
+
+# معیارهای دودویی (فقط دو کلاس اول به ترتیب مرتب را می‌خوانند)
+BINARY_CRITERIA = {"marshall"}
+
+
+@pytest.mark.parametrize("name", sorted(CRITERIA))
+def test_kernel_matches_label_criterion(name):
+    criterion = get_criterion(name)
+    kernel = get_count_kernel(criterion)
+    rng = np.random.default_rng(0)
+    for trial in range(200):
+        n_classes = 2 if name in BINARY_CRITERIA else int(rng.integers(2, 5))
+        y_left = rng.integers(0, n_classes, int(rng.integers(1, 15)))
+        y_right = rng.integers(0, n_classes, int(rng.integers(1, 15)))
+        classes = np.arange(n_classes) if trial % 2 else None
+        _, left_counts, right_counts = class_counts(y_left, y_right, classes)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            expected = float(criterion(y_left, y_right))
+        assert np.isclose(kernel(left_counts, right_counts), expected, atol=1e-9, equal_nan=True), (y_left, y_right)
+
+
+@pytest.mark.parametrize("labels", [(1, 2), ("no", "yes"), ("a", "b", "c")])
+@pytest.mark.parametrize("name", ["marshall", "kolmogorov_smirnov"])
+def test_kernel_matches_label_criterion_for_any_labels(name, labels):
+    # ستون‌های شمارش به ترتیب کلاس‌های مرتب هستند، نه مقدار برچسب‌ها (0/1)
+    if name in BINARY_CRITERIA and len(labels) > 2:
+        pytest.skip("معیار دودویی")
+    criterion = get_criterion(name)
+    kernel = get_count_kernel(criterion)
+    labels = np.array(labels)
+    rng = np.random.default_rng(4)
+    for _ in range(100):
+        y_left = labels[rng.integers(0, len(labels), int(rng.integers(1, 12)))]
+        y_right = labels[rng.integers(0, len(labels), int(rng.integers(1, 12)))]
+        expected = float(criterion(y_left, y_right))
+        _, left_counts, right_counts = class_counts(y_left, y_right, labels)
+        assert kernel(left_counts, right_counts) == pytest.approx(expected, abs=1e-12)
+        weighted = criterion(y_left, y_right, np.ones(len(y_left)), np.ones(len(y_right)))
+        assert weighted == pytest.approx(expected, abs=1e-12)
+        # با کد کلاس‌ها (0، 1، ...) همان امتیاز
+        codes = float(criterion(np.searchsorted(labels, y_left), np.searchsorted(labels, y_right)))
+        assert codes == pytest.approx(expected, abs=1e-12)
+
+
+@pytest.mark.parametrize("name", sorted(CRITERIA))
+def test_kernel_batch_matches_rows(name):
+    kernel = get_count_kernel(get_criterion(name))
+    rng = np.random.default_rng(1)
+    left, right = rng.integers(0, 5, (7, 3)), rng.integers(0, 5, (7, 3))
+    rows = [kernel(left[i], right[i]) for i in range(len(left))]
+    np.testing.assert_allclose(kernel(left, right), rows, equal_nan=True)
+
+
+def _counts_with_empty_branches(n_classes, seed=3):
+    rng = np.random.default_rng(seed)
+    left = rng.integers(0, 4, (40, n_classes)).astype(float)
+    right = rng.integers(0, 4, (40, n_classes)).astype(float)
+    left[:3] = 0
+    right[3:6] = 0
+    left[6], right[6] = 0, 0
+    return left, right
+
+
+@pytest.mark.parametrize("n_classes", [1, 2, 3])
+@pytest.mark.parametrize("name", sorted(CRITERIA))
+def test_fused_scorer_matches_kernel(name, n_classes):
+    kernel = get_count_kernel(get_criterion(name))
+    left, right = _counts_with_empty_branches(n_classes)
+    expected = kernel(left, right)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fused = FUSED_SCORERS[kernel](CountStatistics(left, right))
+    np.testing.assert_array_equal(fused, expected)
+    # همه هسته‌ها با هم روی یک CountStatistics مشترک
+    kernels = list(dict.fromkeys(get_count_kernel(get_criterion(other)) for other in sorted(CRITERIA)))
+    np.testing.assert_array_equal(fused_scores(left, right, kernels)[:, kernels.index(kernel)], expected)
+
+
+@pytest.mark.parametrize("name", ["gini", "twoing", "chi_squared"])
+def test_tree_with_kernel_matches_label_path(name, assert_same_tree):
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(300, 4)).round(1)
+    y = (X[:, 0] + 0.5 * X[:, 1] + rng.normal(scale=0.5, size=300) > 0).astype(int)
+    criterion = get_criterion(name)
+    assert get_count_kernel(criterion) is not None
+    trees = []
+    # تابعی که هسته ثبت شده ندارد از مسیر برچسب‌محور امتیاز می‌گیرد
+    for func in (criterion, lambda y_left, y_right, *weights: criterion(y_left, y_right, *weights)):
+        metric = SingleCriterionMetric(name, func)
+        metric.classes = np.unique(y)
+        trees.append(TreeBuilder(metric, max_depth=4).build(X, y))
+    assert_same_tree(*trees)
@@ -0,0 +1,100 @@
+"""
+کش FN (FNCache): حذف LRU با سقف حجم، شمارنده‌ها، لایه دیسکی، فشرده‌سازی ماسک‌ها و
+استفاده مدل از کش در fit دوباره روی همان داده.
+"""
+
+import numpy as np
+import pytest
+
+from model.weighted_decision_tree import DEFAULT_CRITERIA, WeightedDecisionTreeModel, WeightedVotingMetric
+from utils.fn_cache import FNCache
+
+
+def _mask(length, seed=0):
+    return np.random.default_rng(seed).random(length) < 0.3
+
+
+@pytest.mark.parametrize("length", [0, 1, 7, 8, 9, 1000])
+def test_pack_unpack_round_trip(length):
+    cache = FNCache()
+    misses = _mask(length)
+    cache.put("key", misses)
+    restored = cache.get("key")
+    assert restored.dtype == bool
+    np.testing.assert_array_equal(restored, misses)
+
+
+def test_lru_eviction_under_byte_budget():
+    # هر مدخل ۸ بایت طول + ۸ بایت بیت‌های فشرده (۶۴ سطر) است
+    cache = FNCache(max_bytes=48)
+    for key in "abc":
+        cache.put(key, _mask(64))
+    assert len(cache) == 3 and cache.current_bytes == 48
+    cache.get("a")  # a تازه‌ترین می‌شود و b قدیمی‌ترین
+    cache.put("d", _mask(64))
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in "acd")
+    assert cache.evictions == 1
+    assert cache.current_bytes <= cache.max_bytes
+    # مدخل بزرگ‌تر از کل سقف نگهداری نمی‌شود و مدخل‌های دیگر را بیرون نمی‌کند
+    cache.put("big", _mask(1000))
+    assert cache.get("big") is None and len(cache) == 3
+
+
+def test_hit_and_miss_counters():
+    cache = FNCache()
+    assert cache.get("x") is None
+    cache.put("x", _mask(10))
+    cache.get("x")
+    cache.get("x")
+    assert cache.stats() == {"hits": 2, "misses": 1, "disk_hits": 0, "evictions": 0, "entries": 1,
+                             "bytes": cache.current_bytes}
+
+
+def test_disk_tier_survives_new_cache(tmp_path):
+    misses = _mask(100)
+    FNCache(disk_dir=tmp_path).put("key", misses)
+    cache = FNCache(disk_dir=tmp_path)
+    np.testing.assert_array_equal(cache.get("key"), misses)
+    assert (cache.disk_hits, cache.misses, len(cache)) == (1, 0, 1)
+    # بار دوم از لایه حافظه خوانده می‌شود
+    cache.get("key")
+    assert (cache.hits, cache.disk_hits) == (1, 1)
+    cache.clear()
+    assert len(cache) == 0 and cache.get("key") is not None
+
+
+def _data(n_rows=200, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, 4)).round(1)
+    y = (X[:, 0] - X[:, 1] + rng.normal(scale=0.6, size=n_rows) > 0).astype(int)
+    return X, y
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"weighting": "node", "node_refit_every": 1}])
+def test_second_fit_is_served_from_cache(kwargs, assert_same_tree):
+    X, y = _data()
+    cache = FNCache()
+    first = WeightedDecisionTreeModel(max_depth=3, fn_estimator="stump", fn_cache=cache, **kwargs)
+    first.fit(X, y)
+    misses, hits = cache.misses, cache.hits
+    assert misses > 0
+    second = WeightedDecisionTreeModel(max_depth=3, fn_estimator="stump", fn_cache=cache, **kwargs)
+    second.fit(X.copy(), y.copy())
+    assert cache.misses == misses
+    assert cache.hits - hits == misses
+    assert second.metric.weights_dict == first.metric.weights_dict
+    assert_same_tree(second.model, first.model)
+
+
+def test_fit_fingerprint_is_not_reused_for_other_data():
+    X, y = _data()
+    other = _data(seed=1)[0]
+    metric = WeightedVotingMetric(DEFAULT_CRITERIA, fn_estimator="stump")
+    metric.set_dataset(X, y)
+    fit_misses = metric.estimate_misses(X, y)
+    other_misses = metric.estimate_misses(other, y)
+    expected = WeightedVotingMetric(DEFAULT_CRITERIA, fn_estimator="stump").estimate_misses(other, y)
+    for misses, fresh in zip(other_misses, expected):
+        np.testing.assert_array_equal(misses, fresh)
+    assert any(not np.array_equal(a, b) for a, b in zip(fit_misses, other_misses))
@@ -0,0 +1,79 @@
+"""
+Gradient Boosting دودویی: کاهش زیان آموزش در هر مرحله، توقف زودهنگام، استفاده دوباره از
+داده بازه‌بندی شده و نتیجه یکسان جستجوی موازی تقسیم.
+"""
+
+import numpy as np
+import pytest
+
+from model.tree_builder import TreeBuilder
+from model.weighted_gradient_boosting import WeightedGradientBoosting, _log_loss
+
+
+def _data(n_rows=400, seed=0, noise=0.8):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, 5)).round(2)
+    y = (X[:, 0] - X[:, 1] + 0.5 * X[:, 2] ** 2 + rng.normal(scale=noise, size=n_rows) > 0.3).astype(int)
+    return X, y
+
+
+def _booster(**kwargs):
+    params = dict(n_estimators=12, max_depth=3, max_bins=32, fn_estimator="stump", validation_fraction=None)
+    params.update(kwargs)
+    return WeightedGradientBoosting(**params)
+
+
+def _assert_same_stages(model, expected, assert_same_tree):
+    assert model.n_iter_ == expected.n_iter_
+    for tree, leaf_values, other, other_values in zip(model.estimators_, model.leaf_values_,
+                                                      expected.estimators_, expected.leaf_values_):
+        assert_same_tree(tree, other)
+        np.testing.assert_array_equal(leaf_values, other_values)
+
+
+def test_training_loss_decreases_every_stage():
+    X, y = _data()
+    model = _booster().fit(X, y)
+    assert model.n_iter_ == 12
+    initial = _log_loss(y, np.full(len(y), model.init_score_))
+    losses = np.array([initial] + model.train_score_)
+    assert np.all(np.diff(losses) < 0)
+    assert model.train_score_[-1] == pytest.approx(_log_loss(y, model.decision_function(X)))
+
+
+def test_early_stopping_keeps_best_stage():
+    X, y = _data(noise=2.0)
+    model = _booster(n_estimators=200, max_depth=4, learning_rate=0.5, validation_fraction=0.3, n_iter_no_change=5,
+                     tol=0.0, random_state=0).fit(X, y)
+    scores = model.validation_score_
+    assert len(scores) < 200
+    assert model.n_iter_ == int(np.argmin(scores)) + 1
+    assert len(scores) == model.n_iter_ + 5
+    assert len(model.estimators_) == len(model.leaf_values_) == model.n_iter_
+
+
+def test_reused_binned_data_matches_binning_each_stage(monkeypatch, assert_same_tree):
+    X, y = _data()
+    expected = _booster().fit(X, y)
+    build = TreeBuilder.build
+
+    def build_without_binned(self, X, y, sorted_idx=None, sample_weight=None, X_binned=None):
+        return build(self, X, y, sorted_idx, sample_weight)
+
+    monkeypatch.setattr(TreeBuilder, "build", build_without_binned)
+    _assert_same_stages(_booster().fit(X, y), expected, assert_same_tree)
+
+
+@pytest.mark.parametrize("y", [np.arange(60) % 3, np.zeros(60, dtype=int), np.arange(60) % 2 + 2])
+def test_non_binary_target_raises(y):
+    X = np.random.default_rng(0).normal(size=(60, 3))
+    with pytest.raises(ValueError):
+        _booster().fit(X, y)
+
+
+def test_split_threads_give_identical_stages(assert_same_tree):
+    X, y = _data(n_rows=5000)
+    expected = _booster(n_estimators=4).fit(X, y)
+    model = _booster(n_estimators=4, split_n_jobs=4).fit(X, y)
+    _assert_same_stages(model, expected, assert_same_tree)
+    np.testing.assert_array_equal(model.decision_function(X), expected.decision_function(X))
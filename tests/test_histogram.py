@@ -0,0 +1,66 @@
+"""
+حالت هیستوگرامی (max_bins): وقتی هر مقدار متمایز بازه خودش را دارد، درخت باید همان درخت
+حالت دقیق باشد.
+"""
+
+import numpy as np
+import pytest
+
+from model.tree_builder import TreeBuilder
+from model.weighted_decision_tree import DEFAULT_CRITERIA, WeightedDecisionTreeModel, WeightedVotingMetric
+from utils.binning import BinMapper
+
+
+def _data(n_rows=400, n_classes=2, seed=0):
+    rng = np.random.default_rng(seed)
+    # مقادیر گرد شده تا تعداد مقادیر متمایز هر ویژگی کمتر از max_bins باشد
+    X = rng.normal(size=(n_rows, 5)).round(1)
+    signal = X[:, 0] + 0.5 * X[:, 1] + rng.normal(scale=0.5, size=n_rows)
+    y = np.digitize(signal, np.quantile(signal, np.linspace(0, 1, n_classes + 1)[1:-1]))
+    return X, y
+
+
+def _voting_metric(y):
+    metric = WeightedVotingMetric(DEFAULT_CRITERIA)
+    metric.weights_dict = {name: (i + 1) / 45 for i, (name, _) in enumerate(DEFAULT_CRITERIA)}
+    metric.classes = np.unique(y)
+    return metric
+
+
+def test_bin_mapper_keeps_distinct_values():
+    X, _ = _data()
+    mapper = BinMapper(max_bins=255).fit(X)
+    binned = mapper.transform(X)
+    for f in range(X.shape[1]):
+        distinct = np.unique(X[:, f])
+        assert mapper.n_bins_[f] == len(distinct)
+        np.testing.assert_array_equal(binned[:, f], np.searchsorted(distinct, X[:, f]))
+
+
+def test_bin_mapper_respects_max_bins():
+    X = np.random.default_rng(1).normal(size=(2000, 3))
+    mapper = BinMapper(max_bins=16).fit(X)
+    binned = mapper.transform(X)
+    assert (mapper.n_bins_ <= 16).all()
+    for f in range(X.shape[1]):
+        # شماره بازه با مقدار ویژگی یکنوا است
+        order = np.argsort(X[:, f], kind="stable")
+        assert (np.diff(binned[order, f].astype(int)) >= 0).all()
+
+
+@pytest.mark.parametrize("n_classes", [2, 3])
+def test_lossless_bins_match_exact_tree(n_classes, assert_same_tree):
+    X, y = _data(n_classes=n_classes)
+    exact = TreeBuilder(_voting_metric(y), max_depth=5).build(X, y)
+    binned = TreeBuilder(_voting_metric(y), max_depth=5, max_bins=255).build(X, y)
+    assert_same_tree(binned, exact)
+
+
+def test_lossless_bins_match_exact_model():
+    X, y = _data()
+    exact = WeightedDecisionTreeModel(max_depth=4, fn_estimator="stump")
+    binned = WeightedDecisionTreeModel(max_depth=4, fn_estimator="stump", max_bins=255)
+    exact.fit(X, y)
+    binned.fit(X, y)
+    assert binned.metric.weights_dict == pytest.approx(exact.metric.weights_dict)
+    np.testing.assert_allclose(binned.predict_proba(X), exact.predict_proba(X))
@@ -0,0 +1,19 @@
+"""
+import تنبل مدل: هر ماژول در یک پردازه تازه import می‌شود و نباید ماژول‌های معیار
+(criteria.* به جز base، registry و fused) یا کتابخانه‌های سنگین (scipy، pandas، ...) را
+بارگذاری کند.
+
+بودجه زمانی (میلی‌ثانیه) به ماشین و دیسک بستگی دارد و اینجا بررسی نمی‌شود؛ آن را
+python -m benchmarks.run --suite import --import-budget-ms 500 کنترل می‌کند.
+"""
+
+import pytest
+
+from benchmarks.bench_import import MODULES, measure_import
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_import_is_lazy(module):
+    record = measure_import(module, repeat=1)
+    assert record["eager_criteria"] == []
+    assert record["heavy"] == []
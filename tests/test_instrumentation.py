@@ -0,0 +1,104 @@
+"""
+اندازه‌گیری آموزش (instrumentation): fit چیزی چاپ نمی‌کند، زمان‌ها و شمارنده‌ها در
+model.stats جمع می‌شوند و FitStats با pickle کردن مدل حفظ می‌شود (قفل آن دوباره ساخته می‌شود).
+"""
+
+import pickle
+
+import numpy as np
+
+from model.weighted_decision_tree import DEFAULT_CRITERIA, WeightedDecisionTreeModel
+from utils.instrumentation import NULL_STATS, FitStats
+
+
+def _data(n_rows=400, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, 3))
+    y = (X[:, 0] + 0.5 * X[:, 1] + rng.normal(scale=0.5, size=n_rows) > 0).astype(int)
+    return X, y
+
+
+def _majority_share(y_left, y_right):
+    """معیار سفارشی بدون هسته شمارش‌محور (و بدون فرمول ترکیبی)."""
+    return max(np.mean(y_left), np.mean(y_right))
+
+
+def test_fit_is_silent_and_fills_stats(capsys):
+    X, y = _data()
+    model = WeightedDecisionTreeModel(max_depth=3, fn_estimator="stump", instrumentation=True)
+    model.fit(X, y)
+    model.predict(X)
+
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert captured.err == ""
+
+    summary = model.stats.summary()
+    for name in ("fit", "weight_init", "tree_build", "split_search", "criteria:fused"):
+        assert summary["timers"][name]["calls"] > 0
+    # معیارهای داخلی همه در criteria:fused امتیاز می‌گیرند، نه با زمان‌سنج جداگانه
+    assert not any(name.startswith("criterion:") for name in summary["timers"])
+    for name in ("evaluate_counts", "candidates_scored", "fn_estimates", "nodes_searched"):
+        assert summary["counters"][name] > 0
+
+
+def test_custom_criterion_has_its_own_timer():
+    X, y = _data()
+    criteria = list(DEFAULT_CRITERIA) + [("majority_share", _majority_share)]
+    model = WeightedDecisionTreeModel(criteria_funcs_weights=criteria, max_depth=2, fn_estimator="stump",
+                                      instrumentation=True)
+    model.fit(X, y)
+    timers = model.stats.summary()["timers"]
+    assert timers["criterion:majority_share"]["calls"] > 0
+    assert timers["criteria:fused"]["calls"] > 0
+    assert [name for name in timers if name.startswith("criterion:")] == ["criterion:majority_share"]
+
+
+def test_default_fit_is_silent_without_stats(capsys):
+    X, y = _data()
+    model = WeightedDecisionTreeModel(max_depth=3, fn_estimator="stump")
+    model.fit(X, y)
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert captured.err == ""
+    assert model.stats is NULL_STATS
+    assert model.stats.summary() == {"timers": {}, "counters": {}, "peak_memory_bytes": {}}
+
+
+def test_callback_receives_every_timer():
+    X, y = _data()
+    seen = []
+    model = WeightedDecisionTreeModel(max_depth=2, fn_estimator="stump", callback=lambda name, s: seen.append(name))
+    model.fit(X, y)
+    timers = model.stats.summary()["timers"]
+    assert len(seen) == sum(t["calls"] for t in timers.values())
+    assert set(seen) == set(timers)
+
+
+def test_memory_mode_records_peaks_not_times():
+    X, y = _data()
+    model = WeightedDecisionTreeModel(max_depth=2, fn_estimator="stump", instrumentation="memory")
+    model.fit(X, y)
+    summary = model.stats.summary()
+    assert summary["timers"] == {}
+    assert summary["peak_memory_bytes"]["fit"] > 0
+
+
+def test_pickled_model_keeps_fit_stats():
+    X, y = _data()
+    model = WeightedDecisionTreeModel(max_depth=3, fn_estimator="stump", instrumentation=True)
+    model.fit(X, y)
+
+    restored = pickle.loads(pickle.dumps(model))
+    assert isinstance(restored.stats, FitStats)
+    assert restored.stats.summary() == model.stats.summary()
+    np.testing.assert_array_equal(restored.predict(X), model.predict(X))
+
+    # قفل در pickle نیست و پس از بازیابی یک قفل تازه و آزاد ساخته می‌شود
+    assert "_lock" not in restored.stats.__getstate__()
+    assert restored.stats._lock is not model.stats._lock
+    assert not restored.stats._lock.locked()
+    before = restored.stats.counters["evaluate_counts"]
+    restored.stats.count("evaluate_counts", 2)
+    assert restored.stats.counters["evaluate_counts"] == before + 2
+    assert model.stats.counters["evaluate_counts"] == before
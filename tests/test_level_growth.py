@@ -0,0 +1,58 @@
+"""
+رشد سطح‌به‌سطح (growth="level") باید همان درخت رشد عمق‌اول پیش‌فرض را بسازد.
+"""
+
+import numpy as np
+import pytest
+
+from model.tree_builder import TreeBuilder
+from model.weighted_decision_tree import (DEFAULT_CRITERIA, SingleCriterionMetric, WeightedDecisionTreeModel,
+                                          WeightedVotingMetric)
+
+
+def _data(n_rows=600, n_classes=2, seed=1):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, 8)).round(1)
+    X[:, 5:] = X[:, 5:] > 0.7
+    signal = X[:, 0] + X[:, 6] + rng.normal(size=n_rows)
+    y = np.digitize(signal, np.quantile(signal, np.linspace(0, 1, n_classes + 1)[1:-1]))
+    return X, y
+
+
+def _voting_metric(y):
+    metric = WeightedVotingMetric(DEFAULT_CRITERIA)
+    metric.weights_dict = {name: (i + 1) / 45 for i, (name, _) in enumerate(DEFAULT_CRITERIA)}
+    metric.classes = np.unique(y)
+    return metric
+
+
+@pytest.mark.parametrize("n_classes", [2, 3])
+# با max_features ترتیب انتخاب تصادفی ویژگی‌ها در دو حالت متفاوت است
+@pytest.mark.parametrize("kwargs", [{}, {"max_bins": 32}, {"categorical_features": [5, 6, 7]}])
+def test_level_matches_depth(n_classes, kwargs, assert_same_tree):
+    X, y = _data(n_classes=n_classes)
+    depth = TreeBuilder(_voting_metric(y), max_depth=6, **kwargs).build(X, y)
+    level = TreeBuilder(_voting_metric(y), max_depth=6, growth="level", **kwargs).build(X, y)
+    assert_same_tree(level, depth)
+
+
+def test_level_matches_depth_with_weights_and_custom_criterion(assert_same_tree):
+    X, y = _data(n_rows=300)
+    weights = np.random.default_rng(2).integers(1, 4, len(y)).astype(float)
+    trees = []
+    for growth in ("depth", "level"):
+        # معیاری بدون هسته شمارش‌محور (مسیر برچسب‌محور)
+        metric = SingleCriterionMetric("custom", lambda left, right, *w: abs(np.mean(left) - np.mean(right)))
+        metric.classes = np.unique(y)
+        trees.append(TreeBuilder(metric, max_depth=4, growth=growth).build(X, y, sample_weight=weights))
+    assert_same_tree(trees[1], trees[0])
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"max_bins": 32}, {"class_weight": "balanced"}])
+def test_level_model_matches_default(kwargs):
+    X, y = _data(n_rows=300)
+    depth = WeightedDecisionTreeModel(max_depth=4, fn_estimator="stump", **kwargs)
+    level = WeightedDecisionTreeModel(max_depth=4, fn_estimator="stump", growth="level", **kwargs)
+    depth.fit(X, y)
+    level.fit(X, y)
+    np.testing.assert_allclose(level.predict_proba(X), depth.predict_proba(X))
@@ -0,0 +1,38 @@
+"""
+تخمین موازی FN: Process Pool و حافظه مشترک یک بار در هر fit ساخته و در release آزاد می‌شوند
+و نتیجه با اجرای ترتیبی یکسان است.
+"""
+
+import numpy as np
+import pytest
+
+import model.weighted_decision_tree as wdt
+from model.weighted_decision_tree import WeightedDecisionTreeModel
+
+
+def _data(n_rows=200, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, 4)).round(1)
+    y = (X[:, 0] - X[:, 2] + rng.normal(scale=0.7, size=n_rows) > 0).astype(int)
+    return X, y
+
+
+@pytest.mark.parametrize("kwargs", [{"fn_estimator": "stump"},
+                                    {"fn_estimator": "stump", "weighting": "node", "node_refit_every": 1},
+                                    {"fn_estimator": "kfold", "weighting": "node", "node_refit_every": 2}])
+def test_fn_pool_is_created_once_per_fit(kwargs, monkeypatch, assert_same_tree):
+    X, y = _data()
+    weights = np.random.default_rng(1).integers(0, 3, size=len(y)).astype(float)
+    expected = WeightedDecisionTreeModel(max_depth=3, **kwargs)
+    expected.fit(X, y, sample_weight=weights)
+
+    created = []
+    original = wdt.shared_process_pool
+    monkeypatch.setattr(wdt, "shared_process_pool", lambda *args: created.append(args) or original(*args))
+    model = WeightedDecisionTreeModel(max_depth=3, n_jobs=2, **kwargs)
+    model.fit(X, y, sample_weight=weights)
+
+    assert len(created) == 1
+    assert model.metric._pool is None
+    assert model.metric.weights_dict == pytest.approx(expected.metric.weights_dict)
+    assert_same_tree(model.model, expected.model)
@@ -0,0 +1,70 @@
+"""
+ذخیره و بارگذاری مدل (save_model / load_model) باید همان پیش‌بینی‌ها را برگرداند؛ از جمله با
+برچسب‌های متنی و تقسیم‌های دسته‌ای (bitset).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from model.persistence import load_model, save_model
+from model.weighted_decision_tree import WeightedDecisionTreeModel
+
+
+def _frame(n_rows=800, seed=0):
+    rng = np.random.default_rng(seed)
+    city = rng.integers(0, 6, n_rows)
+    num = rng.normal(size=n_rows).round(2)
+    # برچسب عمدتاً از روی دسته شهر (و برای num بزرگ کلاس سوم)
+    label = np.where(rng.random(n_rows) < 0.85, city % 3, rng.integers(0, 3, n_rows))
+    label = np.where(num > 1.5, 2, label)
+    y = np.array(["loyal", "churn", "unknown"])[label]
+    X = pd.DataFrame({"num": num, "age": rng.integers(18, 80, n_rows), "city": np.array(list("abcdef"))[city]})
+    return X, y
+
+
+def _assert_same_model(loaded, model, X):
+    np.testing.assert_array_equal(loaded.model.classes, model.model.classes)
+    assert loaded.metric.weights_dict == pytest.approx(model.metric.weights_dict)
+    np.testing.assert_array_equal(loaded.predict_proba(X), model.predict_proba(X))
+    np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+
+
+@pytest.mark.parametrize("mmap_mode", ["r", None])
+def test_round_trip_numeric_with_string_classes(tmp_path, mmap_mode):
+    X, y = _frame()
+    X = X.drop(columns="city")
+    model = WeightedDecisionTreeModel(max_depth=4, fn_estimator="stump", positive_label="churn")
+    model.fit(X.values, y)
+    save_model(model, tmp_path)
+    loaded = load_model(tmp_path, mmap_mode=mmap_mode)
+    assert loaded.positive_label == "churn"
+    assert loaded.feature_names_in_ is None and loaded.n_features_in_ == X.shape[1]
+    _assert_same_model(loaded, model, X.values)
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"max_bins": 32}])
+def test_round_trip_categorical_bitsets(tmp_path, kwargs):
+    X, y = _frame()
+    model = WeightedDecisionTreeModel(max_depth=4, fn_estimator="stump", positive_label="churn",
+                                      categorical_features=["city"], **kwargs)
+    model.fit(X, y)
+    assert np.any(np.isnan(model.model.threshold) & (model.model.feature >= 0))
+    model.save(tmp_path)
+    loaded = WeightedDecisionTreeModel.load(tmp_path)
+    assert loaded.feature_names_in_ == list(X.columns)
+    # دسته‌های دیده‌نشده و مقدار گمشده هم مثل مدل اصلی مسیریابی می‌شوند
+    unseen = X.head(4).assign(city=["zz", None, "a", "f"])
+    _assert_same_model(loaded, model, pd.concat([X, unseen], ignore_index=True))
+
+
+def test_load_rejects_unknown_format(tmp_path):
+    X, y = _frame()
+    model = WeightedDecisionTreeModel(max_depth=2, fn_estimator="stump")
+    model.fit(X.drop(columns="city").values, y)
+    save_model(model, tmp_path)
+    metadata = (tmp_path / "metadata.json").read_text(encoding="utf-8")
+    (tmp_path / "metadata.json").write_text(metadata.replace('"format_version": 2', '"format_version": 99'),
+                                            encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_model(tmp_path)
@@ -0,0 +1,46 @@
+"""
+جنگل تصادفی: نمونه bootstrap هر درخت به صورت وزن سطرها روی همان X داده می‌شود و باید همان
+درخت آموزش روی کپی X[sample] را بسازد.
+"""
+
+import numpy as np
+import pytest
+
+from model.tree_builder import Tree
+from model.weighted_decision_tree import WeightedDecisionTreeModel
+from model.weighted_random_forest import WeightedRandomForest, _fit_tree
+from utils.presorted import PresortedDataset
+
+
+def _data(n_rows=300, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, 6)).round(1)
+    y = (X[:, 0] + 0.5 * X[:, 1] + rng.normal(scale=0.5, size=n_rows) > 0).astype(int)
+    return X, y
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"class_weight": "balanced"}, {"weighting": "node", "max_depth": 3}])
+def test_bootstrap_weights_match_copied_sample(kwargs, assert_same_tree):
+    X, y = _data()
+    params = dict(max_depth=4, fn_estimator="stump", max_features="sqrt", positive_label=1)
+    params.update(kwargs)
+    class_weight = params.pop("class_weight", None)
+    arrays, weights = _fit_tree(PresortedDataset(X, y), 7, True, class_weight, dict(params, class_weight=None))
+
+    rng = np.random.default_rng(7)
+    sample = rng.integers(0, len(y), size=len(y))
+    expected = WeightedDecisionTreeModel(random_state=int(rng.integers(2 ** 32)), class_weight=class_weight,
+                                         **params)
+    expected.fit(X[sample], y[sample])
+    assert weights == pytest.approx(expected.metric.weights_dict)
+    assert_same_tree(Tree.from_arrays(arrays), expected.model)
+
+
+def test_forest_is_independent_of_n_jobs():
+    X, y = _data()
+    labels = np.array(["loyal", "churn"])[y]
+    forests = [WeightedRandomForest(n_estimators=4, max_depth=3, fn_estimator="stump", positive_label="churn",
+                                    class_weight={"churn": 2.0}, n_jobs=n_jobs, random_state=0).fit(X, labels)
+               for n_jobs in (None, 2)]
+    np.testing.assert_array_equal(forests[0].predict_proba(X), forests[1].predict_proba(X))
+    assert set(forests[0].predict(X)) <= {"loyal", "churn"}
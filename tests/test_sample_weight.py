@@ -0,0 +1,65 @@
+"""
+وزن صحیح نمونه‌ها باید همان نتیجه تکرار سطرها را بدهد (در معیارها، سازنده درخت و مدل).
+"""
+
+import numpy as np
+import pytest
+
+from criteria.registry import CRITERIA, get_criterion
+from model.tree_builder import TreeBuilder
+from model.weighted_decision_tree import DEFAULT_CRITERIA, WeightedDecisionTreeModel, WeightedVotingMetric
+
+
+def _data(n_rows=200, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, 4)).round(1)
+    y = (X[:, 0] + 0.5 * X[:, 1] + rng.normal(scale=0.5, size=n_rows) > 0).astype(int)
+    weights = rng.integers(1, 4, n_rows).astype(float)
+    return X, y, weights
+
+
+@pytest.mark.parametrize("name", sorted(CRITERIA))
+def test_weighted_criterion_matches_repeated_labels(name):
+    rng = np.random.default_rng(1)
+    y_left, y_right = rng.integers(0, 2, 30), rng.integers(0, 2, 40)
+    w_left, w_right = rng.integers(1, 4, 30), rng.integers(1, 4, 40)
+    criterion = get_criterion(name)
+    expected = criterion(np.repeat(y_left, w_left), np.repeat(y_right, w_right))
+    assert criterion(y_left, y_right, w_left, w_right) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"max_bins": 64}, {"growth": "level"}])
+def test_weighted_tree_matches_repeated_rows(kwargs, assert_same_tree):
+    X, y, weights = _data()
+    repeated = np.repeat(np.arange(len(y)), weights.astype(int))
+    metric = WeightedVotingMetric(DEFAULT_CRITERIA)
+    metric.weights_dict = {name: (i + 1) / 45 for i, (name, _) in enumerate(DEFAULT_CRITERIA)}
+    metric.classes = np.unique(y)
+    weighted = TreeBuilder(metric, max_depth=4, **kwargs).build(X, y, sample_weight=weights)
+    expected = TreeBuilder(metric, max_depth=4, **kwargs).build(X[repeated], y[repeated])
+    assert_same_tree(weighted, expected)
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"weighting": "node"}, {"max_bins": 64}])
+def test_weighted_model_matches_repeated_rows(kwargs):
+    X, y, weights = _data()
+    repeated = np.repeat(np.arange(len(y)), weights.astype(int))
+    weighted = WeightedDecisionTreeModel(max_depth=3, **kwargs)
+    expected = WeightedDecisionTreeModel(max_depth=3, **kwargs)
+    weighted.fit(X, y, sample_weight=weights)
+    expected.fit(X[repeated], y[repeated])
+    assert weighted.metric.weights_dict == pytest.approx(expected.metric.weights_dict)
+    np.testing.assert_allclose(weighted.predict_proba(X), expected.predict_proba(X))
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"max_bins": 64}, {"growth": "level"}])
+def test_zero_weight_rows_are_dropped(kwargs, assert_same_tree):
+    X, y, weights = _data()
+    weights[::3] = 0
+    kept = weights > 0
+    metric = WeightedVotingMetric(DEFAULT_CRITERIA)
+    metric.weights_dict = {name: 1 / len(DEFAULT_CRITERIA) for name, _ in DEFAULT_CRITERIA}
+    metric.classes = np.unique(y)
+    weighted = TreeBuilder(metric, max_depth=4, **kwargs).build(X, y, sample_weight=weights)
+    expected = TreeBuilder(metric, max_depth=4, **kwargs).build(X[kept], y[kept], sample_weight=weights[kept])
+    assert_same_tree(weighted, expected)
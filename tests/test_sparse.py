@@ -0,0 +1,93 @@
+"""
+ورودی scipy.sparse: آموزش روی CSC و پیش‌بینی روی CSR باید همان درخت و پیش‌بینی‌های داده
+چگال را بدهد.
+"""
+
+import numpy as np
+import pytest
+
+sparse = pytest.importorskip("scipy.sparse")
+
+from model.tree_builder import TreeBuilder
+from model.weighted_decision_tree import DEFAULT_CRITERIA, WeightedDecisionTreeModel, WeightedVotingMetric
+from utils.presorted import PresortedDataset
+
+
+def _data(n_rows=500, n_features=30, n_classes=2, seed=0):
+    rng = np.random.default_rng(seed)
+    # عمدتاً صفر، با مقادیر منفی و مثبت تا بلوک صفرها وسط هر ویژگی باشد
+    X = rng.normal(size=(n_rows, n_features)).round(1) * (rng.random((n_rows, n_features)) < 0.15)
+    signal = X[:, 0] - X[:, 1] + X[:, 2] + rng.normal(scale=0.3, size=n_rows)
+    y = np.digitize(signal, np.quantile(signal, np.linspace(0, 1, n_classes + 1)[1:-1]))
+    return X, y
+
+
+@pytest.mark.parametrize("kwargs", [
+    {},
+    {"weighting": "node"},
+    {"fn_estimator": "kfold"},
+    {"max_features": "sqrt", "random_state": 3},
+])
+def test_sparse_model_matches_dense(kwargs, assert_same_tree):
+    X, y = _data()
+    dense = WeightedDecisionTreeModel(max_depth=4, **kwargs)
+    csc = WeightedDecisionTreeModel(max_depth=4, **kwargs)
+    dense.fit(X, y)
+    csc.fit(sparse.csc_matrix(X), y)
+    assert csc.metric.weights_dict == pytest.approx(dense.metric.weights_dict)
+    assert_same_tree(csc.model, dense.model)
+    expected = dense.predict_proba(X)
+    np.testing.assert_array_equal(csc.predict_proba(sparse.csr_matrix(X)), expected)
+    np.testing.assert_array_equal(csc.predict_proba(sparse.csr_matrix(X), chunk_size=64), expected)
+
+
+def test_sparse_weighted_multiclass_tree_matches_dense(assert_same_tree):
+    X, y = _data(n_classes=3)
+    weights = np.random.default_rng(1).integers(1, 4, len(y)).astype(float)
+    metric = WeightedVotingMetric(DEFAULT_CRITERIA)
+    metric.weights_dict = {name: (i + 1) / 45 for i, (name, _) in enumerate(DEFAULT_CRITERIA)}
+    metric.classes = np.unique(y)
+    dense = TreeBuilder(metric, max_depth=5).build(X, y, sample_weight=weights)
+    csc = TreeBuilder(metric, max_depth=5).build(sparse.csc_matrix(X), y, sample_weight=weights)
+    assert_same_tree(csc, dense)
+
+
+def test_duplicates_and_explicit_zeros(assert_same_tree):
+    X, y = _data()
+    rows, cols = np.nonzero(X)
+    # هر غیرصفر به دو درایه تکراری شکسته می‌شود و چند صفر صریح هم اضافه می‌شود
+    coo = sparse.coo_matrix((np.r_[X[rows, cols] / 2, X[rows, cols] / 2, np.zeros(20)],
+                             (np.r_[rows, rows, np.arange(20)], np.r_[cols, cols, np.zeros(20, int)])),
+                            shape=X.shape)
+    dense = WeightedDecisionTreeModel(max_depth=3, fn_estimator="stump")
+    model = WeightedDecisionTreeModel(max_depth=3, fn_estimator="stump")
+    dense.fit(X, y)
+    model.fit(coo, y)
+    assert_same_tree(model.model, dense.model)
+    np.testing.assert_array_equal(model.predict_proba(coo), dense.predict_proba(X))
+
+
+def test_presorted_sparse_and_round_trip(tmp_path):
+    X, y = _data()
+    dense = WeightedDecisionTreeModel(max_depth=3, fn_estimator="stump")
+    dense.fit(X, y)
+    model = WeightedDecisionTreeModel(max_depth=3, fn_estimator="stump")
+    model.fit(PresortedDataset(sparse.csc_matrix(X), y))
+    np.testing.assert_array_equal(model.predict_proba(sparse.csr_matrix(X)), dense.predict_proba(X))
+    model.save(tmp_path)
+    loaded = WeightedDecisionTreeModel.load(tmp_path)
+    np.testing.assert_array_equal(loaded.predict_proba(sparse.csr_matrix(X)), dense.predict_proba(X))
+
+
+@pytest.mark.parametrize("kwargs", [{"max_bins": 32}, {"growth": "level"}, {"categorical_features": [0]}])
+def test_unsupported_modes_raise(kwargs):
+    X, y = _data()
+    with pytest.raises(ValueError):
+        WeightedDecisionTreeModel(max_depth=2, fn_estimator="stump", **kwargs).fit(sparse.csc_matrix(X), y)
+
+
+def test_nan_raises():
+    X, y = _data()
+    X[0, 0] = np.nan
+    with pytest.raises(ValueError):
+        WeightedDecisionTreeModel(max_depth=2, fn_estimator="stump").fit(sparse.csc_matrix(X), y)
@@ -0,0 +1,48 @@
+"""
+جستجوی موازی تقسیم (split_n_jobs): درخت باید با اجرای ترتیبی یکسان باشد؛ ستون‌های تکراری
+در بلوک‌های مختلف ویژگی‌ها تساوی امتیاز می‌سازند و قاعده تساوی (اولین ویژگی) باید حفظ شود.
+"""
+
+import numpy as np
+import pytest
+
+from model.tree_builder import MIN_PARALLEL_ROWS, TreeBuilder
+from model.weighted_decision_tree import WeightedDecisionTreeModel
+
+N_BASE = 4
+
+
+def _data(n_rows=MIN_PARALLEL_ROWS + 1000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, N_BASE)).round(1)
+    X[:, 3] = rng.integers(0, 5, n_rows)
+    signal = X[:, 0] + 0.6 * X[:, 1] + 1.5 * np.isin(X[:, 3], [1, 3])
+    y = (signal + rng.normal(scale=0.5, size=n_rows) > 0.7).astype(int)
+    # ستون‌های N_BASE تا 2*N_BASE-1 تکرار ستون‌های اول هستند (در بلوک‌های دیگر thread ها)
+    return np.hstack([X, X]), y
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"max_bins": 64}, {"growth": "level"}, {"max_bins": 64, "growth": "level"},
+                                    {"categorical_features": [3, N_BASE + 3]},
+                                    {"categorical_features": [3, N_BASE + 3], "growth": "level"}])
+def test_split_threads_build_the_same_tree(kwargs, assert_same_tree):
+    X, y = _data()
+    trees = []
+    for split_n_jobs in (1, 4):
+        model = WeightedDecisionTreeModel(max_depth=4, fn_estimator="stump", split_n_jobs=split_n_jobs, **kwargs)
+        model.fit(X, y)
+        trees.append(model.model)
+    assert_same_tree(trees[1], trees[0])
+    features = trees[0].to_arrays()["feature"]
+    # در تساوی ستون اصلی (اولین ویژگی) انتخاب می‌شود، نه تکرار آن در بلوک بعدی
+    assert features.max() < N_BASE
+
+
+def test_parallel_path_is_used(monkeypatch):
+    X, y = _data()
+    calls = []
+    parallel_split = TreeBuilder._parallel_split
+    monkeypatch.setattr(TreeBuilder, "_parallel_split",
+                        staticmethod(lambda *args: calls.append(1) or parallel_split(*args)))
+    WeightedDecisionTreeModel(max_depth=2, fn_estimator="stump", split_n_jobs=4).fit(X, y)
+    assert calls
@@ -0,0 +1,112 @@
+"""
+پیش‌بینی جریانی فایل‌ها (predict_file): خروجی تکه‌به‌تکه باید با model.predict روی کل جدول
+یکسان باشد، ستون‌های منتقل‌شده کدگذاری نشوند و ستون‌های یک‌داغ زمان آموزش بازسازی شوند.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from model.weighted_decision_tree import WeightedDecisionTreeModel
+
+CITIES = np.array(["tehran", "shiraz", "tabriz", "yazd"])
+
+
+def _frame(n_rows=120, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "customer_id": [f"c{i:04d}" for i in range(n_rows)],
+        "age": rng.integers(18, 70, n_rows),
+        "spend": rng.normal(size=n_rows).round(2),
+        "city": CITIES[rng.integers(0, len(CITIES), n_rows)],
+    })
+    signal = frame["spend"] + (frame["city"] == "tehran") * 1.5 - (frame["age"] > 50)
+    frame["label"] = np.where(signal + rng.normal(scale=0.3, size=n_rows) > 0.5, "churn", "stay")
+    return frame
+
+
+@pytest.fixture
+def numeric_model():
+    frame = _frame()
+    model = WeightedDecisionTreeModel(max_depth=3, fn_estimator="stump", positive_label="churn")
+    model.fit(frame[["age", "spend"]], frame["label"])
+    return frame, model
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 50, 1000])
+def test_csv_round_trip_matches_predict(numeric_model, tmp_path, chunk_size):
+    frame, model = numeric_model
+    frame.drop(columns="label").to_csv(tmp_path / "in.csv", index=False)
+    n_rows = model.predict_file(tmp_path / "in.csv", tmp_path / "out.csv", chunk_size=chunk_size, proba=True,
+                                keep_columns=["customer_id"])
+    result = pd.read_csv(tmp_path / "out.csv")
+    X = frame[["age", "spend"]]
+    assert n_rows == len(frame)
+    assert list(result.columns) == ["customer_id", "prediction", "proba_churn", "proba_stay"]
+    assert list(result["customer_id"]) == list(frame["customer_id"])
+    assert list(result["prediction"]) == list(model.predict(X))
+    np.testing.assert_allclose(result[["proba_churn", "proba_stay"]], model.predict_proba(X))
+
+
+def test_keep_column_is_passed_through_not_encoded(numeric_model, tmp_path, monkeypatch):
+    frame, model = numeric_model
+    frame.drop(columns="label").to_csv(tmp_path / "in.csv", index=False)
+    encoded = []
+    get_dummies = pd.get_dummies
+    monkeypatch.setattr(pd, "get_dummies", lambda data, *args, **kwargs: encoded.append(list(data.columns))
+                        or get_dummies(data, *args, **kwargs))
+    model.predict_file(tmp_path / "in.csv", tmp_path / "out.csv", chunk_size=40, keep_columns=["customer_id"])
+    result = pd.read_csv(tmp_path / "out.csv")
+    # city هم ستون متنی است اما ستون یک‌داغ آن جزء ویژگی‌های مدل نیست
+    assert encoded == []
+    assert list(result["customer_id"]) == list(frame["customer_id"])
+    assert list(result["prediction"]) == list(model.predict(frame[["age", "spend"]]))
+
+
+@pytest.mark.parametrize("chunk_size", [5, 1000])
+def test_one_hot_columns_are_rebuilt(tmp_path, chunk_size):
+    frame = _frame()
+    X = pd.get_dummies(frame[["age", "spend", "city"]], columns=["city"], dtype=float)
+    model = WeightedDecisionTreeModel(max_depth=3, fn_estimator="stump", positive_label="churn")
+    model.fit(X, frame["label"])
+    assert "city_tehran" in model.feature_names_in_
+    # ستون‌های فایل ورودی به ترتیب دیگری هستند و تکه‌های کوچک همه شهرها را ندارند
+    frame[["city", "customer_id", "spend", "age"]].to_csv(tmp_path / "in.csv", index=False)
+    model.predict_file(tmp_path / "in.csv", tmp_path / "out.csv", chunk_size=chunk_size,
+                       keep_columns=["customer_id"])
+    result = pd.read_csv(tmp_path / "out.csv")
+    assert list(result["prediction"]) == list(model.predict(X))
+
+
+def test_column_count_mismatch_raises(tmp_path):
+    frame = _frame()
+    model = WeightedDecisionTreeModel(max_depth=3, fn_estimator="stump", positive_label="churn")
+    model.fit(frame[["age", "spend"]].to_numpy(dtype=float), frame["label"])
+    frame[["age", "spend"]].to_csv(tmp_path / "ok.csv", index=False)
+    assert model.predict_file(tmp_path / "ok.csv", tmp_path / "out.csv") == len(frame)
+    frame[["age", "spend", "age"]].to_csv(tmp_path / "in.csv", index=False)
+    with pytest.raises(ValueError):
+        model.predict_file(tmp_path / "in.csv", tmp_path / "out.csv")
+
+
+def test_empty_input_writes_header(numeric_model, tmp_path):
+    frame, model = numeric_model
+    frame.drop(columns="label").head(0).to_csv(tmp_path / "in.csv", index=False)
+    n_rows = model.predict_file(tmp_path / "in.csv", tmp_path / "out.csv", proba=True, keep_columns=["customer_id"])
+    result = pd.read_csv(tmp_path / "out.csv")
+    assert n_rows == 0
+    assert len(result) == 0
+    assert list(result.columns) == ["customer_id", "prediction", "proba_churn", "proba_stay"]
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1000])
+def test_parquet_round_trip_matches_predict(numeric_model, tmp_path, chunk_size):
+    pytest.importorskip("pyarrow")
+    frame, model = numeric_model
+    frame.drop(columns="label").to_parquet(tmp_path / "in.parquet", index=False)
+    n_rows = model.predict_file(tmp_path / "in.parquet", tmp_path / "out.parquet", chunk_size=chunk_size,
+                                keep_columns=["customer_id"])
+    result = pd.read_parquet(tmp_path / "out.parquet")
+    assert n_rows == len(frame)
+    assert list(result["customer_id"]) == list(frame["customer_id"])
+    assert list(result["prediction"]) == list(model.predict(frame[["age", "spend"]]))